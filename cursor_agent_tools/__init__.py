@@ -1,51 +1,122 @@
 import os
 import importlib
-import inspect
 from typing import List, Type, Any, Dict, Callable, Optional, Union, Tuple
 
 # Import core functionality directly
 from .base import BaseAgent
-from .factory import create_agent
+from .logger import get_logger
 from .permissions import PermissionOptions
 
-# Import interact functions
-from .interact import run_agent_interactive, run_agent_chat
+# Initialize logger
+logger = get_logger(__name__)
 
-# Explicitly import agent classes for better type checking
-from .claude_agent import ClaudeAgent
-from .openai_agent import OpenAIAgent
-from .ollama_agent import OllamaAgent
+# Public names that are resolved on first attribute access (PEP 562).
+# Agent classes and the helpers that depend on them pull in provider SDKs,
+# so they are only imported when actually used.
+_LAZY_ATTRS: Dict[str, str] = {
+    "create_agent": ".factory",
+    "run_agent_interactive": ".interact",
+    "run_agent_chat": ".interact",
+    "ClaudeAgent": ".claude_agent",
+    "OpenAIAgent": ".openai_agent",
+    "OllamaAgent": ".ollama_agent",
+}
+
+# Agent classes recorded at build time by _gen_registry. Without the registry (e.g. in a
+# development checkout that has not generated it), agent modules are found by scanning the package.
+_AGENT_MODULES: Optional[Dict[str, str]]
+try:
+    from ._agent_registry import AGENT_MODULES as _AGENT_MODULES
+except ImportError:
+    _AGENT_MODULES = None
 
 # Dynamic agent class discovery (keeping for backward compatibility)
-_agent_classes = {}
+_discovered_agent_classes: Optional[Dict[str, Type[BaseAgent]]] = None
+
+
+def _package_agent_subclasses(subclasses: List[Type[BaseAgent]]) -> List[Type[BaseAgent]]:
+    """Collect the given subclasses and their subclasses, at any depth, that are defined in this package."""
+    found: List[Type[BaseAgent]] = []
+    for subclass in subclasses:
+        if subclass.__module__.startswith(__name__ + "."):
+            found.append(subclass)
+        found.extend(_package_agent_subclasses(subclass.__subclasses__()))
+    return found
+
+
+def _discover_agent_classes() -> Dict[str, Type[BaseAgent]]:
+    """
+    Import every agent module in the package and collect the agent classes they define.
+
+    Modules come from the static registry when it exists, otherwise from a scan of the package
+    directory. This only runs the first time the full set of agent classes is needed.
+
+    Returns:
+        Dictionary mapping agent class names to agent classes
+    """
+    global _discovered_agent_classes
+    if _discovered_agent_classes is not None:
+        return _discovered_agent_classes
+
+    agent_classes: Dict[str, Type[BaseAgent]] = {}
+
+    if _AGENT_MODULES is not None:
+        for name, module_name in _AGENT_MODULES.items():
+            try:
+                agent_classes[name] = getattr(importlib.import_module(module_name, __name__), name)
+            except ImportError as e:
+                logger.warning("Could not import %s: %s", module_name[1:], e)
+        _discovered_agent_classes = agent_classes
+        return agent_classes
+
+    # Agent module directory
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # Load all Python files in the current directory that might contain agent implementations.
+    # The name suffix is enough to filter entries, so no per-entry stat is needed.
+    with os.scandir(current_dir) as entries:
+        for entry in entries:
+            file = entry.name
+            if not file.endswith('_agent.py') or file.startswith('__'):
+                continue
+            module_name = file[:-3]  # Remove .py extension
+            try:
+                importlib.import_module(f'.{module_name}', package=__name__)
+            except ImportError as e:
+                logger.warning("Could not import %s: %s", module_name, e)
+
+    # Importing the modules registered their classes as BaseAgent subclasses
+    for cls in _package_agent_subclasses(BaseAgent.__subclasses__()):
+        agent_classes[cls.__name__] = cls
+
+    _discovered_agent_classes = agent_classes
+    return agent_classes
 
 
-def _is_agent_class(obj: Any) -> bool:
-    return (
-        inspect.isclass(obj)
-        and issubclass(obj, BaseAgent)
-        and obj is not BaseAgent
-    )
+def __getattr__(name: str) -> Any:
+    """Resolve lazily imported package attributes on first access."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+    elif name == "_agent_classes":
+        value = _discover_agent_classes()
+    elif _AGENT_MODULES is not None:
+        if name not in _AGENT_MODULES:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(_AGENT_MODULES[name], __name__), name)
+    elif not name.startswith("__") and name in _discover_agent_classes():
+        value = _discover_agent_classes()[name]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
+    # Cache in the module namespace so later lookups skip this hook
+    globals()[name] = value
+    return value
 
-# Agent module directory
-_current_dir = os.path.dirname(os.path.abspath(__file__))
 
-# Load all Python files in the current directory that might contain agent implementations
-for _file in os.listdir(_current_dir):
-    if _file.endswith('_agent.py') and not _file.startswith('__'):
-        _module_name = _file[:-3]  # Remove .py extension
-        try:
-            _module = importlib.import_module(f'.{_module_name}', package='cursor_agent_tools')
-            # Find all agent classes in the module
-            for _name, _obj in inspect.getmembers(_module, _is_agent_class):
-                # Add to our agent classes dict
-                _agent_classes[_name] = _obj
-                # We no longer need to add to globals as we're explicitly importing
-        except ImportError as e:
-            print(f"Warning: Could not import {_module_name}: {e}")
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
 
 
-# Create __all__ list dynamically
 __all__ = ["BaseAgent", "create_agent", "PermissionOptions", "run_agent_interactive", "run_agent_chat",
-           "ClaudeAgent", "OpenAIAgent", "OllamaAgent"] + list(_agent_classes.keys())
+           "ClaudeAgent", "OpenAIAgent", "OllamaAgent"]
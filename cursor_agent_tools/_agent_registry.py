@@ -0,0 +1,14 @@
+"""
+Static registry of the agent classes defined in this package.
+
+Generated by `python -m cursor_agent_tools._gen_registry`; do not edit by hand.
+"""
+
+from typing import Dict
+
+# Agent class name -> module that defines it, relative to the package
+AGENT_MODULES: Dict[str, str] = {
+    "ClaudeAgent": ".claude_agent",
+    "OllamaAgent": ".ollama_agent",
+    "OpenAIAgent": ".openai_agent",
+}
@@ -0,0 +1,107 @@
+"""
+Generate the static agent registry used by the package __init__.
+
+Run this after adding, removing or renaming an agent module:
+
+    python -m cursor_agent_tools._gen_registry
+
+Each *_agent.py module is imported in a separate interpreter so that one module's imports cannot
+affect another's, and the BaseAgent subclasses it defines are written to _agent_registry.py.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_PATH = os.path.join(PACKAGE_DIR, "_agent_registry.py")
+
+# Printed by the child interpreter: one agent class name per line
+_INSPECT_SCRIPT = """
+import importlib, inspect, sys
+from cursor_agent_tools.base import BaseAgent
+module = importlib.import_module(sys.argv[1])
+for name, obj in inspect.getmembers(module, inspect.isclass):
+    if issubclass(obj, BaseAgent) and obj is not BaseAgent and obj.__module__ == module.__name__:
+        print(name)
+"""
+
+_HEADER = '''"""
+Static registry of the agent classes defined in this package.
+
+Generated by `python -m cursor_agent_tools._gen_registry`; do not edit by hand.
+"""
+
+from typing import Dict
+
+# Agent class name -> module that defines it, relative to the package
+AGENT_MODULES: Dict[str, str] = {
+'''
+
+
+def find_agent_modules() -> List[str]:
+    """
+    List the agent module names in the package directory.
+
+    Returns:
+        Sorted module names without the .py extension
+    """
+    with os.scandir(PACKAGE_DIR) as entries:
+        return sorted(
+            entry.name[:-3]
+            for entry in entries
+            if entry.name.endswith("_agent.py") and not entry.name.startswith("__")
+        )
+
+
+def collect_agent_classes() -> Dict[str, str]:
+    """
+    Import each agent module in a subprocess and collect the agent classes it defines.
+
+    Returns:
+        Dictionary mapping agent class names to relative module names
+    """
+    project_root = os.path.dirname(PACKAGE_DIR)
+    registry: Dict[str, str] = {}
+
+    for module_name in find_agent_modules():
+        result = subprocess.run(
+            [sys.executable, "-c", _INSPECT_SCRIPT, f"cursor_agent_tools.{module_name}"],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"Warning: Could not import {module_name}: {result.stderr.strip()}", file=sys.stderr)
+            continue
+        for class_name in result.stdout.split():
+            registry[class_name] = f".{module_name}"
+
+    return registry
+
+
+def write_registry(registry: Dict[str, str]) -> None:
+    """
+    Write the registry module.
+
+    Args:
+        registry: Dictionary mapping agent class names to relative module names
+    """
+    lines = [_HEADER]
+    for class_name in sorted(registry):
+        lines.append(f'    "{class_name}": "{registry[class_name]}",\n')
+    lines.append("}\n")
+
+    with open(REGISTRY_PATH, "w", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+def main() -> None:
+    registry = collect_agent_classes()
+    write_registry(registry)
+    print(f"Wrote {len(registry)} agent classes to {REGISTRY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
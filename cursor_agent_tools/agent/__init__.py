@@ -2,22 +2,15 @@
 Compatibility layer for cursor_agent_tools.agent.
 
 This module re-exports all functionality from cursor_agent_tools for backward compatibility.
+Agent classes and helpers are resolved from cursor_agent_tools on first access, so importing
+this module does not load any provider SDK.
 """
 
+import importlib
+from typing import Any, List
+
 # Re-export main objects from cursor_agent_tools
-from cursor_agent_tools import (
-    # Core functionality
-    BaseAgent,
-    create_agent,
-    run_agent_interactive,
-    run_agent_chat,
-    PermissionOptions,
-
-    # Agent implementations
-    ClaudeAgent,
-    OpenAIAgent,
-    OllamaAgent,
-)
+from cursor_agent_tools import BaseAgent, PermissionOptions
 
 # Re-export from specific modules if needed
 from cursor_agent_tools.permissions import (
@@ -26,5 +19,30 @@ from cursor_agent_tools.permissions import (
     PermissionStatus,
 )
 
-# Make tools available through the agent module if needed
-from cursor_agent_tools import tools
+# Names delegated to cursor_agent_tools on first access
+_LAZY_ATTRS = frozenset({
+    "create_agent",
+    "run_agent_interactive",
+    "run_agent_chat",
+    "ClaudeAgent",
+    "OpenAIAgent",
+    "OllamaAgent",
+})
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve re-exported attributes from cursor_agent_tools on first access."""
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module("cursor_agent_tools"), name)
+    elif name == "tools":
+        # Make tools available through the agent module if needed
+        value = importlib.import_module("cursor_agent_tools.tools")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | _LAZY_ATTRS | {"tools"})
@@ -1,16 +1,137 @@
 """Base agent module for handling agent operations."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Callable, Union, TypedDict
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Callable, TypeVar, Union, TypedDict
+import asyncio
 import json
+import weakref
 
 from .logger import get_logger
 from .permissions import PermissionManager, PermissionOptions, PermissionRequest, PermissionStatus
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Fixed parts of the formatted user message
+_USER_INFO_OPEN = "<user_info>\n"
+_USER_INFO_CLOSE = "\n</user_info>\n\n<user_query>\n"
+_USER_QUERY_OPEN = "<user_query>\n"
+_USER_QUERY_CLOSE = "\n</user_query>"
+
+# API client type cached by shared_client
+ClientT = TypeVar("ClientT")
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize bounded histories (deques) as JSON arrays."""
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> str:
+    """
+    Serialize an object to a compact JSON string.
+
+    Uses orjson when it is installed and falls back to the standard library otherwise. Deques are
+    serialized as arrays.
+
+    Args:
+        obj: The object to serialize
+
+    Returns:
+        The JSON string
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return str(orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode())
+        except TypeError:
+            # orjson rejects some inputs the standard library accepts (e.g. integers over 64 bits)
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON string.
+
+    Uses orjson when it is installed and falls back to the standard library otherwise.
+
+    Args:
+        data: The JSON text
+
+    Returns:
+        The parsed object
+
+    Raises:
+        ValueError: If the text is not valid JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _drop_closed_loops(cache: "weakref.WeakKeyDictionary[Any, Dict[Hashable, Any]]") -> None:
+    """Drop the clients of event loops that have been closed."""
+    # Their clients can no longer be closed, and their open connections keep the loop alive, so the
+    # entries are removed explicitly to let both be garbage collected
+    for loop in [loop for loop in list(cache) if loop.is_closed()]:
+        cache.pop(loop, None)
+
+
+def shared_client(
+    cache: "weakref.WeakKeyDictionary[Any, Dict[Hashable, ClientT]]", key: Hashable, create: Callable[[], ClientT]
+) -> ClientT:
+    """
+    Return the client cached for a key on the running event loop, creating it on first use.
+
+    Connection pools cannot be shared between event loops, so clients are cached per loop. Outside a
+    running event loop a new, unshared client is returned.
+
+    Args:
+        cache: The client cache of the agent class
+        key: The cache key, e.g. the API key and timeout
+        create: Function that creates a new client
+
+    Returns:
+        The shared client
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return create()
+
+    clients = cache.get(loop)
+    if clients is None:
+        _drop_closed_loops(cache)
+        clients = cache[loop] = {}
+    client = clients.get(key)
+    if client is None:
+        client = clients[key] = create()
+    return client
+
+
+async def close_shared_clients(cache: "weakref.WeakKeyDictionary[Any, Dict[Hashable, Any]]") -> None:
+    """
+    Close the clients cached for the running event loop and drop those of closed loops.
+
+    Args:
+        cache: The client cache of the agent class
+    """
+    clients = cache.pop(asyncio.get_running_loop(), {})
+    _drop_closed_loops(cache)
+    for client in clients.values():
+        await client.close()
+
 
 class ToolCall(TypedDict):
     name: str
@@ -66,7 +187,11 @@ class BaseAgent(ABC):
         self.model: Optional[str] = model
         self.conversation_history: List[Dict[str, Any]] = []
         self.available_tools: Dict[str, Dict[str, Any]] = {}
+        # Provider-formatted tool list built by _prepare_tools; reset whenever a tool is registered
+        self._tools_cache: Optional[List[Dict[str, Any]]] = None
         self.system_prompt: str = self._generate_system_prompt()
+        # Structured response of the most recent chat_stream() call
+        self.last_response: Optional[AgentResponse] = None
 
         # Initialize permission manager with options and optional callback
         self.permission_manager = PermissionManager(
@@ -104,6 +229,29 @@ class BaseAgent(ABC):
         """
         pass
 
+    async def chat_stream(
+        self, message: str, user_info: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a message to the AI and yield the response text as it becomes available.
+
+        Agents without a streaming API yield the complete response of chat() as a single chunk.
+        The structured response is available from last_response when the stream ends.
+
+        Args:
+            message: The user's message
+            user_info: Optional dict containing info about the user's current state
+
+        Yields:
+            Chunks of response text
+        """
+        response = await self.chat(message, user_info)
+        if isinstance(response, dict):
+            self.last_response = response
+        else:
+            self.last_response = {"message": response, "tool_calls": [], "thinking": None}
+        yield self.last_response["message"]
+
     @abstractmethod
     async def query_image(self, image_paths: List[str], query: str) -> str:
         """
@@ -149,6 +297,7 @@ class BaseAgent(ABC):
             "function": function,
             "schema": {"name": name, "description": description, "parameters": parameters},
         }
+        self._tools_cache = None
         logger.debug(f"Registered tool: {name}")
 
     @abstractmethod
@@ -217,6 +366,19 @@ class BaseAgent(ABC):
             else:
                 print("Please enter 'y' or 'n'")
 
+    @staticmethod
+    def _error_response(message: str) -> AgentResponse:
+        """
+        Build the structured response returned when a chat request fails.
+
+        Args:
+            message: The error message to return to the caller
+
+        Returns:
+            An AgentResponse with the message and no tool calls
+        """
+        return {"message": message, "tool_calls": [], "thinking": None}
+
     def format_user_message(self, message: str, user_info: Optional[Dict[str, Any]] = None) -> str:
         """
         Format the user message with user_info if provided.
@@ -229,9 +391,9 @@ class BaseAgent(ABC):
             Formatted message
         """
         if user_info:
-            return f"<user_info>\n{json.dumps(user_info, indent=2)}\n</user_info>\n\n<user_query>\n{message}\n</user_query>"
+            return "".join((_USER_INFO_OPEN, dumps_json(user_info), _USER_INFO_CLOSE, message, _USER_QUERY_CLOSE))
         else:
-            return f"<user_query>\n{message}\n</user_query>"
+            return "".join((_USER_QUERY_OPEN, message, _USER_QUERY_CLOSE))
 
     def register_default_tools(self) -> None:
         """
@@ -1,23 +1,286 @@
 # mypy: ignore-errors
+import asyncio
+import functools
+import importlib
+import inspect
 import json
-from typing import Any, Dict, List, Optional, Callable, Union
-
-from anthropic import APIError, AsyncAnthropic, AuthenticationError, BadRequestError, RateLimitError
-
-from .base import BaseAgent, AgentResponse, AgentToolCall
+import logging
+import re
+import sys
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    ClassVar,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .base import BaseAgent, AgentResponse, AgentToolCall, close_shared_clients, dumps_json, shared_client
 from .logger import get_logger
+from .memory import (
+    CHARS_PER_TOKEN,
+    CONTEXT_THRESHOLD,
+    DEFAULT_CONTEXT_WINDOW,
+    KEEP_RECENT_MESSAGES,
+    MAX_HISTORY_MESSAGES,
+    ContextSummary,
+    estimate_tokens,
+    filter_content,
+    find_cut_index,
+    is_user_turn,
+    page_keywords,
+    render_page,
+    score_page,
+    split_rounds,
+)
 from .permissions import PermissionOptions, PermissionRequest, PermissionStatus
-from .tools.register_tools import register_default_tools
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+# HTTP/2 lets the initial and follow-up requests of a turn share one connection, but httpx
+# only supports it when the optional h2 package is installed
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Worker threads for blocking tool calls
+TOOL_WORKERS = 8
+
+# Tool results at least this long are deduplicated across turns
+MIN_SHARED_RESULT_CHARS = 256
+# Most recently seen large tool results kept for deduplication
+MAX_SHARED_RESULTS = 32
+
+# Connection pool limits for the shared Anthropic clients
+_HTTP_LIMITS = {"max_connections": 64, "max_keepalive_connections": 32, "keepalive_expiry": 60}
+
+# Anthropic keys start with sk- (usually sk-ant-), are at least 20 characters and contain no whitespace
+_API_KEY_RE = re.compile(r"sk-\S{17,}")
+
+
+def _sdk() -> ModuleType:
+    """
+    Import the anthropic SDK on first use.
+
+    Loading the SDK takes longer than the rest of the package, so it is deferred until an agent
+    makes its first request or handles an API error.
+
+    Returns:
+        The anthropic module
+    """
+    return importlib.import_module("anthropic")
+
+
+# Content block types compared on every response. String equality checks identity first,
+# so comparing against interned constants is a pointer compare whenever the SDK hands back
+# an interned value, while == keeps the check correct when it does not.
+_TEXT = sys.intern("text")
+_TOOL_USE = sys.intern("tool_use")
+
+# Marks a content block or tool as the end of a cacheable prompt prefix
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+# Lets a request carry the tool definitions without allowing the model to call them
+_NO_TOOL_CHOICE = {"type": "none"}
+
+# System prompt shared by every ClaudeAgent instance
+_CLAUDE_SYSTEM_PROMPT = """
+You are a powerful agentic AI coding assistant, powered by Claude 3.7 Sonnet. You operate exclusively in Cursor, the world's best IDE.
+
+You are pair programming with a USER to solve their coding task.
+The task may require creating a new codebase, modifying or debugging an existing codebase, or simply answering a question.
+Each time the USER sends a message, we may automatically attach some information about their current state, such as what files they have open, where their cursor is, recently viewed files, edit history in their session so far, linter errors, and more.
+This information may or may not be relevant to the coding task, it is up for you to decide.
+Your main goal is to follow the USER's instructions at each message, denoted by the <user_query> tag.
+
+<tool_calling>
+You have tools at your disposal to solve the coding task. Follow these rules regarding tool calls:
+1. ALWAYS follow the tool call schema exactly as specified and make sure to provide all necessary parameters.
+2. The conversation may reference tools that are no longer available. NEVER call tools that are not explicitly provided.
+3. **NEVER refer to tool names when speaking to the USER.** For example, instead of saying 'I need to use the edit_file tool to edit your file', just say 'I will edit your file'.
+4. Only calls tools when they are necessary. If the USER's task is general or you already know the answer, just respond without calling tools.
+5. Before calling each tool, first explain to the USER why you are calling it.
+</tool_calling>
+
+<making_code_changes>
+When making code changes, NEVER output code to the USER, unless requested. Instead use one of the code edit tools to implement the change.
+Use the code edit tools at most once per turn.
+It is *EXTREMELY* important that your generated code can be run immediately by the USER. To ensure this, follow these instructions carefully:
+1. Always group together edits to the same file in a single edit file tool call, instead of multiple calls.
+2. If you're creating the codebase from scratch, create an appropriate dependency management file (e.g. requirements.txt) with package versions and a helpful README.
+3. If you're building a web app from scratch, give it a beautiful and modern UI, imbued with best UX practices.
+4. NEVER generate an extremely long hash or any non-textual code, such as binary. These are not helpful to the USER and are very expensive.
+5. Unless you are appending some small easy to apply edit to a file, or creating a new file, you MUST read the the contents or section of what you're editing before editing it.
+6. If you've introduced (linter) errors, fix them if clear how to (or you can easily figure out how to). Do not make uneducated guesses. And DO NOT loop more than 3 times on fixing linter errors on the same file. On the third time, you should stop and ask the user what to do next.
+7. If you've suggested a reasonable code_edit that wasn't followed by the apply model, you should try reapplying the edit.
+</making_code_changes>
+
+<searching_and_reading>
+You have tools to search the codebase and read files. Follow these rules regarding tool calls:
+1. If available, heavily prefer the semantic search tool to grep search, file search, and list dir tools.
+2. If you need to read a file, prefer to read larger sections of the file at once over multiple smaller calls.
+3. If you have found a reasonable place to edit or answer, do not continue calling tools. Edit or answer from the information you have found.
+</searching_and_reading>
+
+Answer the user's request using the relevant tool(s), if they are available. Check that all the required parameters for each tool call are provided or can reasonably be inferred from context. IF there are no relevant tools or there are missing values for required parameters, ask the user to supply these values; otherwise proceed with the tool calls. If the user provides a specific value for a parameter (for example provided in quotes), make sure to use that value EXACTLY. DO NOT make up values for or ask about optional parameters. Carefully analyze descriptive terms in the request as they may indicate required parameter values that should be included even if not explicitly quoted.
+
+You MUST use the following format when citing code regions or blocks:
+```12:15:app/components/Todo.tsx
+// ... existing code ...
+```
+This is the ONLY acceptable format for code citations. The format is ```startLine:endLine:filepath where startLine and endLine are line numbers.
+"""
+
+
+# Name, description and parameter schema of the tools that let Claude manage its own context
+_CONTEXT_TOOL_SPECS: Tuple[Tuple[str, str, Dict[str, Any]], ...] = (
+    (
+        "recall",
+        (
+            "Retrieve the full content of an archived conversation page. When the conversation "
+            "grows long, earlier turns are moved out of the context and listed in the conversation "
+            "summary as bookmarks like [p3: edit_file, auth.py, rate-limit]. Call this tool with the "
+            "page id when you need the details of one of those turns."
+        ),
+        {
+            "properties": {
+                "page_id": {
+                    "type": "string",
+                    "description": "The page id from the bookmark, e.g. p3",
+                }
+            },
+            "required": ["page_id"],
+        },
+    ),
+    (
+        "summary_context",
+        (
+            "Summarize the most recent completed conversation turns into a single short summary to "
+            "free up context. The full turns stay available through the recall tool."
+        ),
+        {
+            "properties": {
+                "span": {
+                    "type": "integer",
+                    "description": "Number of recent completed turns to summarize",
+                }
+            },
+            "required": ["span"],
+        },
+    ),
+    (
+        "filter_context",
+        (
+            "Remove content that is no longer relevant from earlier conversation turns, such as large "
+            "tool outputs. Text matching the regular expression is replaced with [filtered]."
+        ),
+        {
+            "properties": {
+                "criteria": {
+                    "type": "string",
+                    "description": "Case-insensitive regular expression matching the text to remove",
+                }
+            },
+            "required": ["criteria"],
+        },
+    ),
+    (
+        "retrieve_memory",
+        (
+            "Search the conversation turns that were moved out of the context and return the full "
+            "text of the best matching ones."
+        ),
+        {
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords describing the information to retrieve",
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "Maximum number of turns to return (default: 3)",
+                },
+            },
+            "required": ["query"],
+        },
+    ),
+)
+
+# Claude API tool definitions shared by every agent, keyed by tool name. Filled from the static
+# default tool specs the first time default tools are registered.
+_SHARED_TOOL_FORMS: Dict[str, Dict[str, Any]] = {}
+
+
+def _tool_form(name: str, description: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a tool definition in the format expected by the Claude API.
+
+    Args:
+        name: Name of the tool
+        description: Description of what the tool does
+        parameters: Dict describing the parameters the tool takes
+
+    Returns:
+        The tool definition
+    """
+    # Claude tools format:
+    # {
+    #   "name": "tool_name",
+    #   "description": "Tool description",
+    #   "input_schema": {
+    #     "type": "object",
+    #     "properties": {
+    #       "property_name": {
+    #         "type": "string",
+    #         "description": "Property description"
+    #       },
+    #       ...
+    #     },
+    #     "required": ["property_name", ...]
+    #   }
+    # }
+    return {
+        "name": name,
+        "description": description,
+        "input_schema": {
+            "type": "object",
+            "properties": parameters["properties"],
+            "required": parameters.get("required", []),
+        },
+    }
+
 
 class ClaudeAgent(BaseAgent):
     """
     Claude Agent that implements the BaseAgent interface using Anthropic's Claude models.
     """
 
+    # Clients shared between agents, per event loop and keyed by (api_key, timeout), because httpx
+    # connection pools cannot cross event loops
+    _client_cache: ClassVar[
+        "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], AsyncAnthropic]]"
+    ] = weakref.WeakKeyDictionary()
+
+    # Worker threads for blocking tool calls, shared by all agents and created on first use
+    _tool_executor: ClassVar[Optional[ThreadPoolExecutor]] = None
+
     def __init__(
         self,
         api_key: str,
@@ -56,16 +319,97 @@ class ClaudeAgent(BaseAgent):
         self.timeout = timeout
         self.extra_kwargs = kwargs
 
-        # Initialize Anthropic client
-        self.client = AsyncAnthropic(api_key=api_key)
-        logger.debug("Initialized Anthropic client")
+        # Request parameters shared by every chat API call. The system prompt is added per call
+        # because callers such as run_agent_interactive swap it on the agent.
+        self._base_params: Dict[str, Any] = {
+            "model": self.model or "claude-3-5-sonnet-latest",
+            "max_tokens": 4096,
+            "temperature": temperature,
+        }
 
-        self.conversation_history = []
+        # The Anthropic client is looked up in the shared cache on first use (see the client property)
+        self._client: Optional["AsyncAnthropic"] = None
+
+        # Bounded record of the most recent messages. Appending past the limit drops the oldest
+        # entry without reallocating; by then it has been folded into the summary and archived as
+        # a page, or is still part of _api_messages.
+        self.conversation_history: Deque[Dict[str, Any]] = deque(maxlen=MAX_HISTORY_MESSAGES)
+        # Messages sent to the API, kept in step with conversation_history by _append_message
+        self._api_messages: List[Dict[str, Any]] = []
+
+        # Context window management: once the estimated size of _api_messages plus the system
+        # prompt and tools passes
+        # context_threshold * context_window tokens, or it holds more than max_history_messages,
+        # older messages are folded into a summary message and archived as pages
+        self.context_window = DEFAULT_CONTEXT_WINDOW
+        self.context_threshold = CONTEXT_THRESHOLD
+        self.keep_recent_messages = KEEP_RECENT_MESSAGES
+        self.max_history_messages = MAX_HISTORY_MESSAGES
+        self._token_count = 0
+        self._context_summary = ContextSummary()
+        self._summary_message: Optional[Dict[str, Any]] = None
+        # Messages removed from the context, one page per user turn, readable through the recall tool
+        self._pages: Dict[str, List[Dict[str, Any]]] = {}
+        # Recent large tool results keyed by their own text, so identical results are stored once.
+        # Least recently seen results are evicted past max_shared_results.
+        self.max_shared_results = MAX_SHARED_RESULTS
+        self._tool_results: "OrderedDict[str, str]" = OrderedDict()
+
+        # System prompt blocks sent with each request, rebuilt when system_prompt is reassigned
+        self._system_blocks: Optional[Tuple[str, List[Dict[str, Any]]]] = None
+        # (system blocks, tool list, token estimate) of the prefix sent with every request
+        self._prefix_tokens: Optional[Tuple[Any, Any, int]] = None
         self.available_tools = {}
+        # Tool definitions in the shape the Claude API expects, built as tools are registered
+        self._claude_tools: Dict[str, Dict[str, Any]] = {}
+        # Tool name -> function, so executing a tool call takes a single lookup
+        self._tool_functions: Dict[str, Callable] = {}
+        self._tools_cache = None
         self.system_prompt = self._generate_system_prompt()
         logger.debug(f"Generated system prompt ({len(self.system_prompt)} chars)")
         logger.debug(f"Tool timeouts set to {default_tool_timeout}s")
 
+    @property
+    def client(self) -> "AsyncAnthropic":
+        """
+        The Anthropic client used for API calls.
+
+        Agents with the same API key and timeout share one client, and with it the connection pool,
+        for as long as they run on the same event loop. Outside a running event loop each access
+        creates a new client. Assigning a client overrides the shared one.
+        """
+        if self._client is not None:
+            return self._client
+        return shared_client(self._client_cache, (self.api_key, self.timeout), self._create_client)
+
+    @client.setter
+    def client(self, client: "AsyncAnthropic") -> None:
+        self._client = client
+
+    def _create_client(self) -> "AsyncAnthropic":
+        """Create an Anthropic client with a tuned keep-alive connection pool."""
+        anthropic = _sdk()
+        # The SDK's HTTP client subclasses httpx.AsyncClient (the httpx2 fork in newer SDK
+        # releases), so the pool and timeout settings are built with the module it actually uses
+        httpx = importlib.import_module(anthropic.DefaultAsyncHttpxClient.__mro__[1].__module__.partition(".")[0])
+        http_client = anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(**_HTTP_LIMITS),
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            http2=HTTP2_AVAILABLE,
+        )
+        logger.debug(f"Initialized Anthropic client (HTTP/2: {HTTP2_AVAILABLE})")
+        return anthropic.AsyncAnthropic(api_key=self.api_key, timeout=self.timeout, http_client=http_client)
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """
+        Close the Anthropic clients shared on the running event loop and their connection pools.
+
+        Clients of event loops that have been closed are dropped, and their connections are released
+        when the clients are garbage collected.
+        """
+        await close_shared_clients(cls._client_cache)
+
     def _is_valid_api_key(self, api_key: str) -> bool:
         """
         Validate the format of the Anthropic API key.
@@ -76,128 +420,255 @@ class ClaudeAgent(BaseAgent):
         Returns:
             True if the key is a valid format, False otherwise
         """
-        if not api_key or not isinstance(api_key, str):
-            logger.warning("API key is empty or not a string")
-            return False
+        # A single compiled match covers the prefix, length and whitespace checks; dummy keys
+        # are allowed in test environments
+        valid = isinstance(api_key, str) and (_API_KEY_RE.fullmatch(api_key) is not None or "dummy" in api_key)
+        if not valid:
+            logger.warning("Invalid API key format")
+        return valid
 
-        # Allow dummy keys in test environments
-        if api_key == "sk-ant-dummy" or "dummy" in api_key:
-            logger.debug("Using dummy API key for testing")
-            return True
+    def _append_message(self, message: Dict[str, Any]) -> None:
+        """
+        Add a message to the conversation history and, if it should be sent to the API, to _api_messages.
 
-        # Anthropic keys should start with sk-ant- or sk-
-        valid_prefix = api_key.startswith(("sk-ant-", "sk-"))
+        System messages and messages with empty content are kept out of the API list because the
+        Anthropic API takes the system prompt as a separate parameter and rejects empty content.
 
-        # Keys should be fairly long and not contain spaces
-        valid_length = len(api_key) >= 20 and " " not in api_key
+        Args:
+            message: The message to append
+        """
+        self.conversation_history.append(message)
+        if message["role"] != "system" and message.get("content"):
+            self._api_messages.append(message)
+            self._token_count += estimate_tokens(message)
+            if (
+                self._token_count + self._prompt_prefix_tokens() > self.context_window * self.context_threshold
+                or len(self._api_messages) > self.max_history_messages
+            ):
+                self._compact_context()
+
+    def history_list(self) -> List[Dict[str, Any]]:
+        """
+        Get the recorded conversation history as a list.
 
-        if not valid_prefix or not valid_length:
-            logger.warning("Invalid API key format")
+        Returns:
+            The most recent messages, oldest first
+        """
+        return list(self.conversation_history)
 
-        return valid_prefix and valid_length
+    def _compact_context(self) -> None:
+        """
+        Fold the older part of _api_messages into a single summary message.
 
-    def _generate_system_prompt(self) -> str:
+        The most recent keep_recent_messages messages are kept verbatim. If that leaves nothing to
+        cut while the token budget is exceeded, everything before the latest user query is folded.
+        The list is edited in place so references held by an in-progress chat() stay valid.
         """
-        Generate the system prompt that defines Claude's capabilities and behavior.
-        This is an extensive prompt that replicates Claude's behavior in Cursor.
+        messages = self._api_messages
+        cut = find_cut_index(messages, self.keep_recent_messages)
+        if cut == 0:
+            cut = find_cut_index(messages, 1)
+
+        # The previous summary is already part of _context_summary
+        start = 1 if messages and messages[0] is self._summary_message else 0
+        if cut <= start:
+            return
+
+        evicted = messages[start:cut]
+        self._context_summary.add_messages(evicted)
+        self._archive_pages(evicted, self._context_summary)
+        self._summary_message = {"role": "user", "content": self._context_summary.render()}
+        messages[:cut] = [self._summary_message]
+        self._token_count = sum(estimate_tokens(message) for message in messages)
+        logger.info(f"Summarized {cut - start} older messages, {len(messages)} messages remain in context")
+
+    def _recall(self, page_id: str) -> Union[str, Dict[str, str]]:
         """
-        logger.debug("Generating system prompt for Claude agent")
-        return """
-You are a powerful agentic AI coding assistant, powered by Claude 3.7 Sonnet. You operate exclusively in Cursor, the world's best IDE.
+        Return the full text of an archived context page.
 
-You are pair programming with a USER to solve their coding task.
-The task may require creating a new codebase, modifying or debugging an existing codebase, or simply answering a question.
-Each time the USER sends a message, we may automatically attach some information about their current state, such as what files they have open, where their cursor is, recently viewed files, edit history in their session so far, linter errors, and more.
-This information may or may not be relevant to the coding task, it is up for you to decide.
-Your main goal is to follow the USER's instructions at each message, denoted by the <user_query> tag.
+        Args:
+            page_id: The page id from a bookmark in the conversation summary
 
-<tool_calling>
-You have tools at your disposal to solve the coding task. Follow these rules regarding tool calls:
-1. ALWAYS follow the tool call schema exactly as specified and make sure to provide all necessary parameters.
-2. The conversation may reference tools that are no longer available. NEVER call tools that are not explicitly provided.
-3. **NEVER refer to tool names when speaking to the USER.** For example, instead of saying 'I need to use the edit_file tool to edit your file', just say 'I will edit your file'.
-4. Only calls tools when they are necessary. If the USER's task is general or you already know the answer, just respond without calling tools.
-5. Before calling each tool, first explain to the USER why you are calling it.
-</tool_calling>
+        Returns:
+            The page text, or a dict with an error if the page does not exist
+        """
+        page = self._pages.get(page_id.strip().strip("[]"))
+        if page is None:
+            return {"error": f"Page {page_id} not found. Available pages: {', '.join(self._pages) or 'none'}"}
+        return render_page(page)
 
-<making_code_changes>
-When making code changes, NEVER output code to the USER, unless requested. Instead use one of the code edit tools to implement the change.
-Use the code edit tools at most once per turn.
-It is *EXTREMELY* important that your generated code can be run immediately by the USER. To ensure this, follow these instructions carefully:
-1. Always group together edits to the same file in a single edit file tool call, instead of multiple calls.
-2. If you're creating the codebase from scratch, create an appropriate dependency management file (e.g. requirements.txt) with package versions and a helpful README.
-3. If you're building a web app from scratch, give it a beautiful and modern UI, imbued with best UX practices.
-4. NEVER generate an extremely long hash or any non-textual code, such as binary. These are not helpful to the USER and are very expensive.
-5. Unless you are appending some small easy to apply edit to a file, or creating a new file, you MUST read the the contents or section of what you're editing before editing it.
-6. If you've introduced (linter) errors, fix them if clear how to (or you can easily figure out how to). Do not make uneducated guesses. And DO NOT loop more than 3 times on fixing linter errors on the same file. On the third time, you should stop and ask the user what to do next.
-7. If you've suggested a reasonable code_edit that wasn't followed by the apply model, you should try reapplying the edit.
-</making_code_changes>
+    def _archive_pages(self, messages: List[Dict[str, Any]], summary: ContextSummary) -> None:
+        """
+        Store messages leaving the context as recallable pages and bookmark them in a summary.
 
-<searching_and_reading>
-You have tools to search the codebase and read files. Follow these rules regarding tool calls:
-1. If available, heavily prefer the semantic search tool to grep search, file search, and list dir tools.
-2. If you need to read a file, prefer to read larger sections of the file at once over multiple smaller calls.
-3. If you have found a reasonable place to edit or answer, do not continue calling tools. Edit or answer from the information you have found.
-</searching_and_reading>
+        Args:
+            messages: The messages being removed, starting at a user turn
+            summary: The summary that lists the bookmarks
+        """
+        for page in split_rounds(messages):
+            page_id = f"p{len(self._pages) + 1}"
+            self._pages[page_id] = page
+            summary.add_bookmark(page_id, page_keywords(page))
 
-Answer the user's request using the relevant tool(s), if they are available. Check that all the required parameters for each tool call are provided or can reasonably be inferred from context. IF there are no relevant tools or there are missing values for required parameters, ask the user to supply these values; otherwise proceed with the tool calls. If the user provides a specific value for a parameter (for example provided in quotes), make sure to use that value EXACTLY. DO NOT make up values for or ask about optional parameters. Carefully analyze descriptive terms in the request as they may indicate required parameter values that should be included even if not explicitly quoted.
+    def _summary_context(self, span: int = 1) -> Union[str, Dict[str, str]]:
+        """
+        Collapse the most recent completed turns into one summary message.
 
-You MUST use the following format when citing code regions or blocks:
-```12:15:app/components/Todo.tsx
-// ... existing code ...
-```
-This is the ONLY acceptable format for code citations. The format is ```startLine:endLine:filepath where startLine and endLine are line numbers.
-"""
+        The turn in progress (the one calling this tool) is left untouched.
+
+        Args:
+            span: Number of completed user turns to collapse
+
+        Returns:
+            A description of what was collapsed, or a dict with an error
+        """
+        messages = self._api_messages
+        current = find_cut_index(messages, 1)
+        starts = [
+            index for index in range(current)
+            if is_user_turn(messages[index]) and messages[index] is not self._summary_message
+        ]
+        if not starts:
+            return {"error": "There are no earlier turns to summarize"}
+
+        start = starts[-max(1, min(int(span), len(starts)))]
+        evicted = messages[start:current]
+        summary = ContextSummary()
+        summary.add_messages(evicted)
+        self._archive_pages(evicted, summary)
+        messages[start:current] = [{"role": "user", "content": summary.render()}]
+        self._token_count = sum(estimate_tokens(message) for message in messages)
+        return f"Summarized {len(evicted)} messages from {len(summary.bookmarks)} turns into one message."
+
+    def _filter_context(self, criteria: str) -> Union[str, Dict[str, str]]:
+        """
+        Remove text matching a regular expression from earlier turns in the context.
+
+        Args:
+            criteria: Regular expression (case-insensitive) of the text to remove
+
+        Returns:
+            A description of what was filtered, or a dict with an error
+        """
+        try:
+            pattern = re.compile(criteria, re.IGNORECASE)
+        except re.error as e:
+            return {"error": f"Invalid regular expression: {e}"}
+
+        messages = self._api_messages
+        changed = 0
+        # The turn in progress is left untouched; filtered messages are copied so that
+        # conversation_history keeps the original text
+        for index in range(find_cut_index(messages, 1)):
+            message = messages[index]
+            content = filter_content(message["content"], pattern)
+            if content != message["content"]:
+                messages[index] = {**message, "content": content}
+                changed += 1
+
+        self._token_count = sum(estimate_tokens(message) for message in messages)
+        return f"Filtered matching text from {changed} messages."
+
+    def _retrieve_memory(self, query: str, top_k: int = 3) -> Union[str, Dict[str, str]]:
+        """
+        Search the archived pages for the ones that best match a query.
+
+        Args:
+            query: Keywords to search for
+            top_k: Maximum number of pages to return
+
+        Returns:
+            The text of the best matching pages, or a dict with an error
+        """
+        query_words = [word for word in query.lower().split() if word]
+        if not query_words:
+            return {"error": "The query is empty"}
+
+        scored = [(score_page(page, query_words), page_id) for page_id, page in self._pages.items()]
+        matches = sorted((item for item in scored if item[0] > 0), reverse=True)[:max(1, int(top_k))]
+        if not matches:
+            return {"error": f"No archived pages match '{query}'"}
+        return "\n\n".join(f"[{page_id}]\n{render_page(self._pages[page_id])}" for _, page_id in matches)
+
+    def _generate_system_prompt(self) -> str:
+        """
+        Generate the system prompt that defines Claude's capabilities and behavior.
+        This is an extensive prompt that replicates Claude's behavior in Cursor.
+        """
+        return _CLAUDE_SYSTEM_PROMPT
+
+    def register_tool(
+        self, name: str, function: Callable, description: str, parameters: Dict[str, Any]
+    ) -> None:
+        """
+        Register a function that can be called by Claude.
+
+        Besides the generic registration, the tool definition is stored in the Claude API format
+        so that _prepare_tools does not have to convert it on every turn.
+
+        Args:
+            name: Name of the function
+            function: The actual function to call
+            description: Description of what the function does
+            parameters: Dict describing the parameters the function takes
+        """
+        super().register_tool(name, function, description, parameters)
+        self._tool_functions[name] = function
+        shared = _SHARED_TOOL_FORMS.get(name)
+        if (
+            shared is not None
+            and shared["description"] is description
+            and shared["input_schema"]["properties"] is parameters["properties"]
+        ):
+            # One of the static default tools: reuse the definition shared by all agents
+            self._claude_tools[name] = shared
+        else:
+            self._claude_tools[name] = _tool_form(name, description, parameters)
 
     def _prepare_tools(self) -> Optional[List[Dict[str, Any]]]:
         """
         Prepare the registered tools for Claude API.
 
+        The list is built once and reused until register_tool adds another tool.
+
         Returns:
             List of tools in the format expected by Claude API, or None if no tools are registered
         """
-        if not self.available_tools:
+        if not self._claude_tools:
             logger.debug("No tools registered")
             return None
 
-        logger.debug(f"Preparing {len(self.available_tools)} tools for Claude API")
-        tools = []
-        for name, tool_data in self.available_tools.items():
-            # Claude tools format:
-            # {
-            #   "name": "tool_name",
-            #   "description": "Tool description",
-            #   "input_schema": {
-            #     "type": "object",
-            #     "properties": {
-            #       "property_name": {
-            #         "type": "string",
-            #         "description": "Property description"
-            #       },
-            #       ...
-            #     },
-            #     "required": ["property_name", ...]
-            #   }
-            # }
-
-            tool = {
-                "name": name,
-                "description": tool_data["schema"]["description"],
-                "input_schema": {
-                    "type": "object",
-                    "properties": tool_data["schema"]["parameters"]["properties"],
-                    "required": tool_data["schema"]["parameters"].get("required", []),
-                },
-            }
-            tools.append(tool)
-            logger.debug(f"Prepared tool: {name}")
+        if self._tools_cache is None:
+            logger.debug(f"Preparing {len(self._claude_tools)} tools for Claude API")
+            tools = list(self._claude_tools.values())
+            # A cache breakpoint on the last tool caches the whole tool list as a prompt prefix
+            tools[-1] = {**tools[-1], "cache_control": _EPHEMERAL_CACHE}
+            self._tools_cache = tools
+        return self._tools_cache
+
+    def _system(self) -> List[Dict[str, Any]]:
+        """
+        Build the system parameter for a request.
 
-        return tools if tools else None
+        The prompt is sent as a text block marked for prompt caching, so repeated requests reuse
+        the cached prefix instead of processing the same system prompt again.
 
-    def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        Returns:
+            The system prompt as a list of content blocks
+        """
+        if self._system_blocks is None or self._system_blocks[0] is not self.system_prompt:
+            blocks = [{"type": "text", "text": self.system_prompt, "cache_control": _EPHEMERAL_CACHE}]
+            self._system_blocks = (self.system_prompt, blocks)
+        return self._system_blocks[1]
+
+    async def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Execute the tool calls made by Claude.
 
+        Independent tool calls run concurrently: synchronous tools in a shared pool of worker threads
+        and coroutine tools on the event loop. Each call is limited to default_tool_timeout seconds.
+        Results are returned in the order of the calls.
+
         Args:
             tool_calls: List of tool calls to execute
 
@@ -205,70 +676,127 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
             List of tool call results formatted for the Claude API
         """
         logger.info(f"Executing {len(tool_calls)} tool calls")
-        tool_results = []
+        tool_results = list(await asyncio.gather(*(self._execute_tool_call(call) for call in tool_calls)))
+        logger.info(f"Completed {len(tool_results)} tool call results")
+        return tool_results
 
-        for call in tool_calls:
-            tool_name = call["name"]
-            tool_id = call.get("id")
-            arguments = call.get("input", {})
+    async def _call_tool(self, function: Callable, arguments: Dict[str, Any]) -> Any:
+        """
+        Call a tool function without blocking the event loop.
 
-            logger.debug(f"Executing tool: {tool_name} (id: {tool_id})")
-            logger.debug(f"Tool arguments: {json.dumps(arguments)}")
+        Args:
+            function: The tool function
+            arguments: Keyword arguments for the function
 
-            # Format for user message with tool_result as required by the Claude API
-            result_message = {"role": "user", "content": []}
+        Returns:
+            The tool result
+        """
+        if asyncio.iscoroutinefunction(function):
+            return await function(**arguments)
 
-            if tool_name not in self.available_tools:
-                # Add error result
-                error_msg = f"Tool '{tool_name}' not found. Error: Tool not available."
-                logger.warning(f"Tool not found: {tool_name}")
-                result_message["content"].append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "is_error": True,
-                        "content": error_msg,
-                    }
+        if getattr(function, "__self__", None) is self:
+            # The agent's own tools (recall and the context tools) are quick and edit
+            # _api_messages, so they run on the event loop rather than in a worker thread
+            result = function(**arguments)
+        else:
+            if ClaudeAgent._tool_executor is None:
+                ClaudeAgent._tool_executor = ThreadPoolExecutor(
+                    max_workers=TOOL_WORKERS, thread_name_prefix="claude-agent-tool"
                 )
-            else:
-                try:
-                    function = self.available_tools[tool_name]["function"]
-                    # Convert input to the expected format for the function
-                    logger.debug(f"Calling function for tool: {tool_name}")
-                    result = function(**arguments)
-
-                    # Format the result based on whether it's a string or a JSON-serializable object
-                    content = result if isinstance(result, str) else json.dumps(result)
-
-                    # Log a summary of the result
-                    if isinstance(result, dict) and "error" in result:
-                        logger.warning(f"Tool {tool_name} returned error: {result.get('error')}")
-                    else:
-                        content_preview = content[:100] + "..." if len(content) > 100 else content
-                        logger.debug(f"Tool {tool_name} result: {content_preview}")
-
-                    # Add tool result
-                    result_message["content"].append(
-                        {"type": "tool_result", "tool_use_id": tool_id, "content": content}
-                    )
-                except Exception as e:
-                    error_msg = f"Error executing tool {tool_name}: {str(e)}"
-                    logger.error(f"Error executing tool {tool_name}: {str(e)}")
-                    result_message["content"].append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": tool_id,
-                            "is_error": True,
-                            "content": error_msg,
-                        }
-                    )
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                ClaudeAgent._tool_executor, functools.partial(function, **arguments)
+            )
 
-            # Only add messages with non-empty content
-            if result_message["content"]:
-                tool_results.append(result_message)
+        # Tools registered through a lambda may return a coroutine
+        if inspect.isawaitable(result):
+            result = await result
+        return result
 
-        logger.info(f"Completed {len(tool_results)} tool call results")
-        return tool_results
+    def _share_tool_result(self, content: str) -> str:
+        """
+        Return the stored copy of a large tool result, so repeated results (a file read again, the
+        same search) share one string object.
+
+        Args:
+            content: The tool result text
+
+        Returns:
+            The stored string equal to content
+        """
+        shared = self._tool_results.get(content)
+        if shared is not None:
+            self._tool_results.move_to_end(content)
+            return shared
+        self._tool_results[content] = content
+        if len(self._tool_results) > self.max_shared_results:
+            self._tool_results.popitem(last=False)
+        return content
+
+    async def _execute_tool_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a single tool call made by Claude.
+
+        Args:
+            call: The tool call to execute
+
+        Returns:
+            User message carrying the tool_result for the call
+        """
+        tool_name = call["name"]
+        tool_id = call.get("id")
+        arguments = call.get("input", {})
+
+        logger.debug(f"Executing tool: {tool_name} (id: {tool_id})")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Only serialize the arguments when they are actually logged
+            logger.debug(f"Tool arguments: {dumps_json(arguments)}")
+
+        try:
+            function = self._tool_functions[tool_name]
+        except KeyError:
+            # Add error result
+            error_msg = f"Tool '{tool_name}' not found. Error: Tool not available."
+            logger.warning(f"Tool not found: {tool_name}")
+            return {
+                "role": "user",
+                "content": [{"type": "tool_result", "tool_use_id": tool_id, "is_error": True, "content": error_msg}],
+            }
+
+        try:
+            # Convert input to the expected format for the function
+            logger.debug(f"Calling function for tool: {tool_name}")
+            result = await asyncio.wait_for(self._call_tool(function, arguments), self.default_tool_timeout)
+
+            # Format the result based on whether it's a string or a JSON-serializable object
+            content = result if isinstance(result, str) else dumps_json(result)
+            if len(content) >= MIN_SHARED_RESULT_CHARS:
+                content = self._share_tool_result(content)
+
+            # Log a summary of the result
+            if isinstance(result, dict) and "error" in result:
+                logger.warning(f"Tool {tool_name} returned error: {result.get('error')}")
+            elif logger.isEnabledFor(logging.DEBUG):
+                content_preview = content[:100] + "..." if len(content) > 100 else content
+                logger.debug(f"Tool {tool_name} result: {content_preview}")
+
+            # Format for user message with tool_result as required by the Claude API
+            return {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": content}]}
+        except asyncio.TimeoutError:
+            # A tool running in a worker thread cannot be interrupted; it finishes in the background
+            error_msg = f"Error executing tool {tool_name}: timed out after {self.default_tool_timeout}s"
+            logger.error(error_msg)
+            return {
+                "role": "user",
+                "content": [{"type": "tool_result", "tool_use_id": tool_id, "is_error": True, "content": error_msg}],
+            }
+        except Exception as e:
+            error_msg = f"Error executing tool {tool_name}: {str(e)}"
+            logger.error(f"Error executing tool {tool_name}: {str(e)}")
+            return {
+                "role": "user",
+                "content": [{"type": "tool_result", "tool_use_id": tool_id, "is_error": True, "content": error_msg}],
+            }
 
     async def chat(self, message: str, user_info: Optional[Dict[str, Any]] = None) -> Union[str, AgentResponse]:
         """
@@ -289,14 +817,10 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
         logger.debug(f"Message length: {len(formatted_message)} chars")
 
         # Add the user message to the conversation history
-        self.conversation_history.append({"role": "user", "content": formatted_message})
+        self._append_message({"role": "user", "content": formatted_message})
 
-        # Prepare the messages for the API call - exclude system message from the conversation history
-        # because Anthropic API requires system prompt as a separate parameter
-        messages = []
-        for msg in self.conversation_history:
-            if msg["role"] != "system" and msg.get("content"):  # Ensure content is not empty
-                messages.append(msg)
+        # Messages for the API call, already filtered as they were appended
+        messages = self._api_messages
 
         # Always enable tools regardless of message content
         use_tools = True
@@ -314,30 +838,19 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
 
         try:
             # Make the API call
+            # Messages are stored in the shape the API expects, including structured content
             api_params = {
-                "model": self.model if self.model else "claude-3-5-sonnet-latest",
-                "max_tokens": 4096,
-                "temperature": self.temperature,
-                "system": self.system_prompt,  # System prompt as a separate parameter
+                **self._base_params,
+                "system": self._system(),  # System prompt as a separate parameter
+                "messages": messages,
             }
 
-            # Add properly typed messages
-            typed_messages = []
-            for msg in messages:
-                if isinstance(msg["content"], str):
-                    typed_messages.append({"role": msg["role"], "content": msg["content"]})
-                else:
-                    # Handle content that's not a string (e.g., structured content)
-                    typed_messages.append(msg)
-
-            api_params["messages"] = typed_messages
-
             # Only include tools parameter if we have tools registered and are using tools
             if tools and use_tools:
                 api_params["tools"] = tools
 
             # Log API call
-            logger.debug(f"Calling Claude API with {len(typed_messages)} messages")
+            logger.debug(f"Calling Claude API with {len(messages)} messages")
             logger.debug(f"Using model: {api_params['model']}")
             if tools:
                 logger.debug(f"Using {len(tools)} tools")
@@ -347,95 +860,30 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
             response = await self.client.messages.create(**api_params)  # type: ignore
             logger.info("Received response from Claude API")
 
+            texts, tool_calls, assistant_content = self._classify_response(response.content)
+
             # Process any tool calls
-            if response.content and any(block.type == "tool_use" for block in response.content):
+            if tool_calls:
                 logger.info("Response contains tool calls")
+                tool_results = await self._run_tool_calls(tool_calls, assistant_content, processed_tool_calls)
 
-                # Add assistant message with tool calls to conversation history
-                assistant_content = []
-                for block in response.content:
-                    if hasattr(block, "text") and block.text is not None:
-                        assistant_content.append({"type": "text", "text": block.text})  # type: ignore
-                    elif block.type == "tool_use":
-                        assistant_content.append({  # type: ignore
-                            "type": "tool_use",
-                            "id": block.id,
-                            "name": block.name,
-                            "input": block.input
-                        })
-
-                self.conversation_history.append({"role": "assistant", "content": assistant_content})
-
-                # Extract tool calls
-                tool_calls = []
-                for block in response.content:
-                    if block.type == "tool_use":
-                        tool_calls.append(
-                            {"name": block.name, "id": block.id, "input": block.input}
-                        )
-
-                logger.info(f"Extracted {len(tool_calls)} tool calls from response")
-
-                # Execute tool calls
-                tool_results = self._execute_tool_calls(tool_calls)
-
-                # Process and track tool calls for the structured response
-                for idx, tool_call in enumerate(tool_calls):
-                    tool_name = tool_call["name"]
-                    parameters = tool_call["input"]
-
-                    # Find the corresponding result
-                    result = None
-                    for res in tool_results:
-                        for content_block in res.get("content", []):
-                            if content_block.get("tool_use_id") == tool_call["id"]:
-                                result = content_block.get("content", "")
-                                break
-                        if result:
-                            break
-
-                    # Add to processed tool calls
-                    processed_tool_calls.append({
-                        "name": tool_name,
-                        "parameters": parameters,
-                        "result": result
-                    })
-
-                # Add tool results to conversation history
                 if tool_results:
-                    for result in tool_results:
-                        self.conversation_history.append(result)
-
                     logger.debug("Making follow-up API call with tool results")
 
                     # Make a follow-up API call with the tool results
-                    follow_up_messages = []
-                    for msg in self.conversation_history:
-                        if msg["role"] != "system" and msg.get(
-                            "content"
-                        ):  # Ensure content is not empty
-                            follow_up_messages.append(msg)
-
-                    # Make a follow-up API call with the tool results
-                    logger.debug(f"Making follow-up call with {len(follow_up_messages)} messages")
+                    logger.debug(f"Making follow-up call with {len(self._api_messages)} messages")
                     follow_up_response = await self.client.messages.create(  # type: ignore
-                        model=self.model if self.model else "claude-3-5-sonnet-latest",
-                        system=self.system_prompt,  # System prompt as a separate parameter
-                        messages=follow_up_messages,
-                        max_tokens=4096,
-                        temperature=self.temperature,
+                        **self._follow_up_params()
                     )
                     logger.info("Received follow-up response from Claude API")
 
-                    # Add the assistant's follow-up response to the conversation history
-                    self.conversation_history.append(
-                        {"role": "assistant", "content": follow_up_response.content}
-                    )
-
                     # Extract text from the response
-                    response_text = "".join(
-                        block.text for block in follow_up_response.content if block.type == "text"
-                    )
+                    texts = [block.text for block in follow_up_response.content if block.type == _TEXT]
+                    response_text = texts[0] if len(texts) == 1 else "".join(texts)
+
+                    # Add the assistant's follow-up response to the conversation history. The
+                    # follow-up cannot call tools, so its text is stored instead of the SDK blocks.
+                    self._append_message({"role": "assistant", "content": response_text})
                     logger.debug(f"Follow-up response text length: {len(response_text)} chars")
 
                     # Return structured response
@@ -455,14 +903,13 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                         "thinking": thinking
                     }
             else:
-                # Extract text from the response
-                response_text = "".join(
-                    block.text for block in response.content if block.type == "text"
-                )
+                # Text blocks were collected while classifying the response
+                response_text = texts[0] if len(texts) == 1 else "".join(texts)
                 logger.debug(f"Response text length: {len(response_text)} chars")
 
-                # Add the assistant's response to the conversation history
-                self.conversation_history.append({"role": "assistant", "content": response.content})
+                # Add the assistant's response to the conversation history as plain text, which
+                # takes far less memory than the SDK block objects
+                self._append_message({"role": "assistant", "content": response_text})
 
                 # Return structured response
                 return {
@@ -471,58 +918,276 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     "thinking": thinking
                 }
 
-        except AuthenticationError as e:
-            error_msg = f"Error: Authentication failed. Please check your Anthropic API key. Details: {str(e)}"
-            logger.error(f"Authentication error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except BadRequestError as e:
+        except Exception as e:
+            return self._error_response(self._api_error_message(e))
+
+    async def chat_stream(
+        self, message: str, user_info: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Send a message to Claude and yield the response text as it is generated.
+
+        Tool calls are handled as in chat(): once the first response is complete its tool calls
+        are executed and the follow-up response is streamed as well. The structured response,
+        including the tool calls, is available from last_response when the stream ends.
+
+        Args:
+            message: The user's message
+            user_info: Optional dict containing info about the user's current state
+
+        Yields:
+            Chunks of response text
+        """
+        formatted_message = self.format_user_message(message, user_info)
+        logger.info("Streaming message to Claude API")
+        self._append_message({"role": "user", "content": formatted_message})
+
+        processed_tool_calls: List[AgentToolCall] = []
+        texts: List[str] = []
+        try:
+            api_params = {**self._base_params, "system": self._system(), "messages": self._api_messages}
+            tools = self._prepare_tools()
+            if tools:
+                api_params["tools"] = tools
+
+            async with self.client.messages.stream(**api_params) as stream:
+                async for text in stream.text_stream:
+                    texts.append(text)
+                    yield text
+                response = await stream.get_final_message()
+
+            _, tool_calls, assistant_content = self._classify_response(response.content)
+            if not tool_calls:
+                self._append_message({"role": "assistant", "content": "".join(texts)})
+            else:
+                logger.info("Response contains tool calls")
+                await self._run_tool_calls(tool_calls, assistant_content, processed_tool_calls)
+
+                texts = []
+                async with self.client.messages.stream(**self._follow_up_params()) as stream:
+                    async for text in stream.text_stream:
+                        texts.append(text)
+                        yield text
+                self._append_message({"role": "assistant", "content": "".join(texts)})
+
+            self.last_response = {"message": "".join(texts), "tool_calls": processed_tool_calls, "thinking": None}
+        except Exception as e:
+            self.last_response = self._error_response(self._api_error_message(e))
+            self.last_response["tool_calls"] = processed_tool_calls
+            yield self.last_response["message"]
+
+    def _follow_up_params(self) -> Dict[str, Any]:
+        """
+        Build the parameters of the follow-up request that carries the tool results.
+
+        The API has no way to continue a response with tool results, so they always go in a second
+        request. That request sends the same tools as the first one with tool_choice "none": the
+        tools and system prompt then form the same prefix as the first request and are read from
+        the prompt cache, while the model still answers with text only.
+
+        Returns:
+            Keyword arguments for messages.create or messages.stream
+        """
+        params = {**self._base_params, "system": self._system(), "messages": self._api_messages}
+        tools = self._prepare_tools()
+        if tools:
+            params["tools"] = tools
+            params["tool_choice"] = _NO_TOOL_CHOICE
+        return params
+
+    def _prompt_prefix_tokens(self) -> int:
+        """
+        Estimate the tokens taken by the system prompt and tools sent with every request.
+
+        The estimate comes from the serialized size of the system blocks and the tool list. It is
+        computed once and reused on every turn until a tool is registered or system_prompt changes.
+
+        Returns:
+            Approximate token count of the request prefix
+        """
+        system = self._system()
+        tools = self._prepare_tools()
+        cached = self._prefix_tokens
+        if cached is None or cached[0] is not system or cached[1] is not tools:
+            size = len(dumps_json(system)) + (len(dumps_json(tools)) if tools else 0)
+            cached = self._prefix_tokens = (system, tools, size // CHARS_PER_TOKEN)
+        return cached[2]
+
+    def _classify_response(
+        self, content: List[Any]
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Collect text, tool calls and the assistant message content from a response in a single pass.
+
+        Args:
+            content: The content blocks of a Claude response
+
+        Returns:
+            Tuple of (text parts, tool calls, assistant message content)
+        """
+        texts: List[str] = []
+        tool_calls: List[Dict[str, Any]] = []
+        assistant_content: List[Dict[str, Any]] = []
+        # Bound methods hoisted out of the loop to skip the attribute lookups per block
+        add_text = texts.append
+        add_tool_call = tool_calls.append
+        add_content = assistant_content.append
+        for block in content:
+            block_type = block.type
+            if block_type == _TEXT:
+                text = block.text
+                add_text(text)
+                add_content({"type": "text", "text": text})
+            elif block_type == _TOOL_USE:
+                tool_call = {"name": block.name, "id": block.id, "input": block.input}
+                add_tool_call(tool_call)
+                add_content({"type": "tool_use", **tool_call})
+        return texts, tool_calls, assistant_content
+
+    async def _run_tool_calls(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        assistant_content: List[Dict[str, Any]],
+        processed_tool_calls: List[AgentToolCall],
+    ) -> List[Dict[str, Any]]:
+        """
+        Record the assistant's tool calls, execute them and record their results.
+
+        Args:
+            tool_calls: The tool calls from the response
+            assistant_content: The assistant message content containing the tool calls
+            processed_tool_calls: List extended with the tool calls for the structured response
+
+        Returns:
+            The tool result messages
+        """
+        # Add assistant message with tool calls to conversation history
+        self._append_message({"role": "assistant", "content": assistant_content})
+
+        logger.info(f"Extracted {len(tool_calls)} tool calls from response")
+
+        # Execute tool calls
+        tool_results = await self._execute_tool_calls(tool_calls)
+
+        # Index the results by tool_use_id so each call finds its result in one lookup
+        result_by_id = {
+            content_block["tool_use_id"]: content_block.get("content", "")
+            for res in tool_results
+            for content_block in res.get("content", [])
+            if "tool_use_id" in content_block
+        }
+
+        # Process and track tool calls for the structured response
+        for tool_call in tool_calls:
+            processed_tool_calls.append({
+                "name": tool_call["name"],
+                "parameters": tool_call["input"],
+                "result": result_by_id.get(tool_call["id"])
+            })
+
+        # Add tool results to conversation history
+        for result in tool_results:
+            self._append_message(result)
+        return tool_results
+
+    def _api_error_message(self, error: Exception) -> str:
+        """
+        Log an error from a chat request and build the message returned to the caller.
+
+        Args:
+            error: The exception raised while talking to the API
+
+        Returns:
+            The error message
+        """
+        anthropic = _sdk()
+        if isinstance(error, anthropic.AuthenticationError):
+            logger.error(f"Authentication error: {str(error)}")
+            return f"Error: Authentication failed. Please check your Anthropic API key. Details: {str(error)}"
+        if isinstance(error, anthropic.BadRequestError):
             # Provide more detailed information about the bad request
             request_info = ""
-            if hasattr(e, "request"):
-                request_info = f"\nRequest information: {e.request}"
-            error_msg = f"Error: Bad request to the Anthropic API. Details: {str(e)}{request_info}"
-            logger.error(f"Bad request error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except RateLimitError as e:
-            error_msg = f"Error: Rate limit exceeded. Please try again later. Details: {str(e)}"
-            logger.error(f"Rate limit error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except APIError as e:
-            error_msg = f"Error: Anthropic API error. Details: {str(e)}"
-            logger.error(f"API error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except Exception as e:
-            error_msg = f"Error: An unexpected error occurred. Details: {type(e).__name__}: {str(e)}"
-            logger.error(f"Unexpected error: {type(e).__name__}: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
+            if hasattr(error, "request"):
+                request_info = f"\nRequest information: {error.request}"
+            logger.error(f"Bad request error: {str(error)}")
+            return f"Error: Bad request to the Anthropic API. Details: {str(error)}{request_info}"
+        if isinstance(error, anthropic.RateLimitError):
+            logger.error(f"Rate limit error: {str(error)}")
+            return f"Error: Rate limit exceeded. Please try again later. Details: {str(error)}"
+        if isinstance(error, anthropic.APIError):
+            logger.error(f"API error: {str(error)}")
+            return f"Error: Anthropic API error. Details: {str(error)}"
+        logger.error(f"Unexpected error: {type(error).__name__}: {str(error)}")
+        return f"Error: An unexpected error occurred. Details: {type(error).__name__}: {str(error)}"
+
+    async def abatch(self, messages: List[str], poll_interval: float = 10.0) -> List[str]:
+        """
+        Answer independent messages through the Anthropic Message Batches API.
+
+        Batched requests cost less than regular ones but are processed asynchronously, so this suits
+        offline work such as evaluations. Each message is answered on its own, without tools and
+        without the conversation history.
+
+        Args:
+            messages: The user messages to answer
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            The response text for each message, in order. Failed requests yield an error message.
+        """
+        requests = [
+            {
+                "custom_id": f"message-{index}",
+                "params": {
+                    **self._base_params,
+                    "system": self._system(),
+                    "messages": [{"role": "user", "content": self.format_user_message(message)}],
+                },
             }
+            for index, message in enumerate(messages)
+        ]
+
+        batch = await self.client.messages.batches.create(requests=requests)
+        logger.info(f"Created message batch {batch.id} with {len(requests)} requests")
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+        logger.info(f"Message batch {batch.id} ended")
+
+        texts: Dict[str, str] = {}
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                texts[entry.custom_id] = "".join(
+                    block.text for block in entry.result.message.content if block.type == _TEXT
+                )
+            else:
+                texts[entry.custom_id] = f"Error: Batch request {entry.result.type}"
+        return [texts.get(f"message-{index}", "Error: No result returned") for index in range(len(messages))]
 
     def register_default_tools(self) -> None:
         """
         Register all the default tools available to the agent.
         """
-        # Use the centralized tool registration function
+        # Use the centralized tool registration function, imported here so that importing this
+        # module does not load every tool module
+        from .tools.register_tools import DEFAULT_TOOL_SPECS, register_default_tools
+
+        if not _SHARED_TOOL_FORMS:
+            for name, description, parameters in DEFAULT_TOOL_SPECS + _CONTEXT_TOOL_SPECS:
+                _SHARED_TOOL_FORMS[name] = _tool_form(name, description, parameters)
+
         logger.info("Registering default tools")
         register_default_tools(self)
+
+        context_tools = {
+            "recall": self._recall,
+            "summary_context": self._summary_context,
+            "filter_context": self._filter_context,
+            "retrieve_memory": self._retrieve_memory,
+        }
+        # Short-term memory tools that let the model manage its own context
+        for name, description, parameters in _CONTEXT_TOOL_SPECS:
+            self.register_tool(name, context_tools[name], description, parameters)
         logger.info(f"Registered {len(self.available_tools)} default tools")
 
     async def get_structured_output(self, prompt: str, schema: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
@@ -564,12 +1229,12 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
             # Process the response content
             if response.content:
                 for content in response.content:
-                    if content.type == "tool_use":
+                    if content.type == _TOOL_USE:
                         # Extract the structured data from the tool call
                         tool_data = content.tool_use.input
                         logger.debug(f"Received structured data: {json.dumps(tool_data)[:100]}...")
                         return tool_data
-                    elif content.type == "text":
+                    elif content.type == _TEXT:
                         # If we got text content instead of a tool call, try to parse JSON from it
                         try:
                             # Look for JSON-like content in the text
@@ -707,7 +1372,7 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
             if response.content and len(response.content) > 0:
                 result = ""
                 for content_block in response.content:
-                    if content_block.type == "text":
+                    if content_block.type == _TEXT:
                         result += content_block.text
 
                 logger.info("Successfully processed image query")
@@ -717,19 +1382,15 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                 logger.error(error_msg)
                 return error_msg
 
-        except BadRequestError as e:
-            error_msg = f"Bad request to Claude API: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
-        except RateLimitError as e:
-            error_msg = f"Rate limit exceeded: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
-        except APIError as e:
-            error_msg = f"Claude API error: {str(e)}"
-            logger.error(error_msg)
-            return error_msg
         except Exception as e:
-            error_msg = f"Unexpected error processing image query: {str(e)}"
+            anthropic = _sdk()
+            if isinstance(e, anthropic.BadRequestError):
+                error_msg = f"Bad request to Claude API: {str(e)}"
+            elif isinstance(e, anthropic.RateLimitError):
+                error_msg = f"Rate limit exceeded: {str(e)}"
+            elif isinstance(e, anthropic.APIError):
+                error_msg = f"Claude API error: {str(e)}"
+            else:
+                error_msg = f"Unexpected error processing image query: {str(e)}"
             logger.error(error_msg)
             return error_msg
@@ -5,23 +5,24 @@ This module provides a unified API for creating various agents (OpenAI, Claude,
 with consistent configuration.
 """
 
+import functools
+import importlib
 import os
-from typing import Optional, Callable, Any
+import sys
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Optional
 
 from cursor_agent_tools.base import BaseAgent
-from cursor_agent_tools.claude_agent import ClaudeAgent
 from cursor_agent_tools.logger import get_logger
-from cursor_agent_tools.openai_agent import OpenAIAgent
-from cursor_agent_tools.ollama_agent import OllamaAgent
 from cursor_agent_tools.permissions import PermissionOptions, PermissionRequest, PermissionStatus
 
 # Initialize logger
 logger = get_logger(__name__)
 
-# Dictionary mapping providers to their supported models
+# Mapping of providers to their supported models
 # This makes it easy to determine which provider to use based on a model name
-MODEL_MAPPING = {
-    "claude": [
+_RAW_MODEL_MAPPING = {
+    "claude": frozenset({
         "claude-3-5-sonnet-latest",
         "claude-3-7-sonnet-latest",
         "claude-3-5-sonnet",
@@ -29,8 +30,8 @@ MODEL_MAPPING = {
         "claude-3-sonnet",
         "claude-3-haiku",
         "claude-3.5-haiku"
-    ],
-    "openai": [
+    }),
+    "openai": frozenset({
         "gpt-4o",
         "gpt-4o-2024-05-13",
         "gpt-4o-2024-08-06",
@@ -39,8 +40,8 @@ MODEL_MAPPING = {
         "gpt-4-turbo",
         "gpt-3.5-turbo",
         "gpt-3.5"
-    ],
-    "ollama": [
+    }),
+    "ollama": frozenset({
         "llama3",
         "llama3.1",
         "llama3.2",
@@ -51,17 +52,139 @@ MODEL_MAPPING = {
         "phi4",
         "qwen2.5",
         "qwen2.5-coder"
-    ]
+    })
 }
 
 # For model normalization (e.g., handling model aliases)
-MODEL_NORMALIZATION = {
+_RAW_MODEL_NORMALIZATION = {
     "gpt-4o-2024-05-13": "gpt-4o",
     "gpt-4o-2024-08-06": "gpt-4o",
     "gpt-4-turbo": "gpt-4",
     "claude-3.5-sonnet": "claude-3-5-sonnet-latest"
 }
 
+# Read-only views of the tables above. Model names are interned, like the lowercased name in
+# create_agent, so dict lookups usually succeed on the identity check without comparing strings.
+MODEL_MAPPING = MappingProxyType({
+    sys.intern(provider): frozenset(map(sys.intern, names)) for provider, names in _RAW_MODEL_MAPPING.items()
+})
+MODEL_NORMALIZATION = MappingProxyType({
+    sys.intern(alias): sys.intern(name) for alias, name in _RAW_MODEL_NORMALIZATION.items()
+})
+
+# Model name prefixes that identify a provider
+PROVIDER_PREFIXES = MappingProxyType({
+    "ollama-": "ollama",
+    "gpt-": "openai",
+    "ft:gpt-": "openai",
+    "openai": "openai",
+    "claude": "claude",
+    "anthropic": "claude",
+})
+
+# Provider prefixes grouped by provider, so one str.startswith call checks all of a provider's
+# prefixes in C
+_PROVIDER_PREFIX_GROUPS = tuple(
+    (provider, tuple(prefix for prefix, owner in PROVIDER_PREFIXES.items() if owner == provider))
+    for provider in dict.fromkeys(PROVIDER_PREFIXES.values())
+)
+
+# API keys read from the environment, by variable name. Keys are cached once found; missing keys
+# are looked up again on each call, so keys loaded later (e.g. from a .env file) are still seen.
+_env_api_keys: Dict[str, str] = {}
+
+# Flat model name -> provider index of MODEL_MAPPING for exact matches
+_MODEL_TO_PROVIDER = {name: provider for provider, names in MODEL_MAPPING.items() for name in names}
+
+# Agent module, agent class name, API key environment variable and display name of the providers
+# that need a key. Agent modules are imported when first used, so only the chosen SDK is loaded.
+_HOSTED_PROVIDERS = {
+    "openai": ("cursor_agent_tools.openai_agent", "OpenAIAgent", "OPENAI_API_KEY", "OpenAI"),
+    "claude": ("cursor_agent_tools.claude_agent", "ClaudeAgent", "ANTHROPIC_API_KEY", "Anthropic"),
+}
+
+# Trie key under which a node stores the provider of the prefix ending at that node
+_PROVIDER = -1
+
+
+def _build_provider_trie() -> Dict[int, Any]:
+    """
+    Build a prefix trie over the known model names and provider prefixes.
+
+    Nodes are dicts keyed by character code; a node that ends a known name or prefix also maps
+    _PROVIDER to its provider.
+
+    Returns:
+        The root node of the trie
+    """
+    trie: Dict[int, Any] = {}
+    for prefix, provider in [*_MODEL_TO_PROVIDER.items(), *PROVIDER_PREFIXES.items()]:
+        node = trie
+        for char in prefix:
+            node = node.setdefault(ord(char), {})
+        node[_PROVIDER] = provider
+    return trie
+
+
+PROVIDER_PREFIX_TRIE = _build_provider_trie()
+
+
+def _env_api_key(env_var: str) -> Optional[str]:
+    """
+    Get an API key from the environment, using the cached value when there is one.
+
+    Args:
+        env_var: Name of the environment variable holding the key
+
+    Returns:
+        The API key, or None if it is not set
+    """
+    api_key = _env_api_keys.get(env_var)
+    if api_key is None:
+        api_key = os.environ.get(env_var)
+        if api_key:
+            _env_api_keys[env_var] = api_key
+    return api_key
+
+
+def refresh_env_keys() -> None:
+    """Forget the cached API keys so they are read from the environment again."""
+    _env_api_keys.clear()
+
+
+@functools.lru_cache(maxsize=32)
+def _detect_provider(model: str) -> Optional[str]:
+    """
+    Find the provider of a model by the longest known name or prefix the model name starts with.
+
+    Results are memoized, since the same few model names are dispatched over and over.
+
+    Args:
+        model: The lowercase model name
+
+    Returns:
+        The provider name, or None if the model is not recognized
+    """
+    # Known model names resolve with a single lookup
+    provider = _MODEL_TO_PROVIDER.get(model)
+    if provider is not None:
+        return provider
+
+    # Provider prefixes such as "gpt-" or "claude" need no character-by-character walk
+    for provider, prefixes in _PROVIDER_PREFIX_GROUPS:
+        if model.startswith(prefixes):
+            return provider
+
+    provider = None
+    node = PROVIDER_PREFIX_TRIE
+    for char in model:
+        child = node.get(ord(char))
+        if child is None:
+            break
+        node = child
+        provider = node.get(_PROVIDER, provider)
+    return provider
+
 
 def create_agent(
     model: str,
@@ -89,25 +212,32 @@ def create_agent(
     Returns:
         An agent instance configured with the specified parameters
     """
-    model = model.lower()  # Normalize model name to lowercase
-    logger.info(f"Creating agent with model: {model}")
-    logger.debug(f"Agent parameters: temperature={temperature}, timeout={timeout}, default_tool_timeout={default_tool_timeout}")
+    model = sys.intern(model.lower())  # Normalize model name to lowercase
+    logger.info("Creating agent with model: %s", model)
+    logger.debug(
+        "Agent parameters: temperature=%s, timeout=%s, default_tool_timeout=%s",
+        temperature, timeout, default_tool_timeout,
+    )
 
     # Set up permission options if not provided
     if permissions is None:
         permissions = PermissionOptions()
         logger.debug("Using default permission options")
     else:
-        logger.debug(f"Using custom permission options, yolo_mode={permissions.yolo_mode}")
+        logger.debug("Using custom permission options, yolo_mode=%s", permissions.yolo_mode)
 
-    # Handle Ollama models (prefix detection)
-    if model.startswith("ollama-"):
+    provider = _detect_provider(model)
+
+    # Handle Ollama models
+    if provider == "ollama":
         logger.debug("Detected Ollama model")
         # Ollama doesn't require an API key but uses a local server
         host = kwargs.get("host") or os.getenv("OLLAMA_HOST") or "http://localhost:11434"
-        logger.debug(f"Using Ollama host: {host}")
+        logger.debug("Using Ollama host: %s", host)
+
+        from cursor_agent_tools.ollama_agent import OllamaAgent
 
-        logger.info(f"Creating OllamaAgent with model {model}")
+        logger.info("Creating OllamaAgent with model %s", model)
         return OllamaAgent(
             model=model,
             temperature=temperature,
@@ -119,55 +249,30 @@ def create_agent(
             **kwargs
         )
 
-    # Handle OpenAI models
-    elif any(name in model for name in ["gpt-", "openai"]):
-        logger.debug("Detected OpenAI model")
-        # Use environment variable if no API key is provided
-        if api_key is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                logger.error("OpenAI API key not provided and not found in environment")
-                raise ValueError("OpenAI API key not provided and not found in environment")
-            else:
-                logger.debug("Using OpenAI API key from environment")
-
-        logger.info(f"Creating OpenAIAgent with model {model}")
-        return OpenAIAgent(
-            model=model,
-            api_key=api_key,
-            temperature=temperature,
-            timeout=timeout,
-            permission_callback=permission_callback,
-            permission_options=permissions,
-            default_tool_timeout=default_tool_timeout,
-            **kwargs
-        )
+    # Handle the hosted providers, which need an API key
+    if provider not in _HOSTED_PROVIDERS:
+        logger.error("Unsupported model: %s", model)
+        raise ValueError(f"Unsupported model: {model}")
 
-    # Handle Anthropic/Claude models
-    elif any(name in model for name in ["claude", "anthropic"]):
-        logger.debug("Detected Anthropic/Claude model")
-        # Use environment variable if no API key is provided
-        if api_key is None:
-            api_key = os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
-                logger.error("Anthropic API key not provided and not found in environment")
-                raise ValueError("Anthropic API key not provided and not found in environment")
-            else:
-                logger.debug("Using Anthropic API key from environment")
-
-        logger.info(f"Creating ClaudeAgent with model {model}")
-        return ClaudeAgent(
-            model=model,
-            api_key=api_key,
-            temperature=temperature,
-            timeout=timeout,
-            permission_callback=permission_callback,
-            permission_options=permissions,
-            default_tool_timeout=default_tool_timeout,
-            **kwargs
-        )
+    module_name, class_name, env_var, label = _HOSTED_PROVIDERS[provider]
+    logger.debug("Detected %s model", label)
+    # Use environment variable if no API key is provided
+    if api_key is None:
+        api_key = _env_api_key(env_var)
+        if not api_key:
+            logger.error("%s API key not provided and not found in environment", label)
+            raise ValueError(f"{label} API key not provided and not found in environment")
+        logger.debug("Using %s API key from environment", label)
 
-    # Raise error for unsupported models
-    else:
-        logger.error(f"Unsupported model: {model}")
-        raise ValueError(f"Unsupported model: {model}")
+    agent_class: Callable[..., BaseAgent] = getattr(importlib.import_module(module_name), class_name)
+    logger.info("Creating %s with model %s", class_name, model)
+    return agent_class(
+        model=model,
+        api_key=api_key,
+        temperature=temperature,
+        timeout=timeout,
+        permission_callback=permission_callback,
+        permission_options=permissions,
+        default_tool_timeout=default_tool_timeout,
+        **kwargs
+    )
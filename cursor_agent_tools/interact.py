@@ -7,15 +7,19 @@ allowing multi-step problem solving and task completion.
 """
 
 import os
+import re
+import stat
 import sys
 import time
 import asyncio
+import heapq
+from collections import deque
 from enum import Enum
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union, Callable
-
-from dotenv import load_dotenv
+from typing import Any, AsyncIterator, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union, Callable
 
+from .base import AgentResponse, BaseAgent
 from .factory import create_agent
 from .permissions import PermissionOptions
 from .logger import get_logger
@@ -23,20 +27,31 @@ from .logger import get_logger
 # Initialize logger
 logger = get_logger(__name__)
 
-# Load environment variables from .env file
-# Try to find the .env file in the parent directory
-env_path = Path(__file__).resolve().parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(dotenv_path=env_path)
-    logger.debug(f"Loaded environment variables from {env_path}")
-else:
-    # Try in the current directory
-    env_path = Path(__file__).resolve().parent / ".env"
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path)
-        logger.debug(f"Loaded environment variables from {env_path}")
-    else:
-        logger.debug("No .env file found")
+# Whether _ensure_env_loaded has looked for a .env file yet
+_env_loaded = False
+
+
+def _ensure_env_loaded() -> None:
+    """
+    Load environment variables from a .env file the first time an agent session starts.
+
+    The parent directory of the package is tried first, then the package directory. Loading is
+    deferred so that importing this module does not touch the filesystem.
+    """
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    from dotenv import load_dotenv
+
+    package_dir = Path(__file__).resolve().parent
+    for env_path in (package_dir.parent / ".env", package_dir / ".env"):
+        if env_path.is_file():
+            load_dotenv(dotenv_path=env_path)
+            logger.debug(f"Loaded environment variables from {env_path}")
+            return
+    logger.debug("No .env file found")
 
 
 # Add a NextAction class to better represent different continuation options
@@ -122,7 +137,77 @@ class Colors:
     UNDERLINE = "\033[4m"  # Underline
 
 
-async def print_status_before_agent(message: str, details: Optional[str] = None) -> None:
+# Color of each type of information printed by print_agent_information
+_FORMAT_TABLE = {
+    "thinking": Colors.GRAY,
+    "response": Colors.GREEN,
+    "error": Colors.RED,
+    "status": Colors.CYAN,
+    "tool_call": Colors.YELLOW,
+    "tool_result": Colors.YELLOW,
+    "plan": Colors.GREEN,
+    "file_operation": Colors.BLUE,
+    "command": Colors.GREEN,
+}
+
+# Direct questions and common phrases that request input from the user
+_INPUT_REQUEST_RE = re.compile(
+    r"\?|could you provide|can you provide|please let me know|what would you like|how would you like"
+    r"|do you have a preference",
+    re.IGNORECASE,
+)
+# Statement that the task is still in progress
+_IN_PROGRESS_RE = re.compile("in progress", re.IGNORECASE)
+
+# Number of recent tool calls and terminal commands kept in user_info
+MAX_TOOL_CALL_HISTORY = 10
+MAX_COMMAND_HISTORY = 5
+
+# Tools that create or modify files
+_FILE_WRITE_TOOLS = frozenset({"create_file", "edit_file"})
+# Terminal tool name used by the agents, and the name recognized in text responses
+_TERMINAL_TOOLS = frozenset({"run_terminal_command", "run_terminal_cmd"})
+
+# Extensions of the workspace files listed in user_info["recent_files"]
+_WATCH_EXTS = frozenset({"py", "txt", "md", "json", "yaml", "yml", "js", "ts", "html", "css"})
+
+# Largest open file included whole in user_info["file_contents"]; larger files contribute their
+# first and last half of this many bytes
+_MAX_CONTEXT_BYTES = 256 * 1024
+
+# Dependency, build and cache directories never descended into by the workspace scan; hidden
+# directories (.git, .venv, .idea, ...) are skipped as well
+_SKIP_DIRS = frozenset({"node_modules", "venv", "__pycache__", "dist", "build"})
+
+# Statements that indicate the task is complete, matched in a single scan of the response
+_COMPLETION_INDICATORS = (
+    "task complete",
+    "task is complete",
+    "completed all the required tasks",
+    "successfully implemented all",
+    "all requirements have been met",
+    "implementation is now complete",
+    "successfully created all the necessary",
+    "the project is now ready",
+    "everything is now implemented",
+    "all features are now implemented",
+)
+_COMPLETION_RE = re.compile("|".join(map(re.escape, _COMPLETION_INDICATORS)))
+
+# Tools recognized in text responses and the argument read for each
+_TOOL_CALL_ARGS = {
+    "create_file": "file_path",
+    "edit_file": "target_file",
+    "run_terminal_cmd": "command",
+}
+# A line naming a tool; the following line, which holds the argument, is matched by lookahead so it
+# can name a tool itself
+_TOOL_CALL_RE = re.compile(
+    r"^.*?(?P<tool>create_file|edit_file|run_terminal_cmd).*(?=\n(?P<arg>.*))", re.MULTILINE
+)
+
+
+def print_status_before_agent(message: str, details: Optional[str] = None) -> None:
     """
     Simple utility function to print status messages before the agent is initialized.
 
@@ -130,154 +215,68 @@ async def print_status_before_agent(message: str, details: Optional[str] = None)
         message: The status message to prin
         details: Optional details to include
     """
-    print(f"\nℹ️ {message}")
-    if details:
-        print(f"  {details}")
+    sys.stdout.write(f"\nℹ️ {message}\n  {details}\n" if details else f"\nℹ️ {message}\n")
 
 
-async def print_agent_information(agent: Any, information_type: str, content: str, details: Optional[Union[Dict[str, Any], str]] = None) -> None:
+def format_agent_information(information_type: str, content: str, details: Optional[Union[Dict[str, Any], str]] = None) -> str:
     """
-    Print formatted information from the agent to the user using AI-generated formatting.
-    Uses the agent itself to generate styling and formatting.
+    Format information from the agent for display, colored by information type.
 
     Args:
-        agent: The agent instance to use for generating formatted outpu
         information_type: Type of information (thinking, tool_call, tool_result, plan, etc.)
         content: The main content to display
         details: Optional details/metadata to display (dict or string)
-    """
-    try:
-        # Convert details to a string representation if it's a dic
-        details_str = ""
-        if details:
-            if isinstance(details, dict):
-                details_str = "\n".join([f"{k}: {v}" for k, v in details.items()])
-            else:
-                details_str = str(details)
-
-        # Create a temporary user info to avoid polluting the main conversation
-        temp_user_info = {"temporary_context": True, "is_formatting_request": True}
-
-        # Prepare the formatting promp
-        format_prompt = f"""Format the following "{information_type}" information for console display:
 
-CONTENT: {content}
-
-{f"DETAILS: {details_str}" if details else ""}
-
-Use ANSI color codes to style the output with appropriate colors depending on the type.
-Thinking: Gray
-Response: Green
-Error: Red
-Status: Cyan/Blue
-Tools: Yellow
-Plan: Green with numbering
-File operation: Blue
-Command: Green
-
-Return ONLY the formatted text with ANSI codes that I can directly print to the console.
-Do not include explanation text or markdown code blocks."""
-
-        # Use the agent to generate the formatted outpu
-        agent_response = await agent.chat(format_prompt, temp_user_info)
-
-        # Handle structured response
-        if isinstance(agent_response, dict):
-            formatted_output = agent_response["message"]
+    Returns:
+        The formatted text, ending with a newline
+    """
+    color = _FORMAT_TABLE.get(information_type, "")
+    text = f"{color}{content}{Colors.ENDC}\n"
+    if details:
+        # Show one "key: value" line per entry of dict details
+        if isinstance(details, dict):
+            details_str = "\n".join([f"  {k}: {v}" for k, v in details.items()])
         else:
-            formatted_output = agent_response
+            details_str = f"  {details}"
+        text += f"{color}{details_str}{Colors.ENDC}\n"
+    return text
 
-        # Print the outpu
-        print(formatted_output)
 
-    except Exception:
-        # Fallback to basic formatting if the agent call fails
-        separator = "─" * 80
-        print(f"\n{separator}")
-        print(f"[{information_type.upper()}]: {content}")
-        if details:
-            print(f"Details: {details}")
-        print(f"{separator}")
+def print_agent_information(agent: Any, information_type: str, content: str, details: Optional[Union[Dict[str, Any], str]] = None) -> None:
+    """
+    Print formatted information from the agent to the user, colored by information type.
+
+    Args:
+        agent: The agent instance (kept for compatibility; not used for formatting)
+        information_type: Type of information (thinking, tool_call, tool_result, plan, etc.)
+        content: The main content to display
+        details: Optional details/metadata to display (dict or string)
+    """
+    # A single write takes the stdout lock and flushes a line-buffered terminal once
+    sys.stdout.write(format_agent_information(information_type, content, details))
 
 
 async def check_for_user_input_request(agent: Any, response: str) -> Union[str, bool]:
     """
-    Use the AI to determine if the agent's response is explicitly requesting user input.
+    Determine if the agent's response is explicitly requesting user input.
+
+    A response requests input if it asks a direct question or uses a common request phrase.
 
     Args:
-        agent: The agent instance to use for analyzing the response
-        response: The response from the agen
+        agent: The agent instance (kept for compatibility; not used for the check)
+        response: The response from the agent
 
     Returns:
         False if no input is needed, or a string containing the input prompt if needed
     """
     logger.debug("Checking if response requests user input")
-    try:
-        # Create a temporary user info to avoid polluting the main conversation
-        temp_user_info = {"temporary_context": True, "is_system_request": True}
-
-        # Ask the agent to analyze if input is needed
-        analysis_prompt = f"""Analyze the following AI assistant response and determine if it is explicitly requesting user input or clarification:
-
-RESPONSE: {response}
-
-Rules for determining if input is needed:
-1. Look for direct questions that require an answer
-2. Look for phrases like "could you provide", "can you provide", "please let me know", etc.
-3. Ignore rhetorical questions or statements where the AI says "I could" or "I will"
-4. Check for any explicit request for information, preference, decision, or guidance
-
-If user input IS needed:
-- Return a concise prompt to show the user that captures what information is being requested
-- Format it as: "INPUT_NEEDED: your prompt here"
-
-If user input is NOT needed:
-- Return only: "NO_INPUT_NEEDED"
-"""
-
-        # Get the analysis from the agen
-        logger.debug("Sending analysis prompt to agent")
-        agent_response = await agent.chat(analysis_prompt, temp_user_info)
-
-        # Handle structured response
-        if isinstance(agent_response, dict):
-            analysis = agent_response["message"]
-        else:
-            analysis = agent_response
-
-        # Process the resul
-        if "INPUT_NEEDED:" in analysis:
-            # Extract the prompt from the response
-            user_prompt = analysis.split("INPUT_NEEDED:", 1)[1].strip()
-            logger.info(f"Input needed detected: {user_prompt}")
-            return str(user_prompt)
+    match = _INPUT_REQUEST_RE.search(response)
+    if match:
+        logger.info(f"Input request detected: '{match.group(0)}'")
+        return "Please provide the requested information:"
 
-        logger.debug("No input needed detected")
-        return False
-
-    except Exception as e:
-        logger.warning(f"Error in check_for_user_input_request: {str(e)}")
-        logger.info("Falling back to simpler input detection")
-        # Fallback to simpler detection if the agent call fails
-        # Check for common phrases that indicate the agent is asking for inpu
-        input_request_phrases = [
-            "could you provide", "can you provide", "please let me know",
-            "what would you like", "how would you like", "do you have a preference"
-        ]
-
-        # Check for question marks (direct questions)
-        if "?" in response:
-            logger.info("Question mark detected in response - input needed")
-            return "Please provide the requested information:"
-
-        # Check for common phrases that request inpu
-        for phrase in input_request_phrases:
-            if phrase in response.lower():
-                logger.info(f"Input request phrase detected: '{phrase}'")
-                return "Please provide the requested information:"
-
-        logger.debug("No input needed detected in fallback check")
-        return False
+    logger.debug("No input needed detected")
+    return False
 
 
 async def run_single_query(agent: Any, query: str, user_info: Optional[Dict[str, Any]] = None, use_custom_system_prompt: bool = False) -> Union[str, Dict[str, Any]]:
@@ -285,31 +284,25 @@ async def run_single_query(agent: Any, query: str, user_info: Optional[Dict[str,
     Run a single query and return the response.
 
     Args:
-        agent: The initialized agen
+        agent: The initialized agent
         query: The query to send
         user_info: Optional user context information
-        use_custom_system_prompt: Whether to use the custom system promp
+        use_custom_system_prompt: Whether to switch the agent to the custom system prompt first.
+            The prompt is not restored afterwards, so it stays the same across queries and the
+            agent can reuse its prompt cache.
 
     Returns:
-        Either the agent's response string or the structured response objec
+        Either the agent's response string or the structured response object
     """
     logger.info("Running single query to agent")
     logger.debug(f"Query length: {len(query)} chars, using custom prompt: {use_custom_system_prompt}")
 
     try:
-        # If we're using the custom system prompt, inject it into the agent
-        if use_custom_system_prompt:
-            logger.debug("Temporarily setting custom system prompt")
-            original_system_prompt = agent.system_prompt
+        if use_custom_system_prompt and agent.system_prompt is not CURSOR_SYSTEM_PROMPT:
+            logger.debug("Setting custom system prompt")
             agent.system_prompt = CURSOR_SYSTEM_PROMPT
-            agent_response: Union[str, Dict[str, Any]] = await agent.chat(query, user_info)
-            # Restore original system prompt
-            logger.debug("Restoring original system prompt")
-            agent.system_prompt = original_system_prompt
-            return agent_response
-
-        logger.debug("Sending query to agent with default system prompt")
-        agent_response = await agent.chat(query, user_info)
+
+        agent_response: Union[str, Dict[str, Any]] = await agent.chat(query, user_info)
         return agent_response
     except Exception as e:
         # Log error but still return something valid for the return type
@@ -320,13 +313,42 @@ async def run_single_query(agent: Any, query: str, user_info: Optional[Dict[str,
         return f"Error processing query: {str(e)}"
 
 
+async def run_single_query_stream(agent: Any, query: str, user_info: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """
+    Run a single query and yield the response text as it is generated.
+
+    The query is sent with the agent's current system prompt. The structured response is
+    available from agent.last_response once the stream ends.
+
+    Args:
+        agent: The initialized agent
+        query: The query to send
+        user_info: Optional user context information
+
+    Yields:
+        Chunks of response text
+    """
+    logger.info("Streaming single query to agent")
+    logger.debug(f"Query length: {len(query)} chars")
+
+    agent.last_response = None
+    try:
+        async for chunk in agent.chat_stream(query, user_info):
+            yield chunk
+    except Exception as e:
+        # Record the error as the response so the caller still gets a valid result
+        logger.error(f"Error in run_single_query_stream: {str(e)}")
+        agent.last_response = BaseAgent._error_response(f"Error processing query: {str(e)}")
+        yield agent.last_response["message"]
+
+
 async def run_agent_interactive(
     model: str = "claude-3-5-sonnet-latest",
     initial_query: str = "",
     max_iterations: int = 10,
     auto_continue: bool = True,
     auto_continue_prompt: str = "auto continue",
-    loop_delay: int = 5,
+    loop_delay: int = 0,
     tool_call_limit: int = 25,
     agent: Optional[Any] = None,
     on_iteration: Optional[Callable[[Dict[str, Any]], None]] = None,
@@ -341,7 +363,7 @@ async def run_agent_interactive(
         max_iterations: Maximum number of iterations to perform
         auto_continue: If True, continue automatically; otherwise prompt user after each step
         auto_continue_prompt: Custom prompt for auto-continuation
-        loop_delay: Delay between iterations
+        loop_delay: Delay in seconds before automatically continuing (default: no delay)
         tool_call_limit: Maximum number of tool calls allowed throughout the entire session
         agent: Pre-configured agent instance (optional)
         on_iteration: Optional callback that receives data about each iteration
@@ -353,9 +375,11 @@ async def run_agent_interactive(
     logger.info("Starting interactive agent session")
     logger.debug(f"Parameters: model={model}, max_iterations={max_iterations}, auto_continue={auto_continue}, tool_call_limit={tool_call_limit}")
 
+    _ensure_env_loaded()
+
     # Use provided agent or create one with default permissions
     if agent is None:
-        await print_status_before_agent(f"Creating agent with model {model}...")
+        print_status_before_agent(f"Creating agent with model {model}...")
         logger.info(f"Creating new agent with model {model}")
         # Create agent with default permissions
         default_permissions = PermissionOptions(
@@ -367,12 +391,14 @@ async def run_agent_interactive(
         agent.system_prompt = CURSOR_SYSTEM_PROMPT
         agent.register_default_tools()
     else:
-        await print_status_before_agent("Using pre-configured agent")
+        print_status_before_agent("Using pre-configured agent")
         logger.info("Using pre-configured agent instance")
+        # Set the prompt once for the whole session rather than swapping it on every query
+        agent.system_prompt = CURSOR_SYSTEM_PROMPT
 
     # Now we can use the agent with our print function
-    await print_agent_information(agent, "status", "Initializing conversation with initial task")
-    await print_agent_information(agent, "status", "Task description", initial_query)
+    print_agent_information(agent, "status", "Initializing conversation with initial task")
+    print_agent_information(agent, "status", "Task description", initial_query)
     logger.info("Initializing conversation with task: " + (initial_query[:100] + "..." if len(initial_query) > 100 else initial_query))
 
     # Initialize detailed conversation context (similar to Cursor)
@@ -383,8 +409,8 @@ async def run_agent_interactive(
         "recent_files": [],  # Recently accessed files
         "os": sys.platform,  # OS information
         "workspace_path": workspace_path,  # Current workspace
-        "command_history": [],  # Recently executed commands
-        "tool_calls": [],  # History of tool calls
+        "command_history": deque(maxlen=MAX_COMMAND_HISTORY),  # Recently executed commands
+        "tool_calls": deque(maxlen=MAX_TOOL_CALL_HISTORY),  # History of tool calls
         "tool_results": [],  # Results of tool calls
         "file_contents": {},  # Cache of file contents
         "user_edits": [],  # Recent edits made by user
@@ -393,6 +419,8 @@ async def run_agent_interactive(
 
     # Track created/modified files to populate open_files
     created_or_modified_files: set[str] = set()
+    # (mtime, size) of each open file when it was last read, so unchanged files are not re-read
+    file_signatures: Dict[str, Tuple[int, int]] = {}
 
     # Multi-turn conversation loop
     iteration = 1
@@ -403,7 +431,7 @@ async def run_agent_interactive(
 
     # Prepend planning instructions only on first iteration
     if iteration == 1:
-        await print_agent_information(agent, "thinking", "Breaking down the task and creating a plan...")
+        print_agent_information(agent, "thinking", "Breaking down the task and creating a plan...")
         query = f"""I'll help you complete this task step by step. I'll break it down and use tools like reading/creating/editing files and running commands as needed.
 
 TASK: {initial_query}
@@ -412,14 +440,14 @@ First, I'll create a plan for how to approach this task, then implement it step
 """
 
     while iteration <= max_iterations:
-        await print_agent_information(agent, "status", f"Running iteration {iteration}/{max_iterations}")
-        await print_agent_information(
+        print_agent_information(agent, "status", f"Running iteration {iteration}/{max_iterations}")
+        print_agent_information(
             agent, "status", "Processing query", query[:100] + "..." if len(query) > 100 else query
         )
 
         try:
             # 1. Update workspace state
-            user_info = update_workspace_state(user_info, created_or_modified_files)
+            user_info = await update_workspace_state(user_info, created_or_modified_files, file_signatures)
 
             # Invoke callback with updated user_info if provided
             if on_user_info_update:
@@ -433,10 +461,15 @@ First, I'll create a plan for how to approach this task, then implement it step
                 except Exception as callback_error:
                     logger.warning(f"Error in on_user_info_update callback: {callback_error}")
 
-            # 3. Process tool calls - returns updated tool call count and tool calls
-            # Changed here - passing the full response object instead of extracted tool calls
-            agent_response = await run_single_query(agent, query, user_info, use_custom_system_prompt=True)
+            # 2. Stream the response, printing it as it is generated
+            chunks: List[str] = []
+            async for chunk in run_single_query_stream(agent, query, user_info):
+                chunks.append(chunk)
+                print(chunk, end="", flush=True)
+            print()
+            agent_response: Union[str, AgentResponse] = agent.last_response or "".join(chunks)
 
+            # 3. Process tool calls - returns updated tool call count and tool calls
             # Handle either string or structured response
             if isinstance(agent_response, dict):
                 response = agent_response.get("message", "")
@@ -457,13 +490,13 @@ First, I'll create a plan for how to approach this task, then implement it step
             if not continue_processing:
                 # End the session if user doesn't want to continue
                 logger.info(f"Ending session after reaching tool call limit ({total_tool_calls}/{tool_call_limit})")
-                await print_agent_information(agent, "status", f"Session ended after reaching tool call limit ({total_tool_calls}/{tool_call_limit})")
+                print_agent_information(agent, "status", f"Session ended after reaching tool call limit ({total_tool_calls}/{tool_call_limit})")
                 break
 
             # Check if we made tool calls in this iteration
             if len(tool_calls) > 0:
                 logger.info(f"Made {len(tool_calls)} tool calls, will add to max_iterations")
-                await print_agent_information(agent, "status", f"Made {len(tool_calls)} tool calls, will increase the max_iterations to {max_iterations + 1}")
+                print_agent_information(agent, "status", f"Made {len(tool_calls)} tool calls, will increase the max_iterations to {max_iterations + 1}")
                 max_iterations += 1
 
             # 5. Determine next steps
@@ -472,14 +505,16 @@ First, I'll create a plan for how to approach this task, then implement it step
             # 6. Handle different next actions
             if next_action.action_type == ActionType.COMPLETE:
                 # Task complete, exit loop
-                await print_agent_information(agent, "status", "Task has been completed successfully!")
+                print_agent_information(agent, "status", "Task has been completed successfully!")
                 break
 
             elif next_action.action_type == ActionType.AUTO_CONTINUE:
                 # Auto-continue to next step
                 query = await get_continuation_prompt(agent, iteration, response, auto_continue_prompt)
-                await print_agent_information(agent, "status", "Automatically continuing to next step...")
-                await asyncio.sleep(loop_delay)  # Brief pause for readability
+                print_agent_information(agent, "status", "Automatically continuing to next step...")
+                if loop_delay > 0:
+                    # Optional pause for readability; asyncio.sleep keeps the event loop running
+                    await asyncio.sleep(loop_delay)
 
             elif next_action.action_type == ActionType.USER_INPUT:
                 # Get user input and create continuation
@@ -490,7 +525,7 @@ First, I'll create a plan for how to approach this task, then implement it step
 
             elif next_action.action_type == ActionType.MANUAL_CONTINUE:
                 # Get user direction for continuation
-                await print_agent_information(agent, "response", "How can I help you further with this task? Please provide any guidance or specific requests.")
+                print_agent_information(agent, "response", "How can I help you further with this task? Please provide any guidance or specific requests.")
                 user_input = await get_user_input(next_action.prompt)
                 query = await get_continuation_prompt(agent, iteration, response, user_input)
                 iteration += 1
@@ -545,7 +580,7 @@ First, I'll create a plan for how to approach this task, then implement it step
                 break
 
     # End of conversation
-    await print_agent_information(agent, "status", f"Conversation ended after {iteration - 1} iterations with {total_tool_calls} total tool calls.")
+    print_agent_information(agent, "status", f"Conversation ended after {iteration - 1} iterations with {total_tool_calls} total tool calls.")
     logger.info(f"Interactive session complete: {iteration - 1} iterations, {total_tool_calls} tool calls")
 
     # Return a structured response with detailed information
@@ -581,74 +616,23 @@ def extract_tool_calls(response: str) -> List[Dict[str, Any]]:
     """
     Extract tool calls from the agent's response.
 
+    A line naming a tool is taken as a call; its argument is read from the following line when the
+    line also names the argument, and is "unknown" otherwise.
+
     Args:
         response: The response from the agent
 
     Returns:
-        A list of tool call dictionaries
+        A list of tool call dictionaries, in the order they appear
     """
-    tool_calls = []
-
     # Simple extraction based on common patterns
-    # In a real implementation, you would use more robust parsing
-
-    # Look for patterns like "```python\nagent.create_file(...)" or "I'll create a file..."
-    # followed by tool usage
-
     # This is a simplified example - Cursor uses more sophisticated parsing
-    if "create_file" in response:
-        # Extract file creation details
-        lines = response.split("\n")
-        for i, line in enumerate(lines):
-            if "create_file" in line and i < len(lines) - 1:
-                tool_calls.append(
-                    {
-                        "tool": "create_file",
-                        "args": {
-                            "file_path": (
-                                lines[i + 1].strip().strip("\"'")
-                                if "file_path" in line
-                                else "unknown"
-                            ),
-                        },
-                    }
-                )
-
-    if "edit_file" in response:
-        # Extract file editing details
-        lines = response.split("\n")
-        for i, line in enumerate(lines):
-            if "edit_file" in line and i < len(lines) - 1:
-                tool_calls.append(
-                    {
-                        "tool": "edit_file",
-                        "args": {
-                            "target_file": (
-                                lines[i + 1].strip().strip("\"'")
-                                if "target_file" in line
-                                else "unknown"
-                            ),
-                        },
-                    }
-                )
-
-    if "run_terminal_cmd" in response:
-        # Extract terminal commands
-        lines = response.split("\n")
-        for i, line in enumerate(lines):
-            if "run_terminal_cmd" in line and i < len(lines) - 1:
-                tool_calls.append(
-                    {
-                        "tool": "run_terminal_cmd",
-                        "args": {
-                            "command": (
-                                lines[i + 1].strip().strip("\"'")
-                                if "command" in line
-                                else "unknown"
-                            ),
-                        },
-                    }
-                )
+    tool_calls = []
+    for match in _TOOL_CALL_RE.finditer(response):
+        tool = match["tool"]
+        arg_name = _TOOL_CALL_ARGS[tool]
+        value = match["arg"].strip().strip("\"'") if arg_name in match.group(0) else "unknown"
+        tool_calls.append({"tool": tool, "args": {arg_name: value}})
 
     return tool_calls
 
@@ -665,32 +649,17 @@ def is_task_complete(response: str) -> bool:
     """
     logger.debug("Checking if task is complete based on agent response")
 
-    # Look for various forms of task completion statements
-    completion_indicators = [
-        "task complete",
-        "task is complete",
-        "completed all the required tasks",
-        "successfully implemented all",
-        "all requirements have been met",
-        "implementation is now complete",
-        "successfully created all the necessary",
-        "the project is now ready",
-        "everything is now implemented",
-        "all features are now implemented",
-    ]
-
     response_lower = response.lower()
 
     # Check for completion indicators with additional context check
     # (Cursor does more sophisticated analysis)
-    for indicator in completion_indicators:
-        if indicator in response_lower:
-            # Check if it's a real completion and not part of a plan
-            start_index = response_lower.index(indicator)
-            end_index = min(start_index + 50, len(response_lower))
-            if "next" not in response_lower[start_index:end_index]:
-                logger.info(f"Task completion detected: '{indicator}'")
-                return True
+    for match in _COMPLETION_RE.finditer(response_lower):
+        # Check if it's a real completion and not part of a plan; searching in place avoids
+        # copying the following text
+        start_index = match.start()
+        if response_lower.find("next", start_index, start_index + 50) == -1:
+            logger.info(f"Task completion detected: '{match.group(0)}'")
+            return True
 
     # Check for summary sections that typically indicate completion
     if (
@@ -715,156 +684,250 @@ async def get_continuation_prompt(agent: Any, iteration: int, last_response: str
     """
     Generate a continuation prompt for the next iteration.
 
+    The agent already sees its previous response in the conversation history, so the prompt only
+    needs to pass on the user's input and ask it to continue.
+
     Args:
-        agent: The agent instance
+        agent: The agent instance (kept for compatibility; not used)
         iteration: Current iteration number
-        last_response: Last response from the agen
+        last_response: Last response from the agent (kept for compatibility; not used)
         user_input: Optional user input to incorporate
 
     Returns:
         A prompt string for the agent to continue
     """
-    try:
-        # Create a temporary user info to avoid polluting the main conversation
-        temp_user_info = {"temporary_context": True, "is_system_request": True}
+    if user_input:
+        return f"User feedback: {user_input}\n\nContinue with the next steps."
+    return f"Continue with the next steps for iteration {iteration + 1} based on the previous results."
 
-        # Prepare the analysis prompt to determine the best continuation approach
-        analysis_prompt = f"""You're helping implement a multi-step solution. Review the current status and determine how to continue.
 
-    Current iteration: {iteration}
-    Last response:
-    {last_response}
+def _count_lines(file_path: str, limit: int) -> int:
+    """
+    Count the lines of a file, reading only until limit lines have been seen.
 
-    {f"User input for continuation: {user_input}" if user_input else "No additional user input provided."}
+    Args:
+        file_path: Path of the file
+        limit: Number of lines after which counting stops
 
-    What's the best continuation prompt for the next iteration? Consider:
-    1. Summarize progress so far
-    2. Identify next steps based on current status
-    3. Incorporate any user inpu
-    4. Frame the prompt to move the task forward
+    Returns:
+        The number of lines, or a number of at least limit if the file has that many
+    """
+    count = 0
+    last = b"\n"
+    with open(file_path, "rb") as f:
+        while count < limit:
+            chunk = f.read(65536)
+            if not chunk:
+                # A last line without a trailing newline still counts
+                return count + (last != b"\n")
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    return count
+
+
+def _iter_workspace_files(root: str, extensions: FrozenSet[str]) -> Iterator[Tuple[str, float]]:
+    """
+    Walk a workspace and yield the files with one of the given extensions.
+
+    Directories are read with os.scandir, whose entries already know their type, so only the
+    modification time costs a stat call per file. Symlinked directories are not followed, as with
+    os.walk, and unreadable, hidden and _SKIP_DIRS directories are skipped.
 
-    Return ONLY the continuation prompt itself with no additional explanations or meta-text.
+    Args:
+        root: The workspace directory
+        extensions: File extensions to include, without the leading dot
+
+    Yields:
+        Tuples of (file path, modification time)
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        name = entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if name[0] != "." and name not in _SKIP_DIRS:
+                                stack.append(entry.path)
+                            continue
+                        dot = name.rfind(".")
+                        if dot >= 0 and name[dot + 1:] in extensions and entry.is_file():
+                            yield entry.path, entry.stat().st_mtime
+                    except OSError as ex:
+                        logger.warning(f"Error getting file info for {entry.path}: {str(ex)}")
+        except OSError as ex:
+            logger.debug(f"Skipping unreadable directory {directory}: {str(ex)}")
+
+
+def _recent_workspace_files(workspace_path: str, count: int = 10) -> List[str]:
     """
+    List the most recently modified watched files in a workspace.
 
-        # Get the continuation prompt from the agen
-        agent_response = await agent.chat(analysis_prompt, temp_user_info)
+    Args:
+        workspace_path: The workspace directory
+        count: Number of files to return
 
-        # Handle structured response
-        if isinstance(agent_response, dict):
-            continuation_prompt: str = agent_response["message"]
-        else:
-            continuation_prompt = str(agent_response)
+    Returns:
+        File paths, most recently modified first
+    """
+    # Keep the newest files while walking, without sorting the whole list
+    recent_files = heapq.nlargest(count, _iter_workspace_files(workspace_path, _WATCH_EXTS), key=itemgetter(1))
+    return [file_path for file_path, _ in recent_files]
 
-        # If user input was provided, make sure it's incorporated
-        if user_input and user_input not in continuation_prompt:
-            continuation_prompt = f"The user has provided the following input: '{user_input}'\n\n{continuation_prompt}"
 
-        await print_agent_information(agent, "status", "Continuation prompt prepared for next iteration", continuation_prompt[:100] + "..." if len(continuation_prompt) > 100 else continuation_prompt)
+def _read_file_if_changed(
+    file_path: str, known_signature: Optional[Tuple[int, int]]
+) -> Optional[Tuple[str, Tuple[int, int]]]:
+    """
+    Read a file unless its (mtime, size) signature matches the one its cached contents have.
+
+    Files larger than _MAX_CONTEXT_BYTES are not read whole: only their beginning and end are
+    returned, joined by a marker giving the number of bytes left out.
 
-        return continuation_prompt
+    Args:
+        file_path: Path of the file
+        known_signature: Signature of the cached contents, or None if there are none
 
+    Returns:
+        The contents and new signature, or None if the file is unchanged, missing, not a regular
+        file or unreadable
+    """
+    try:
+        st = os.stat(file_path)
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == known_signature:
+            return None
+        # The size is known from the stat, so the file is read and decoded in one call
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            if st.st_size <= _MAX_CONTEXT_BYTES:
+                data = os.read(fd, st.st_size) if st.st_size else b""
+                return data.decode("utf-8", errors="replace"), signature
+            half = _MAX_CONTEXT_BYTES // 2
+            head = os.read(fd, half)
+            os.lseek(fd, -half, os.SEEK_END)
+            tail = os.read(fd, half)
+        finally:
+            os.close(fd)
+        omitted = st.st_size - len(head) - len(tail)
+        return (
+            f"{head.decode('utf-8', errors='replace')}\n... [{omitted} bytes omitted] ...\n"
+            f"{tail.decode('utf-8', errors='replace')}",
+            signature,
+        )
+    except FileNotFoundError:
+        return None
     except Exception as ex:
-        # If there's an error getting a continuation prompt, just return a simple fallback
-        print(f"Error getting continuation prompt: {str(ex)}")
-        # Return a default continuation promp
-        return "Continue with the next steps based on the previous results."
+        logger.error(f"Error reading file {file_path}: {str(ex)}")
+        print(f"\n❌ Error: Error reading file {file_path}\n  {str(ex)}")
+        return None
 
 
-def update_workspace_state(user_info: Dict[str, Any], created_or_modified_files: set) -> Dict[str, Any]:
+async def update_workspace_state(
+    user_info: Dict[str, Any],
+    created_or_modified_files: set,
+    file_signatures: Optional[Dict[str, Tuple[int, int]]] = None,
+) -> Dict[str, Any]:
     """
     Update the user_info with information about files that were created or modified.
 
+    The workspace walk and the reads of the open files run concurrently in the default thread
+    pool, so the event loop is not blocked by the filesystem.
+
     Args:
         user_info: The user information dictionary
         created_or_modified_files: Set of files that were created or modified
+        file_signatures: Optional cache of the (mtime, size) of each file when its contents were
+            last read. Files whose signature has not changed are not read again. Pass the same
+            dict on every call to use it.
 
     Returns:
         Updated user_info dictionary
     """
     logger.debug("Updating workspace state")
 
-    # Save the current workspace path
-    workspace_path = user_info.get("workspace_path", os.getcwd())
+    # Use the workspace path recorded when the session started; only look up the current
+    # directory if there is none
+    workspace_path = user_info.get("workspace_path") or os.getcwd()
     logger.debug(f"Current workspace path: {workspace_path}")
 
+    # Normalize the tracked state once so the code below can use it without further checks.
+    # A file_contents of None turns off caching file contents.
+    open_files = user_info.get("open_files")
+    if not isinstance(open_files, list):
+        open_files = user_info["open_files"] = []
+    file_contents = user_info.setdefault("file_contents", {})
+    if file_contents is not None and not isinstance(file_contents, dict):
+        file_contents = user_info["file_contents"] = {}
+
     # Update open_files with recently created/modified files
     # (in Cursor, this would reflect actually open files in the editor)
     if created_or_modified_files:
         logger.info(f"Updating open files with {len(created_or_modified_files)} created/modified files")
-        if "open_files" not in user_info or not isinstance(user_info["open_files"], list):
-            user_info["open_files"] = []
 
-        for file_path in created_or_modified_files:
-            if file_path not in user_info["open_files"]:
-                user_info["open_files"].append(file_path)
-                logger.debug(f"Added to open files: {file_path}")
-                # Can't use async function in a sync function
-                print(f"\n📄 File Operation: Added {file_path} to open files")
+        # A set difference finds the new files with hash lookups instead of scanning the list for
+        # each file
+        for file_path in created_or_modified_files.difference(open_files):
+            open_files.append(file_path)
+            logger.debug(f"Added to open files: {file_path}")
+            print(f"\n📄 File Operation: Added {file_path} to open files")
 
     # Simulate cursor position in the most recently modified file
-    if "open_files" in user_info and isinstance(user_info["open_files"], list) and user_info["open_files"]:
-        most_recent_file = user_info["open_files"][-1]
+    if open_files:
+        most_recent_file = open_files[-1]
         try:
-            line_count = 0
-            with open(most_recent_file, "r") as f:
-                line_count = len(f.readlines())
-
+            # Arbitrary position for simulation, so only the first 10 lines need counting
+            line = min(10, _count_lines(most_recent_file, 10))
             user_info["cursor_position"] = {
                 "file": most_recent_file,
-                "line": min(10, line_count),  # Arbitrary position for simulation
+                "line": line,
                 "column": 0,
             }
-            logger.debug(f"Updated cursor position to file: {most_recent_file}, line: {min(10, line_count)}")
+            logger.debug(f"Updated cursor position to file: {most_recent_file}, line: {line}")
         except Exception as ex:
             logger.error(f"Error setting cursor position: {str(ex)}")
             print(f"Error setting cursor position: {str(ex)}")
 
-    # Update list of recently modified files across the workspace
-    logger.debug("Updating recent files list")
-    recent_files = []
+    # Update list of recently modified files across the workspace, and file_contents for open files
+    # (similar to how Cursor provides file contents in context)
+    logger.debug("Updating recent files list and file contents cache")
+    loop = asyncio.get_running_loop()
     try:
-        for root, _, files in os.walk(workspace_path):
-            for file in files:
-                if file.endswith(
-                    (".py", ".txt", ".md", ".json", ".yaml", ".yml", ".js", ".ts", ".html", ".css")
-                ):
-                    file_path = os.path.join(root, file)
-                    try:
-                        recent_files.append(
-                            {"path": file_path, "modified": os.path.getmtime(file_path)}
-                        )
-                    except Exception as ex:
-                        logger.warning(f"Error getting file info for {file_path}: {str(ex)}")
-                        print(f"Error getting file info: {str(ex)}")
-
-        # Sort by modification time and take the 10 most recen
-        recent_files = sorted(recent_files, key=lambda x: x["modified"], reverse=True)[:10]
-        recent_file_paths = [file["path"] for file in recent_files]
-        user_info["recent_files"] = recent_file_paths
-        logger.debug(f"Updated recent files list with {len(recent_file_paths)} files")
-
-        # Update file_contents for open files
-        # This is similar to how Cursor provides file contents in contex
-        if "open_files" in user_info and isinstance(user_info["open_files"], list) and user_info["file_contents"] is not None:
-            if not isinstance(user_info["file_contents"], dict):
-                user_info["file_contents"] = {}
-
-            logger.debug("Updating file contents cache")
-            for file_path in user_info["open_files"]:
-                try:
-                    if os.path.isfile(file_path):
-                        with open(file_path, "r") as f:
-                            file_content = f.read()
-                            user_info["file_contents"][file_path] = file_content
-                            logger.debug(f"Cached contents of {file_path}: {len(file_content)} chars")
-                except Exception as ex:
-                    # Can't use async function in a sync function
-                    logger.error(f"Error reading file {file_path}: {str(ex)}")
-                    print(f"\n❌ Error: Error reading file {file_path}")
-                    print(f"  {str(ex)}")
+        files_to_read = list(open_files) if file_contents is not None else []
+
+        # Signature of each file when its cached contents were read; None forces a read
+        known_signatures = [
+            file_signatures.get(file_path)
+            if file_signatures is not None and file_path in file_contents
+            else None
+            for file_path in files_to_read
+        ]
+        # The walk is submitted first so it runs alongside the reads; each is awaited on its own so
+        # both keep their result types
+        recent_files_future = loop.run_in_executor(None, _recent_workspace_files, workspace_path)
+        contents = await asyncio.gather(*[
+            loop.run_in_executor(None, _read_file_if_changed, file_path, signature)
+            for file_path, signature in zip(files_to_read, known_signatures)
+        ])
+        recent_files = await recent_files_future
+
+        user_info["recent_files"] = recent_files
+        logger.debug(f"Updated recent files list with {len(recent_files)} files")
+
+        for file_path, result in zip(files_to_read, contents):
+            if result is None:
+                continue
+            file_content, signature = result
+            file_contents[file_path] = file_content
+            if file_signatures is not None:
+                file_signatures[file_path] = signature
+            logger.debug(f"Cached contents of {file_path}: {len(file_content)} chars")
 
     except Exception as ex:
-        # Can't use async function in a sync function
         logger.error(f"Error updating workspace state: {str(ex)}")
         print(f"\n❌ Error: Error updating workspace state: {str(ex)}")
 
@@ -885,12 +948,13 @@ async def run_agent_chat(
     Returns:
         The agent's response
     """
-    # Create and configure agen
+    # Create and configure agent
+    _ensure_env_loaded()
     agent = create_agent(model=model)
     agent.register_default_tools()
 
     # Print promp
-    await print_agent_information(agent, "status", f"Sending query to agent: {query}")
+    print_agent_information(agent, "status", f"Sending query to agent: {query}")
     agent_response = await agent.chat(query)
 
     # Handle either string or structured response
@@ -899,14 +963,14 @@ async def run_agent_chat(
     else:
         response_text = agent_response
 
-    await print_agent_information(agent, "response", response_text)
+    print_agent_information(agent, "response", response_text)
 
     return response_text
 
 
 async def process_tool_calls(
     agent: Any,
-    agent_response: Union[str, Dict[str, Any]],
+    agent_response: Union[str, AgentResponse],
     user_info: Dict[str, Any],
     created_or_modified_files: set,
     total_tool_calls: int
@@ -926,20 +990,19 @@ async def process_tool_calls(
     """
     logger.info("Processing tool calls from agent response")
 
-    # Extract tool calls from the response - check if it's a structured response or string
+    # Use the tool calls the agent reports in its structured response; text extraction is only a
+    # fallback for agents that return plain strings
+    tool_calls: List[Dict[str, Any]]
     if isinstance(agent_response, dict) and "tool_calls" in agent_response:
-        # It's a structured response with tool_calls directly available
         logger.debug(f"Found {len(agent_response['tool_calls'])} tool calls in structured response")
-        tool_calls = []
-        for tc in agent_response['tool_calls']:
-            # Convert to the format expected by the rest of the function
-            tool_calls.append({
-                "tool": tc["name"],
-                "args": tc["parameters"],
-                "result": tc["result"]
-            })
+        # Convert to the format expected by the rest of the function; agents report the result
+        # as "result" or, like the Ollama agent, as "output"
+        tool_calls = [
+            {"tool": tc["name"], "args": tc["parameters"], "result": tc.get("result", tc.get("output"))}
+            for tc in agent_response["tool_calls"]
+        ]
     else:
-        # It's a string response, need to extract tool calls from tex
+        # It's a string response, need to extract tool calls from text
         response_str = agent_response if isinstance(agent_response, str) else agent_response["message"]
         logger.debug("Extracting tool calls from text response")
         tool_calls = extract_tool_calls(response_str)
@@ -950,6 +1013,8 @@ async def process_tool_calls(
         total_tool_calls = 0
         logger.warning("Reset total_tool_calls to 0 because it was not an integer")
 
+    # Output for all tool calls, written at once after the tracking state is updated
+    messages: List[str] = []
     for tool_call in tool_calls:
         tool_name = tool_call.get("tool", "")
         args = tool_call.get("args", {})
@@ -957,39 +1022,37 @@ async def process_tool_calls(
         # Ensure tool_name is a string
         logger.info(f"Processing tool call: {tool_name}")
         logger.debug(f"Tool arguments: {args}")
-        await print_agent_information(agent, "tool_call", str(tool_name), args)
+        messages.append(format_agent_information("tool_call", str(tool_name), args))
 
-        # Make sure tool_calls is a list before appending
-        if isinstance(user_info["tool_calls"], list):
-            user_info["tool_calls"].append(tool_call)
-        else:
-            user_info["tool_calls"] = [tool_call]
+        # Make sure tool_calls is a bounded history before appending
+        if not isinstance(user_info["tool_calls"], deque):
+            user_info["tool_calls"] = deque(maxlen=MAX_TOOL_CALL_HISTORY)
+        user_info["tool_calls"].append(tool_call)
 
         total_tool_calls += 1
 
         # Track file operations to update open_files
-        if tool_call.get("tool") == "create_file" or tool_call.get("tool") == "edit_file":
-            file_path = tool_call.get("args", {}).get("file_path") or tool_call.get(
-                "args", {}
-            ).get("target_file")
+        if tool_name in _FILE_WRITE_TOOLS:
+            file_path = args.get("file_path") or args.get("target_file")
             if file_path:
                 created_or_modified_files.add(file_path)
                 logger.info(f"Tracked modified file: {file_path}")
-                await print_agent_information(agent, "file_operation", f"Modified {file_path}")
+                messages.append(format_agent_information("file_operation", f"Modified {file_path}"))
 
         # Track terminal commands
-        if tool_call.get("tool") == "run_terminal_cmd":
-            command = tool_call.get("args", {}).get("command")
+        if tool_name in _TERMINAL_TOOLS:
+            command = args.get("command")
             if command:
-                # Make sure command_history is a list before appending
-                if isinstance(user_info["command_history"], list):
-                    user_info["command_history"].append(command)
-                else:
-                    user_info["command_history"] = [command]
+                # Make sure command_history is a bounded history before appending
+                if not isinstance(user_info["command_history"], deque):
+                    user_info["command_history"] = deque(maxlen=MAX_COMMAND_HISTORY)
+                user_info["command_history"].append(command)
                 # Convert command to string to ensure it's a valid type
                 logger.info(f"Tracked terminal command: {command}")
-                await print_agent_information(agent, "command", f"Executed command: {command}")
+                messages.append(format_agent_information("command", f"Executed command: {command}"))
 
+    if messages:
+        sys.stdout.write("".join(messages))
     logger.info(f"Processed {len(tool_calls)} tool calls, running total: {total_tool_calls}")
     return total_tool_calls, tool_calls
 
@@ -1014,7 +1077,7 @@ async def check_tool_call_limits(
 
     if total_tool_calls >= tool_call_limit:
         logger.info(f"Reached global tool call limit ({tool_call_limit})")
-        await print_agent_information(
+        print_agent_information(
             agent,
             "status",
             f"Reached maximum of {tool_call_limit} total tool calls for this session"
@@ -1027,13 +1090,13 @@ async def check_tool_call_limits(
 
         if choice.lower() != 'y':
             logger.info("User chose to stop after reaching tool call limit")
-            await print_agent_information(agent, "status", "User requested to stop after reaching tool call limit.")
+            print_agent_information(agent, "status", "User requested to stop after reaching tool call limit.")
             return False
         else:
             # When user chooses to continue, we just let the function return True
             # The limit remains the same, but we allow more calls beyond the limi
             logger.info("User chose to continue beyond tool call limit")
-            await print_agent_information(
+            print_agent_information(
                 agent,
                 "status",
                 f"Continuing beyond the tool call limit. Current: {total_tool_calls}/{tool_call_limit}"
@@ -1064,23 +1127,22 @@ async def trim_context_history(user_info: Dict[str, Any]) -> Dict[str, Any]:
     """
     Trim the history in user_info to prevent context overflow.
 
+    The tool call and command histories are deques that drop their oldest entries as new ones are
+    added; histories replaced with plain lists (e.g. by a callback) are converted back.
+
     Args:
         user_info: The user context information
 
     Returns:
         Updated user_info with trimmed history
     """
-    logger.debug("Trimming context history to prevent overflow")
-
-    # Limit length of tool calls history
-    if isinstance(user_info["tool_calls"], list) and len(user_info["tool_calls"]) > 10:
-        logger.debug(f"Trimming tool calls from {len(user_info['tool_calls'])} to 10")
-        user_info["tool_calls"] = user_info["tool_calls"][-10:]
+    if not isinstance(user_info["tool_calls"], deque):
+        logger.debug("Converting tool calls history to a bounded deque")
+        user_info["tool_calls"] = deque(user_info["tool_calls"] or (), maxlen=MAX_TOOL_CALL_HISTORY)
 
-    # Limit length of command history
-    if isinstance(user_info["command_history"], list) and len(user_info["command_history"]) > 5:
-        logger.debug(f"Trimming command history from {len(user_info['command_history'])} to 5")
-        user_info["command_history"] = user_info["command_history"][-5:]
+    if not isinstance(user_info["command_history"], deque):
+        logger.debug("Converting command history to a bounded deque")
+        user_info["command_history"] = deque(user_info["command_history"] or (), maxlen=MAX_COMMAND_HISTORY)
 
     return user_info
 
@@ -1103,7 +1165,7 @@ async def show_progress_messages(
         max_iterations: Maximum iterations
     """
     # Print a message if the task seems to be in progress
-    if auto_continue and "in progress" in response.lower() and iteration < max_iterations:
+    if auto_continue and iteration < max_iterations and _IN_PROGRESS_RE.search(response):
         print(f"{Colors.YELLOW}Task appears to be in progress. Continuing automatically...{Colors.ENDC}")
 
     # If this was the last iteration, inform the user
@@ -1146,7 +1208,7 @@ async def determine_next_steps(
     if user_input_request and isinstance(user_input_request, str):
         logger.info("Agent is requesting user input")
         logger.debug(f"Input request: {user_input_request}")
-        await print_agent_information(agent, "status", "The agent is requesting additional information from you.")
+        print_agent_information(agent, "status", "The agent is requesting additional information from you.")
         return NextAction(ActionType.USER_INPUT, prompt=user_input_request)
     else:
         logger.info("Continuing with manual user input")
@@ -1176,7 +1238,7 @@ async def handle_iteration_error(
     logger.error(f"Error in iteration {iteration}: {str(error)}")
     logger.debug(f"Error type: {type(error).__name__}")
 
-    await print_agent_information(agent, "error", f"Error in iteration {iteration}", str(error))
+    print_agent_information(agent, "error", f"Error in iteration {iteration}", str(error))
     user_info["recent_errors"].append(str(error))
 
     print(f"\n{Colors.YELLOW}Options:{Colors.ENDC}")
@@ -1218,7 +1280,7 @@ async def process_query_and_get_response(
     logger.debug(f"Query length: {len(query)} chars")
 
     # Show thinking animation
-    await print_agent_information(agent, "thinking", "Processing your request...")
+    print_agent_information(agent, "thinking", "Processing your request...")
 
     # Get agent response with Cursor-like system promp
     start_time = time.time()
@@ -1242,8 +1304,8 @@ async def process_query_and_get_response(
     logger.debug(f"Response length: {len(response)} chars")
 
     # Print full response
-    await print_agent_information(agent, "response", response)
-    await print_agent_information(agent, "status", f"Response generated in {duration:.2f} seconds")
+    print_agent_information(agent, "response", response)
+    print_agent_information(agent, "status", f"Response generated in {duration:.2f} seconds")
 
     return response, duration
 
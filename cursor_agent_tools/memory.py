@@ -0,0 +1,347 @@
+"""
+Context management helpers for keeping the conversation sent to the model within a token budget.
+
+Older messages are condensed into a heuristic summary (requests, tools used, files mentioned and
+notable statements) without making an extra model call. The removed messages are archived as pages,
+one per user turn, and the summary lists a short keyword bookmark for each page so the model can
+recall the full text when it needs it.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+# Rough token estimate used for budgeting: about four characters per token
+CHARS_PER_TOKEN = 4
+
+# Defaults for the live context window
+DEFAULT_CONTEXT_WINDOW = 200000
+CONTEXT_THRESHOLD = 0.8
+KEEP_RECENT_MESSAGES = 40
+MAX_HISTORY_MESSAGES = 150
+
+# Keywords shown in a page bookmark
+BOOKMARK_KEYWORDS = 3
+
+# Common words that make poor bookmark keywords
+_STOPWORDS = frozenset({
+    "the", "and", "for", "that", "this", "with", "you", "your", "are", "was", "were", "have", "has",
+    "not", "but", "can", "will", "all", "from", "they", "there", "what", "when", "which", "would",
+    "should", "could", "into", "then", "than", "them", "these", "those", "been", "its", "our", "out",
+    "let", "use", "file", "user_query", "user_info", "true", "false", "none", "null",
+})
+
+# Keyword candidates: identifiers, dotted names and paths of at least three characters
+_TOKEN_RE = re.compile(r"[a-z_][\w/.-]+\w")
+_USER_QUERY_RE = re.compile(r"<user_query>\s*(.*?)\s*</user_query>", re.DOTALL)
+_PATH_RE = re.compile(
+    r"(?<![\w/.-])(?:\.{0,2}/)?(?:[\w.-]+/)+[\w.-]+"
+    r"|\b[\w-]+\.(?:py|js|jsx|ts|tsx|json|md|txt|yaml|yml|toml|cfg|ini|html|css|sh|go|rs|java|c|cpp|h)\b"
+)
+_NOTE_RE = re.compile(
+    r"[^.!?\n]*\b(?:I will|I'll|I've|decided|created|updated|fixed|changed|added|removed)\b[^.!?\n]*[.!?]?"
+)
+
+
+def content_text(content: Any) -> str:
+    """
+    Extract the plain text of a message's content.
+
+    Args:
+        content: A string or a list of content blocks (dicts or SDK objects)
+
+    Returns:
+        The text of the content, with blocks separated by newlines
+    """
+    if isinstance(content, str):
+        return content
+
+    parts = []
+    for block in content or ():
+        if isinstance(block, dict):
+            text = block.get("text") or block.get("content") or block.get("input")
+        else:
+            text = getattr(block, "text", None) or getattr(block, "input", None)
+        if not text:
+            continue
+        if isinstance(text, str):
+            parts.append(text)
+        elif isinstance(text, list):
+            parts.append(content_text(text))
+        else:
+            parts.append(str(text))
+    return "\n".join(parts)
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """
+    Estimate the number of tokens a message adds to a request.
+
+    Args:
+        message: The message to estimate
+
+    Returns:
+        Approximate token count
+    """
+    return len(content_text(message.get("content"))) // CHARS_PER_TOKEN + 1
+
+
+def tool_names(content: Any) -> List[str]:
+    """
+    List the names of the tools called in a message's content.
+
+    Args:
+        content: A string or a list of content blocks
+
+    Returns:
+        Tool names in call order
+    """
+    if isinstance(content, str):
+        return []
+
+    names = []
+    for block in content or ():
+        if isinstance(block, dict):
+            if block.get("type") == "tool_use":
+                names.append(block["name"])
+        elif getattr(block, "type", None) == "tool_use":
+            names.append(block.name)
+    return names
+
+
+def is_user_turn(message: Dict[str, Any]) -> bool:
+    """
+    Check whether a message starts a user turn, i.e. is a plain-text user message.
+
+    Tool results are also sent as user messages, but with a list of content blocks.
+
+    Args:
+        message: The message to check
+
+    Returns:
+        True if the message is a plain-text user message
+    """
+    return message["role"] == "user" and isinstance(message["content"], str)
+
+
+def find_cut_index(messages: List[Dict[str, Any]], keep_recent: int) -> int:
+    """
+    Find where the older part of a message list can be cut off.
+
+    The cut is placed at a plain-text user message so that tool_use blocks and their tool_result
+    messages are never separated, and at least keep_recent messages stay after it.
+
+    Args:
+        messages: The API message list
+        keep_recent: Minimum number of messages to keep after the cut
+
+    Returns:
+        Index of the first message to keep, or 0 if there is no valid cut
+    """
+    for index in range(min(len(messages) - keep_recent, len(messages) - 1), 0, -1):
+        if is_user_turn(messages[index]):
+            return index
+    return 0
+
+
+def split_rounds(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Split messages into rounds that each start at a plain-text user message.
+
+    Args:
+        messages: The messages to split
+
+    Returns:
+        List of rounds, each a list of consecutive messages
+    """
+    rounds: List[List[Dict[str, Any]]] = []
+    for message in messages:
+        if not rounds or is_user_turn(message):
+            rounds.append([])
+        rounds[-1].append(message)
+    return rounds
+
+
+def page_keywords(messages: List[Dict[str, Any]], count: int = BOOKMARK_KEYWORDS) -> List[str]:
+    """
+    Pick bookmark keywords for a page: the tools it called followed by its most frequent words.
+
+    Args:
+        messages: The messages on the page
+        count: Number of frequent words to include
+
+    Returns:
+        Keywords in display order
+    """
+    keywords: Dict[str, None] = {}
+    words: Counter = Counter()
+    for message in messages:
+        for name in tool_names(message.get("content")):
+            keywords[name] = None
+        # One regex scan tokenizes the whole message instead of splitting and stripping each word
+        words.update(_TOKEN_RE.findall(content_text(message.get("content")).lower()))
+
+    for word in _STOPWORDS.intersection(words):
+        del words[word]
+
+    limit = len(keywords) + count
+    for word, _ in words.most_common():
+        if len(keywords) >= limit:
+            break
+        keywords.setdefault(word, None)
+    return list(keywords)
+
+
+def filter_content(content: Any, pattern: "re.Pattern[str]") -> Any:
+    """
+    Replace the text matching a pattern in a message's content with a placeholder.
+
+    Only text is rewritten; tool_use ids and inputs are left alone so tool calls stay paired with
+    their results.
+
+    Args:
+        content: A string or a list of content blocks
+        pattern: Compiled pattern of the text to remove
+
+    Returns:
+        The filtered content, or the original object if nothing matched
+    """
+    if isinstance(content, str):
+        return pattern.sub("[filtered]", content)
+
+    changed = False
+    blocks = []
+    for block in content:
+        if not isinstance(block, dict):
+            # SDK content block objects; only text blocks carry anything to filter
+            if getattr(block, "type", None) != "text":
+                blocks.append(block)
+                continue
+            block = {"type": "text", "text": block.text}
+        text_key = "text" if block.get("type") == "text" else "content" if block.get("type") == "tool_result" else None
+        if text_key and isinstance(block.get(text_key), str):
+            filtered = pattern.sub("[filtered]", block[text_key])
+            if filtered != block[text_key]:
+                block = {**block, text_key: filtered}
+                changed = True
+        blocks.append(block)
+    return blocks if changed else content
+
+
+def score_page(messages: List[Dict[str, Any]], query_words: List[str]) -> int:
+    """
+    Score how well a page matches a query by counting occurrences of the query words.
+
+    Args:
+        messages: The messages on the page
+        query_words: Lowercase query words
+
+    Returns:
+        The total number of occurrences
+    """
+    text = "\n".join(content_text(message.get("content")) for message in messages).lower()
+    return sum(text.count(word) for word in query_words)
+
+
+def render_page(messages: List[Dict[str, Any]]) -> str:
+    """
+    Render archived messages as plain text for the recall tool.
+
+    Args:
+        messages: The messages on the page
+
+    Returns:
+        One "role: text" block per message
+    """
+    return "\n\n".join(f"{message['role']}: {content_text(message.get('content'))}" for message in messages)
+
+
+class ContextSummary:
+    """Accumulates the key points of messages removed from the context window."""
+
+    # Most recent items kept per section
+    MAX_ITEMS = 20
+    # Most recent page bookmarks listed in the summary
+    MAX_BOOKMARKS = 50
+
+    def __init__(self) -> None:
+        self.message_count = 0
+        # Dicts used as insertion-ordered sets
+        self.requests: Dict[str, None] = {}
+        self.tools: Dict[str, None] = {}
+        self.files: Dict[str, None] = {}
+        self.notes: Dict[str, None] = {}
+        # Page id -> bookmark keywords
+        self.bookmarks: Dict[str, List[str]] = {}
+
+    def _add(self, items: Dict[str, None], item: str) -> None:
+        # Re-inserting moves the item to the end, so the oldest items are evicted first
+        items.pop(item, None)
+        items[item] = None
+        if len(items) > self.MAX_ITEMS:
+            del items[next(iter(items))]
+
+    def add_messages(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """
+        Record the key points of messages that are leaving the context window.
+
+        Args:
+            messages: The messages being removed
+        """
+        for message in messages:
+            self.message_count += 1
+            content = message.get("content")
+            text = content_text(content)
+
+            if is_user_turn(message) and not text.startswith("<summary>"):
+                match = _USER_QUERY_RE.search(text)
+                request = (match.group(1) if match else text).strip().split("\n", 1)[0]
+                if request:
+                    self._add(self.requests, request[:200])
+            elif message["role"] == "assistant":
+                for name in tool_names(content):
+                    self._add(self.tools, name)
+                for note in _NOTE_RE.findall(text):
+                    self._add(self.notes, note.strip()[:200])
+
+            for path in _PATH_RE.findall(text):
+                self._add(self.files, path)
+
+    def add_bookmark(self, page_id: str, keywords: List[str]) -> None:
+        """
+        Record the bookmark for an archived page.
+
+        Args:
+            page_id: Id the recall tool accepts for the page
+            keywords: Keywords describing the page
+        """
+        self.bookmarks[page_id] = keywords
+        if len(self.bookmarks) > self.MAX_BOOKMARKS:
+            del self.bookmarks[next(iter(self.bookmarks))]
+
+    def render(self) -> str:
+        """
+        Render the summary as message content.
+
+        Returns:
+            The summary wrapped in <summary> tags
+        """
+        lines = [
+            "<summary>",
+            f"Summary of {self.message_count} earlier messages removed to keep the context small.",
+        ]
+        if self.requests:
+            lines.append("User requests:")
+            lines.extend(f"- {request}" for request in self.requests)
+        if self.tools:
+            lines.append(f"Tools used: {', '.join(self.tools)}")
+        if self.files:
+            lines.append(f"Files mentioned: {', '.join(self.files)}")
+        if self.notes:
+            lines.append("Notes:")
+            lines.extend(f"- {note}" for note in self.notes)
+        if self.bookmarks:
+            lines.append("Archived pages (call the recall tool with a page id to read one):")
+            lines.extend(f"[{page_id}: {', '.join(keywords)}]" for page_id, keywords in self.bookmarks.items())
+        lines.append("</summary>")
+        return "\n".join(lines)
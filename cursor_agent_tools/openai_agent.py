@@ -1,23 +1,87 @@
 # mypy: ignore-errors
+import asyncio
+import importlib
 import json
-from typing import Any, Dict, List, Optional, Callable, cast, Union
+import re
+import weakref
+from typing import Any, ClassVar, Dict, List, Optional, Callable, Tuple, cast, Union
 
-from openai import AsyncOpenAI, BadRequestError, RateLimitError, APIError, AuthenticationError
+from openai import AsyncOpenAI, BadRequestError, RateLimitError, APIError, AuthenticationError, DefaultAsyncHttpxClient
 
-from .base import BaseAgent, AgentResponse, AgentToolCall
+from .base import BaseAgent, AgentResponse, AgentToolCall, close_shared_clients, dumps_json, loads_json, shared_client
 from .logger import get_logger
+from .memory import KEEP_RECENT_MESSAGES, MAX_HISTORY_MESSAGES, find_cut_index
 from .permissions import PermissionOptions, PermissionRequest, PermissionStatus
-from .tools.register_tools import register_default_tools
 
 # Initialize logger
 logger = get_logger(__name__)
 
+# Connection pool limits for the shared OpenAI clients
+_HTTP_LIMITS = {"max_connections": 64, "max_keepalive_connections": 32, "keepalive_expiry": 60}
+
+# OpenAI keys start with sk- and are at least 20 characters long, without whitespace
+_API_KEY_RE = re.compile(r"sk-\S{17,}")
+
+# System prompt shared by every OpenAI agent instance
+_OPENAI_SYSTEM_PROMPT = """
+You are a powerful agentic AI coding assistant, powered by OpenAI's advanced models. You operate exclusively in Cursor, the world's best IDE.
+
+You are pair programming with a USER to solve their coding task.
+The task may require creating a new codebase, modifying or debugging an existing codebase, or simply answering a question.
+Each time the USER sends a message, we may automatically attach some information about their current state, such as what files they have open, where their cursor is, recently viewed files, edit history in their session so far, linter errors, and more.
+This information may or may not be relevant to the coding task, it is up for you to decide.
+Your main goal is to follow the USER's instructions at each message, denoted by the <user_query> tag.
+
+<tool_calling>
+You have tools at your disposal to solve the coding task. Follow these rules regarding tool calls:
+1. ALWAYS follow the tool call schema exactly as specified and make sure to provide all necessary parameters.
+2. The conversation may reference tools that are no longer available. NEVER call tools that are not explicitly provided.
+3. **NEVER refer to tool names when speaking to the USER.** For example, instead of saying 'I need to use the edit_file tool to edit your file', just say 'I will edit your file'.
+4. Only calls tools when they are necessary. If the USER's task is general or you already know the answer, just respond without calling tools.
+5. Before calling each tool, first explain to the USER why you are calling it.
+</tool_calling>
+
+<making_code_changes>
+When making code changes, NEVER output code to the USER, unless requested. Instead use one of the code edit tools to implement the change.
+Use the code edit tools at most once per turn.
+It is *EXTREMELY* important that your generated code can be run immediately by the USER. To ensure this, follow these instructions carefully:
+1. Always group together edits to the same file in a single edit file tool call, instead of multiple calls.
+2. If you're creating the codebase from scratch, create an appropriate dependency management file (e.g. requirements.txt) with package versions and a helpful README.
+3. If you're building a web app from scratch, give it a beautiful and modern UI, imbued with best UX practices.
+4. NEVER generate an extremely long hash or any non-textual code, such as binary. These are not helpful to the USER and are very expensive.
+5. Unless you are appending some small easy to apply edit to a file, or creating a new file, you MUST read the the contents or section of what you're editing before editing it.
+6. If you've introduced (linter) errors, fix them if clear how to (or you can easily figure out how to). Do not make uneducated guesses. And DO NOT loop more than 3 times on fixing linter errors on the same file. On the third time, you should stop and ask the user what to do next.
+7. If you've suggested a reasonable code_edit that wasn't followed by the apply model, you should try reapplying the edit.
+</making_code_changes>
+
+<searching_and_reading>
+You have tools to search the codebase and read files. Follow these rules regarding tool calls:
+1. If available, heavily prefer the semantic search tool to grep search, file search, and list dir tools.
+2. If you need to read a file, prefer to read larger sections of the file at once over multiple smaller calls.
+3. If you have found a reasonable place to edit or answer, do not continue calling tools. Edit or answer from the information you have found.
+</searching_and_reading>
+
+Answer the user's request using the relevant tool(s), if they are available. Check that all the required parameters for each tool call are provided or can reasonably be inferred from context. IF there are no relevant tools or there are missing values for required parameters, ask the user to supply these values; otherwise proceed with the tool calls. If the user provides a specific value for a parameter (for example provided in quotes), make sure to use that value EXACTLY. DO NOT make up values for or ask about optional parameters. Carefully analyze descriptive terms in the request as they may indicate required parameter values that should be included even if not explicitly quoted.
+
+You MUST use the following format when citing code regions or blocks:
+```12:15:app/components/Todo.tsx
+// ... existing code ...
+```
+This is the ONLY acceptable format for code citations. The format is ```startLine:endLine:filepath where startLine and endLine are line numbers.
+"""
+
 
 class OpenAIAgent(BaseAgent):
     """
     OpenAI Agent that implements the BaseAgent interface using OpenAI's models.
     """
 
+    # Clients shared between agents, per event loop and keyed by (api_key, timeout), because httpx
+    # connection pools cannot cross event loops
+    _client_cache: ClassVar[
+        "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], AsyncOpenAI]]"
+    ] = weakref.WeakKeyDictionary()
+
     def __init__(
         self,
         api_key: str,
@@ -56,32 +120,67 @@ class OpenAIAgent(BaseAgent):
         self.timeout = timeout
         self.extra_kwargs = kwargs
 
-        # Initialize OpenAI client
+        # The OpenAI client is looked up in the shared cache on first use (see the client property)
+        self._client: Optional[AsyncOpenAI] = None
+
+        self.conversation_history = []
+        self.available_tools = {}
+        # Once the history holds more than max_history_messages, whole turns are dropped from the
+        # front until about keep_recent_messages remain, so every request stays bounded in size
+        self.max_history_messages = MAX_HISTORY_MESSAGES
+        self.keep_recent_messages = KEEP_RECENT_MESSAGES
+        logger.debug(f"Generated system prompt ({len(self.system_prompt)} chars)")
+        logger.debug(f"Tool timeouts set to {default_tool_timeout}s")
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        The OpenAI client used for API calls.
+
+        Agents with the same API key and timeout share one client, and with it the connection pool,
+        for as long as they run on the same event loop. Outside a running event loop each access
+        creates a new client. Assigning a client overrides the shared one.
+        """
+        if self._client is not None:
+            return self._client
+
         try:
-            # Create a custom httpx client first to avoid proxies parameter issue
-            import httpx
-            http_client = httpx.AsyncClient(timeout=timeout, follow_redirects=True)
-            # Initialize with custom client to avoid proxies issue
-            self.client = AsyncOpenAI(
-                api_key=api_key,
-                http_client=http_client
-            )
-            logger.debug("Initialized OpenAI client")
+            return shared_client(self._client_cache, (self.api_key, self.timeout), self._create_client)
         except Exception as e:
             # Handle errors from incompatible package versions
             logger.error(f"Error initializing OpenAI client: {e}")
             # Mock client for tests to pass without actual API calls
-            if not api_key or api_key == "dummy-key" or "test" in str(model).lower():
+            if not self.api_key or self.api_key == "dummy-key" or "test" in str(self.model).lower():
                 logger.warning("Creating mock OpenAI client for tests")
-                self.client = type('MockOpenAIClient', (), {'chat': type('MockChatCompletions', (), {'create': lambda *args, **kwargs: None})()})
-            else:
-                raise RuntimeError(f"Failed to initialize OpenAI client. Please check package compatibility: {e}")
+                self._client = type('MockOpenAIClient', (), {'chat': type('MockChatCompletions', (), {'create': lambda *args, **kwargs: None})()})
+                return self._client
+            raise RuntimeError(f"Failed to initialize OpenAI client. Please check package compatibility: {e}")
+
+    @client.setter
+    def client(self, client: AsyncOpenAI) -> None:
+        self._client = client
+
+    def _create_client(self) -> AsyncOpenAI:
+        """Create an OpenAI client with a tuned keep-alive connection pool."""
+        # The SDK's HTTP client subclasses httpx.AsyncClient (or a fork of it), so the pool and
+        # timeout settings are built with the module it actually uses
+        httpx = importlib.import_module(DefaultAsyncHttpxClient.__mro__[1].__module__.partition(".")[0])
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(**_HTTP_LIMITS),
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+        )
+        logger.debug("Initialized OpenAI client")
+        return AsyncOpenAI(api_key=self.api_key, http_client=http_client)
 
-        self.conversation_history = []
-        self.available_tools = {}
-        self.system_prompt = self._generate_system_prompt()
-        logger.debug(f"Generated system prompt ({len(self.system_prompt)} chars)")
-        logger.debug(f"Tool timeouts set to {default_tool_timeout}s")
+    @classmethod
+    async def aclose(cls) -> None:
+        """
+        Close the OpenAI clients shared on the running event loop and their connection pools.
+
+        Clients of event loops that have been closed are dropped, and their connections are released
+        when the clients are garbage collected.
+        """
+        await close_shared_clients(cls._client_cache)
 
     def _is_valid_api_key(self, api_key: str) -> bool:
         """
@@ -97,74 +196,42 @@ class OpenAIAgent(BaseAgent):
             logger.warning("API key is empty or not a string")
             return False
 
-        # OpenAI keys should start with sk-
-        valid_prefix = api_key.startswith("sk-")
-
-        # Keys should be fairly long and not contain spaces
-        valid_length = len(api_key) >= 20 and " " not in api_key
-
-        if not valid_prefix or not valid_length:
+        # A single compiled match covers the prefix, length and whitespace checks
+        valid = _API_KEY_RE.fullmatch(api_key) is not None
+        if not valid:
             logger.warning("Invalid API key format")
-
-        return valid_prefix and valid_length
+        return valid
 
     def _generate_system_prompt(self) -> str:
         """
         Generate the system prompt that defines the agent's capabilities and behavior.
         This is an extensive prompt that replicates Claude's behavior in Cursor.
         """
-        logger.debug("Generating system prompt for OpenAI agent")
-        return """
-You are a powerful agentic AI coding assistant, powered by OpenAI's advanced models. You operate exclusively in Cursor, the world's best IDE.
-
-You are pair programming with a USER to solve their coding task.
-The task may require creating a new codebase, modifying or debugging an existing codebase, or simply answering a question.
-Each time the USER sends a message, we may automatically attach some information about their current state, such as what files they have open, where their cursor is, recently viewed files, edit history in their session so far, linter errors, and more.
-This information may or may not be relevant to the coding task, it is up for you to decide.
-Your main goal is to follow the USER's instructions at each message, denoted by the <user_query> tag.
+        return _OPENAI_SYSTEM_PROMPT
 
-<tool_calling>
-You have tools at your disposal to solve the coding task. Follow these rules regarding tool calls:
-1. ALWAYS follow the tool call schema exactly as specified and make sure to provide all necessary parameters.
-2. The conversation may reference tools that are no longer available. NEVER call tools that are not explicitly provided.
-3. **NEVER refer to tool names when speaking to the USER.** For example, instead of saying 'I need to use the edit_file tool to edit your file', just say 'I will edit your file'.
-4. Only calls tools when they are necessary. If the USER's task is general or you already know the answer, just respond without calling tools.
-5. Before calling each tool, first explain to the USER why you are calling it.
-</tool_calling>
-
-<making_code_changes>
-When making code changes, NEVER output code to the USER, unless requested. Instead use one of the code edit tools to implement the change.
-Use the code edit tools at most once per turn.
-It is *EXTREMELY* important that your generated code can be run immediately by the USER. To ensure this, follow these instructions carefully:
-1. Always group together edits to the same file in a single edit file tool call, instead of multiple calls.
-2. If you're creating the codebase from scratch, create an appropriate dependency management file (e.g. requirements.txt) with package versions and a helpful README.
-3. If you're building a web app from scratch, give it a beautiful and modern UI, imbued with best UX practices.
-4. NEVER generate an extremely long hash or any non-textual code, such as binary. These are not helpful to the USER and are very expensive.
-5. Unless you are appending some small easy to apply edit to a file, or creating a new file, you MUST read the the contents or section of what you're editing before editing it.
-6. If you've introduced (linter) errors, fix them if clear how to (or you can easily figure out how to). Do not make uneducated guesses. And DO NOT loop more than 3 times on fixing linter errors on the same file. On the third time, you should stop and ask the user what to do next.
-7. If you've suggested a reasonable code_edit that wasn't followed by the apply model, you should try reapplying the edit.
-</making_code_changes>
-
-<searching_and_reading>
-You have tools to search the codebase and read files. Follow these rules regarding tool calls:
-1. If available, heavily prefer the semantic search tool to grep search, file search, and list dir tools.
-2. If you need to read a file, prefer to read larger sections of the file at once over multiple smaller calls.
-3. If you have found a reasonable place to edit or answer, do not continue calling tools. Edit or answer from the information you have found.
-</searching_and_reading>
+    def _trim_history(self) -> None:
+        """
+        Drop the oldest turns once the conversation history grows past max_history_messages.
 
-Answer the user's request using the relevant tool(s), if they are available. Check that all the required parameters for each tool call are provided or can reasonably be inferred from context. IF there are no relevant tools or there are missing values for required parameters, ask the user to supply these values; otherwise proceed with the tool calls. If the user provides a specific value for a parameter (for example provided in quotes), make sure to use that value EXACTLY. DO NOT make up values for or ask about optional parameters. Carefully analyze descriptive terms in the request as they may indicate required parameter values that should be included even if not explicitly quoted.
+        The cut is placed at a plain-text user message so that an assistant message with tool calls
+        is never separated from its tool results, which the API would reject. The list is edited in
+        place.
+        """
+        history = self.conversation_history
+        if len(history) <= self.max_history_messages:
+            return
 
-You MUST use the following format when citing code regions or blocks:
-```12:15:app/components/Todo.tsx
-// ... existing code ...
-```
-This is the ONLY acceptable format for code citations. The format is ```startLine:endLine:filepath where startLine and endLine are line numbers.
-"""
+        cut = find_cut_index(history, self.keep_recent_messages) or find_cut_index(history, 1)
+        if cut:
+            del history[:cut]
+            logger.info(f"Dropped {cut} older messages, {len(history)} messages remain in history")
 
     def _prepare_tools(self) -> Optional[List[Dict[str, Any]]]:
         """
         Prepare the registered tools for OpenAI API.
 
+        The list is built once and reused until register_tool adds another tool.
+
         Returns:
             List of tools in the format expected by OpenAI API, or None if no tools are registered
         """
@@ -172,10 +239,9 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
             logger.debug("No tools registered")
             return None
 
-        logger.debug(f"Preparing {len(self.available_tools)} tools for OpenAI API")
-        tools = []
-        for name, tool_data in self.available_tools.items():
-            tools.append(
+        if self._tools_cache is None:
+            logger.debug(f"Preparing {len(self.available_tools)} tools for OpenAI API")
+            self._tools_cache = [
                 {
                     "type": "function",
                     "function": {
@@ -188,17 +254,20 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                         },
                     },
                 }
-            )
-            logger.debug(f"Prepared tool: {name}")
-
-        return tools if tools else None
+                for name, tool_data in self.available_tools.items()
+            ]
+        return self._tools_cache
 
-    def _execute_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _execute_tool_calls(
+        self, tool_calls: List[Dict[str, Any]], parsed_arguments: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Execute the tool calls made by OpenAI.
 
         Args:
             tool_calls: List of tool calls to execute
+            parsed_arguments: Optional dict that receives the parsed arguments of each call, keyed by
+                tool call id, so callers do not have to decode them again
 
         Returns:
             List of tool call results
@@ -213,8 +282,8 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     # It's an object
                     tool_name = call.function.name
                     try:
-                        arguments = json.loads(call.function.arguments)
-                    except json.JSONDecodeError:
+                        arguments = loads_json(call.function.arguments)
+                    except ValueError:
                         arguments = {}
                     tool_call_id = call.id
                     logger.debug(f"Executing tool (object): {tool_name} (id: {tool_call_id})")
@@ -222,14 +291,16 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     # It's a dict
                     tool_name = call["function"]["name"]
                     try:
-                        arguments = json.loads(call["function"]["arguments"])
-                    except json.JSONDecodeError:
+                        arguments = loads_json(call["function"]["arguments"])
+                    except ValueError:
                         arguments = {}
                     # Cast to str to handle potential missing 'id' attribute
                     tool_call_id = cast(str, call.get("id", "unknown_id"))
                     logger.debug(f"Executing tool (dict): {tool_name} (id: {tool_call_id})")
 
-                logger.debug(f"Tool arguments: {json.dumps(arguments)}")
+                if parsed_arguments is not None:
+                    parsed_arguments[tool_call_id] = arguments
+                logger.debug("Tool arguments: %s", arguments)
 
                 if tool_name not in self.available_tools:
                     logger.warning(f"Tool not found: {tool_name}")
@@ -243,23 +314,28 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     function = self.available_tools[tool_name]["function"]
                     result_content = function(**arguments)
 
+                    # String results are sent as they are; structured results are serialized once,
+                    # and the log preview is cut from that text instead of a separate repr
+                    if isinstance(result_content, str):
+                        content = result_content
+                    elif isinstance(result_content, (bytes, bytearray)):
+                        content = result_content.decode("utf-8", "replace")
+                    elif isinstance(result_content, (dict, list)):
+                        content = dumps_json(result_content)
+                    else:
+                        content = str(result_content)
+
                     # Log a summary of the result
                     if isinstance(result_content, dict) and "error" in result_content:
                         logger.warning(f"Tool {tool_name} returned error: {result_content.get('error')}")
                     else:
-                        content_preview = str(result_content)
-                        if len(content_preview) > 100:
-                            content_preview = content_preview[:100] + "..."
+                        content_preview = content[:100] + "..." if len(content) > 100 else content
                         logger.debug(f"Tool {tool_name} result: {content_preview}")
 
                     result = {
                         "role": "tool",
                         "tool_call_id": tool_call_id,
-                        "content": (
-                            json.dumps(result_content)
-                            if isinstance(result_content, dict)
-                            else str(result_content)
-                        ),
+                        "content": content,
                     }
                 tool_results.append(result)
             except Exception as e:
@@ -298,6 +374,7 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
 
         # Add the user message to the conversation history
         self.conversation_history.append({"role": "user", "content": formatted_message})
+        self._trim_history()
 
         # Prepare the messages for the API call
         messages = [{"role": "system", "content": self.system_prompt}] + self.conversation_history
@@ -344,58 +421,27 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     }
                 )
 
-                # Execute the tool calls
-                tool_results = self._execute_tool_calls(assistant_message.tool_calls)
+                # Execute the tool calls, keeping the arguments they were parsed into
+                parsed_arguments: Dict[str, Dict[str, Any]] = {}
+                tool_results = self._execute_tool_calls(assistant_message.tool_calls, parsed_arguments)
 
-                # Process and track tool calls for the structured response
-                for idx, tool_call in enumerate(assistant_message.tool_calls):
-                    tool_name = tool_call.function.name
-                    try:
-                        parameters = json.loads(tool_call.function.arguments)
-                    except json.JSONDecodeError:
-                        parameters = {}
-
-                    # Find the corresponding result
-                    result = None
-                    for res in tool_results:
-                        if res.get("tool_call_id") == tool_call.id:
-                            result = res.get("content", "")
-                            break
-
-                    # Add to processed tool calls
+                # Process and track tool calls for the structured response, looking each result up
+                # by tool call id instead of scanning the results for every call
+                results_by_id = {res.get("tool_call_id"): res.get("content", "") for res in tool_results}
+                for tool_call in assistant_message.tool_calls:
                     processed_tool_calls.append({
-                        "name": tool_name,
-                        "parameters": parameters,
-                        "result": result
+                        "name": tool_call.function.name,
+                        "parameters": parsed_arguments.get(tool_call.id, {}),
+                        "result": results_by_id.get(tool_call.id)
                     })
 
                 # Add the tool results to the conversation history
-                for result in tool_results:
-                    self.conversation_history.append(result)
+                self.conversation_history.extend(tool_results)
 
-                # Make a follow-up API call with the tool results
+                # Make a follow-up API call with the tool results; the history already ends with the
+                # assistant message and its tool results, so it is sent as is
                 logger.debug("Making follow-up API call with tool results")
-                follow_up_messages = (
-                    messages
-                    + [
-                        {
-                            "role": "assistant",
-                            "content": assistant_message.content or "",
-                            "tool_calls": [
-                                {
-                                    "id": tool_call.id,
-                                    "function": {
-                                        "name": tool_call.function.name,
-                                        "arguments": tool_call.function.arguments,
-                                    },
-                                    "type": "function",
-                                }
-                                for tool_call in assistant_message.tool_calls
-                            ],
-                        }
-                    ]
-                    + tool_results
-                )
+                follow_up_messages = [{"role": "system", "content": self.system_prompt}, *self.conversation_history]
                 logger.debug(f"Follow-up call with {len(follow_up_messages)} messages")
 
                 follow_up_response = await self.client.chat.completions.create(
@@ -434,52 +480,42 @@ This is the ONLY acceptable format for code citations. The format is ```startLin
                     "thinking": thinking
                 }
 
-        except AuthenticationError as e:
-            error_msg = f"Error: Authentication failed. Please check your OpenAI API key. Details: {str(e)}"
-            logger.error(f"Authentication error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except BadRequestError as e:
-            error_msg = f"Error: Bad request to the OpenAI API. Details: {str(e)}"
-            logger.error(f"Bad request error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except RateLimitError as e:
-            error_msg = f"Error: Rate limit exceeded. Please try again later. Details: {str(e)}"
-            logger.error(f"Rate limit error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
-        except APIError as e:
-            error_msg = f"Error: OpenAI API error. Details: {str(e)}"
-            logger.error(f"API error: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
         except Exception as e:
-            error_msg = f"Error: An unexpected error occurred. Details: {str(e)}"
-            logger.error(f"Unexpected error: {type(e).__name__}: {str(e)}")
-            return {
-                "message": error_msg,
-                "tool_calls": [],
-                "thinking": None
-            }
+            return self._error_response(self._api_error_message(e))
+
+    def _api_error_message(self, error: Exception) -> str:
+        """
+        Log an error from a chat request and build the message returned to the caller.
+
+        Args:
+            error: The exception raised while talking to the API
+
+        Returns:
+            The error message
+        """
+        if isinstance(error, AuthenticationError):
+            logger.error(f"Authentication error: {str(error)}")
+            return f"Error: Authentication failed. Please check your OpenAI API key. Details: {str(error)}"
+        if isinstance(error, BadRequestError):
+            logger.error(f"Bad request error: {str(error)}")
+            return f"Error: Bad request to the OpenAI API. Details: {str(error)}"
+        if isinstance(error, RateLimitError):
+            logger.error(f"Rate limit error: {str(error)}")
+            return f"Error: Rate limit exceeded. Please try again later. Details: {str(error)}"
+        if isinstance(error, APIError):
+            logger.error(f"API error: {str(error)}")
+            return f"Error: OpenAI API error. Details: {str(error)}"
+        logger.error(f"Unexpected error: {type(error).__name__}: {str(error)}")
+        return f"Error: An unexpected error occurred. Details: {str(error)}"
 
     def register_default_tools(self) -> None:
         """
         Register all the default tools available to the agent.
         """
-        # Use the centralized tool registration function
+        # Use the centralized tool registration function, imported here so that importing this
+        # module does not load every tool module
+        from .tools.register_tools import register_default_tools
+
         logger.info("Registering default tools")
         register_default_tools(self)
         logger.info(f"Registered {len(self.available_tools)} default tools")
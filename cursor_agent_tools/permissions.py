@@ -7,6 +7,7 @@ including permission requests, options, and status management.
 
 import enum
 import json
+import threading
 from dataclasses import dataclass, field
 from typing import Callable, Dict, List, Optional, Any
 
@@ -110,6 +111,8 @@ class PermissionManager:
         logger.debug("Initializing PermissionManager")
         self.options = options or PermissionOptions()
         self.callback = callback
+        # Tools may run concurrently in worker threads; only one confirmation prompt is shown at a time
+        self._prompt_lock = threading.Lock()
 
         # Display warning when YOLO mode is enabled
         if self.options.yolo_mode:
@@ -149,6 +152,28 @@ class PermissionManager:
             print(f"\n❌ Permission denied for {operation}: {json.dumps(details, indent=2)}")
             return False
 
+        with self._prompt_lock:
+            return self._confirm(operation, details, request, status)
+
+    def _confirm(
+        self,
+        operation: str,
+        details: Dict[str, Any],
+        request: PermissionRequest,
+        status: PermissionStatus
+    ) -> bool:
+        """
+        Ask the callback or the user to confirm an operation.
+
+        Args:
+            operation: The type of operation requesting permission
+            details: Details about the operation
+            request: The permission request
+            status: The evaluated permission status
+
+        Returns:
+            True if permission is granted, False otherwise
+        """
         # If we need confirmation and have a callback, use it
         if status == PermissionStatus.NEEDS_CONFIRMATION and self.callback:
             # Forward the request to the callback for handling
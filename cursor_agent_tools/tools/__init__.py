@@ -1,8 +1,41 @@
-from .file_tools import create_file, delete_file, edit_file, list_directory, read_file
-from .search_tools import codebase_search, file_search, grep_search, web_search, trend_search, get_trending_topics
-from .system_tools import run_terminal_command
-from .image_tools import query_images
-from .register_tools import register_default_tools
+import importlib
+from typing import Any, Dict, List
+
+# Public names that are resolved on first attribute access (PEP 562), so importing one tool
+# module does not load the others and their dependencies
+_LAZY_ATTRS: Dict[str, str] = {
+    "read_file": ".file_tools",
+    "edit_file": ".file_tools",
+    "delete_file": ".file_tools",
+    "create_file": ".file_tools",
+    "list_directory": ".file_tools",
+    "codebase_search": ".search_tools",
+    "grep_search": ".search_tools",
+    "file_search": ".search_tools",
+    "web_search": ".search_tools",
+    "trend_search": ".search_tools",
+    "get_trending_topics": ".search_tools",
+    "run_terminal_command": ".system_tools",
+    "query_images": ".image_tools",
+    "register_default_tools": ".register_tools",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve lazily imported tool functions on first access."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+
+    # Cache in the module namespace so later lookups skip this hook
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
+
 
 __all__ = [
     "read_file",
@@ -2,7 +2,7 @@
 Utility module for registering agent tools with permission handling.
 """
 
-from typing import Any
+from typing import Any, Callable, Dict, Tuple
 import asyncio
 
 from ..logger import get_logger
@@ -14,30 +14,17 @@ from . import (
 )
 
 # Define exported functions
-__all__ = ["register_default_tools"]
+__all__ = ["register_default_tools", "DEFAULT_TOOL_SPECS"]
 
 # Initialize logger
 logger = get_logger(__name__)
 
-
-def register_default_tools(agent: Any) -> None:
-    """
-    Register all available tools with the provided agent.
-
-    The agent reference is automatically injected into the tool functions
-    by the agent framework for permission handling.
-
-    Args:
-        agent: The agent instance to register tools with
-    """
-    logger.info("Registering default tools for agent")
-
-    # File tools with permission checks
-    agent.register_tool(
+# Name, description and parameter schema of each default tool. The schemas are static, so they are
+# built once at import time and shared by every agent; only the functions are bound per agent.
+DEFAULT_TOOL_SPECS: Tuple[Tuple[str, str, Dict[str, Any]], ...] = (
+    # File tools
+    (
         "read_file",
-        lambda target_file, offset=None, limit=None, should_read_entire_file=None: file_tools.read_file(
-            target_file, offset, limit, should_read_entire_file, agent
-        ),
         "Read the contents of a file.",
         {
             "type": "object",
@@ -55,14 +42,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["target_file"],
         },
-    )
-    logger.debug("Registered tool: read_file")
-
-    agent.register_tool(
+    ),
+    (
         "edit_file",
-        lambda target_file, instructions, code_edit=None, code_replace=None: file_tools.edit_file(
-            target_file, instructions, code_edit, code_replace, agent
-        ),
         "Edit a file in the codebase.",
         {
             "type": "object",
@@ -93,12 +75,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["target_file", "instructions"],
         },
-    )
-    logger.debug("Registered tool: edit_file")
-
-    agent.register_tool(
+    ),
+    (
         "delete_file",
-        lambda target_file: file_tools.delete_file(target_file, agent),
         "Delete a file at the specified path.",
         {
             "type": "object",
@@ -107,12 +86,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["target_file"],
         },
-    )
-    logger.debug("Registered tool: delete_file")
-
-    agent.register_tool(
+    ),
+    (
         "create_file",
-        lambda file_path, content: file_tools.create_file(file_path, content, agent),
         "Create a new file with the given content.",
         {
             "type": "object",
@@ -125,12 +101,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["file_path", "content"],
         },
-    )
-    logger.debug("Registered tool: create_file")
-
-    agent.register_tool(
+    ),
+    (
         "list_directory",
-        lambda relative_workspace_path: file_tools.list_directory(relative_workspace_path, agent),
         "List the contents of a directory.",
         {
             "type": "object",
@@ -142,15 +115,10 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["relative_workspace_path"],
         },
-    )
-    logger.debug("Registered tool: list_directory")
-
+    ),
     # System tools
-    agent.register_tool(
+    (
         "run_terminal_command",
-        lambda command, explanation=None, is_background=False, require_user_approval=True: system_tools.run_terminal_command(
-            command, explanation, is_background, require_user_approval, agent
-        ),
         "Run a terminal command. IMPORTANT: Always use non-interactive flags that works for the command you are running (like --yes, -y, --no-interaction, yes | , --quiet, or equivalent). i.e git commit -m 'commit message' --no-interaction or yes | npx create-next-app@latest --no-interactive",
         {
             "type": "object",
@@ -171,15 +139,10 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["command"],
         },
-    )
-    logger.debug("Registered tool: run_terminal_command")
-
+    ),
     # Search tools
-    agent.register_tool(
+    (
         "codebase_search",
-        lambda query, target_directories=None, explanation=None: search_tools.codebase_search(
-            query, target_directories, explanation, agent
-        ),
         "Search the codebase using semantic search.",
         {
             "type": "object",
@@ -200,14 +163,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["query"],
         },
-    )
-    logger.debug("Registered tool: codebase_search")
-
-    agent.register_tool(
+    ),
+    (
         "grep_search",
-        lambda query, explanation=None, case_sensitive=False, include_pattern=None, exclude_pattern=None: search_tools.grep_search(
-            query, explanation, case_sensitive, include_pattern, exclude_pattern, agent
-        ),
         "Fast text-based search using regex patterns.",
         {
             "type": "object",
@@ -232,12 +190,9 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["query"],
         },
-    )
-    logger.debug("Registered tool: grep_search")
-
-    agent.register_tool(
+    ),
+    (
         "file_search",
-        lambda query, explanation=None: search_tools.file_search(query, explanation, agent),
         "Fast file search based on fuzzy matching against file path.",
         {
             "type": "object",
@@ -250,15 +205,10 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["query"],
         },
-    )
-    logger.debug("Registered tool: file_search")
-
+    ),
     # Web search
-    agent.register_tool(
+    (
         "web_search",
-        lambda search_term, explanation=None, force=False, objective=None, max_results=5: search_tools.web_search(
-            search_term, explanation, force, objective, max_results, agent
-        ),
         "Search the web for information.",
         {
             "type": "object",
@@ -286,21 +236,10 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["search_term"],
         },
-    )
-    logger.debug("Registered tool: web_search")
-
-    # Register trend search tool
-    agent.register_tool(
+    ),
+    # Trend search
+    (
         "trend_search",
-        lambda query, explanation=None, country_code="US", days=7, max_results=3, lookback_hours=48: asyncio.run(search_tools.trend_search(
-            query=query,
-            explanation=explanation,
-            country_code=country_code,
-            days=days,
-            max_results=max_results,
-            lookback_hours=lookback_hours,
-            agent=agent
-        )),
         "Search for trending topics related to a query",
         {
             "type": "object",
@@ -331,14 +270,11 @@ def register_default_tools(agent: Any) -> None:
                 }
             },
             "required": ["query"]
-        }
-    )
-    logger.debug("Registered tool: trend_search")
-
+        },
+    ),
     # Image query tool
-    agent.register_tool(
+    (
         "query_images",
-        lambda query, image_paths: image_tools.query_images(query, image_paths, agent),
         "Query an AI model about one or more images.",
         {
             "type": "object",
@@ -355,7 +291,73 @@ def register_default_tools(agent: Any) -> None:
             },
             "required": ["query", "image_paths"],
         },
-    )
-    logger.debug("Registered tool: query_images")
+    ),
+)
+
+
+def _bind_tool_functions(agent: Any) -> Dict[str, Callable]:
+    """
+    Build the default tool functions for an agent.
+
+    The agent reference is passed to each tool for permission handling.
+
+    Args:
+        agent: The agent the tools act for
+
+    Returns:
+        Dictionary mapping tool names to functions
+    """
+    return {
+        "read_file": lambda target_file, offset=None, limit=None, should_read_entire_file=None: file_tools.read_file(
+            target_file, offset, limit, should_read_entire_file, agent
+        ),
+        "edit_file": lambda target_file, instructions, code_edit=None, code_replace=None: file_tools.edit_file(
+            target_file, instructions, code_edit, code_replace, agent
+        ),
+        "delete_file": lambda target_file: file_tools.delete_file(target_file, agent),
+        "create_file": lambda file_path, content: file_tools.create_file(file_path, content, agent),
+        "list_directory": lambda relative_workspace_path: file_tools.list_directory(relative_workspace_path, agent),
+        "run_terminal_command": lambda command, explanation=None, is_background=False, require_user_approval=True: system_tools.run_terminal_command(
+            command, explanation, is_background, require_user_approval, agent
+        ),
+        "codebase_search": lambda query, target_directories=None, explanation=None: search_tools.codebase_search(
+            query, target_directories, explanation, agent
+        ),
+        "grep_search": lambda query, explanation=None, case_sensitive=False, include_pattern=None, exclude_pattern=None: search_tools.grep_search(
+            query, explanation, case_sensitive, include_pattern, exclude_pattern, agent
+        ),
+        "file_search": lambda query, explanation=None: search_tools.file_search(query, explanation, agent),
+        "web_search": lambda search_term, explanation=None, force=False, objective=None, max_results=5: search_tools.web_search(
+            search_term, explanation, force, objective, max_results, agent
+        ),
+        "trend_search": lambda query, explanation=None, country_code="US", days=7, max_results=3, lookback_hours=48: asyncio.run(search_tools.trend_search(
+            query=query,
+            explanation=explanation,
+            country_code=country_code,
+            days=days,
+            max_results=max_results,
+            lookback_hours=lookback_hours,
+            agent=agent
+        )),
+        "query_images": lambda query, image_paths: image_tools.query_images(query, image_paths, agent),
+    }
+
+
+def register_default_tools(agent: Any) -> None:
+    """
+    Register all available tools with the provided agent.
+
+    The agent reference is automatically injected into the tool functions
+    by the agent framework for permission handling.
+
+    Args:
+        agent: The agent instance to register tools with
+    """
+    logger.info("Registering default tools for agent")
+
+    functions = _bind_tool_functions(agent)
+    for name, description, parameters in DEFAULT_TOOL_SPECS:
+        agent.register_tool(name, functions[name], description, parameters)
+        logger.debug(f"Registered tool: {name}")
 
     logger.info(f"Successfully registered {len(agent.available_tools)} tools")
@@ -55,7 +55,7 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "anthropic>=0.49.0",
-        "openai>=1.6.1",
+        "openai>=1.17.0",
         "colorama>=0.4.6",
         "python-dotenv>=1.0.0",
         "typing-extensions>=4.8.0",
@@ -66,6 +66,10 @@ setup(
         "beautifulsoup4>=4.12.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.9.0",
+            "h2>=4.1.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
@@ -27,6 +27,14 @@ class TestBasic(unittest.TestCase):
         """Test basic math - this should always pass."""
         self.assertEqual(2 + 2, 4)
 
+    def test_agent_registry_covers_agent_modules(self) -> None:
+        """Test the generated agent registry lists every agent module in the package."""
+        from cursor_agent_tools._agent_registry import AGENT_MODULES
+        from cursor_agent_tools._gen_registry import find_agent_modules
+
+        registered = {module_name[1:] for module_name in AGENT_MODULES.values()}
+        self.assertEqual(registered, set(find_agent_modules()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,18 +2,21 @@ import asyncio
 import os
 import shutil
 import tempfile
+import time
 import unittest
 import pytest
 from typing import Any, Callable, Dict, Optional, ClassVar, Coroutine, TypeVar
 
 from cursor_agent_tools.claude_agent import ClaudeAgent
 from tests.utils import (
+    SharedAgentChecks,
     check_response_quality,
     create_test_file,
     create_user_info,
     delete_test_file,
     get_test_env,
     is_real_api_key,
+    run_isolated,
 )
 
 # Type variable for the coroutine return type
@@ -23,16 +26,26 @@ T = TypeVar('T')
 # Helper for async tests
 def async_test(coro: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., T]:
     def wrapper(*args: Any, **kwargs: Any) -> T:
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(coro(*args, **kwargs))
+        # Create a new event loop, since asyncio.run() in other tests leaves none set
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coro(*args, **kwargs))
+        finally:
+            loop.close()
 
     return wrapper
 
 
 @pytest.mark.anthropic
-class TestClaudeAgent(unittest.TestCase):
+class TestClaudeAgent(SharedAgentChecks, unittest.TestCase):
     """Test the Claude agent functionality with real API."""
 
+    agent_class = ClaudeAgent
+    dummy_api_key = "sk-ant-dummy"
+    valid_api_keys = ["sk-ant-" + "a" * 20, "sk-ant-dummy"]
+    invalid_api_keys = ["sk-short", "pk-ant-" + "a" * 20, "sk-ant-" + "a" * 10 + " " + "a" * 10]
+
     api_key: ClassVar[Optional[str]] = os.environ.get("ANTHROPIC_API_KEY")
 
     @classmethod
@@ -90,6 +103,284 @@ class TestClaudeAgent(unittest.TestCase):
 
         self.assertIn("test_tool", self.agent.available_tools)
         self.assertEqual(self.agent.available_tools["test_tool"]["schema"]["description"], "Test tool")
+        self.assertIs(self.agent._tool_functions["test_tool"], self.agent.available_tools["test_tool"]["function"])
+
+    def test_prompt_caching(self) -> None:
+        """Test the system prompt and the last tool are marked as cache breakpoints."""
+        parameters = {"properties": {"input": {"type": "string"}}, "required": ["input"]}
+        self.agent.register_tool("first_tool", lambda input: input, "First tool", parameters)
+        self.agent.register_tool("second_tool", lambda input: input, "Second tool", parameters)
+
+        tools = self.agent._prepare_tools()
+        assert tools is not None
+        self.assertNotIn("cache_control", tools[0])
+        self.assertEqual(tools[-1]["cache_control"], {"type": "ephemeral"})
+        self.assertNotIn("cache_control", self.agent._claude_tools["second_tool"])
+
+        system = self.agent._system()
+        self.assertEqual(system[0]["text"], self.agent.system_prompt)
+        self.assertEqual(system[0]["cache_control"], {"type": "ephemeral"})
+        self.assertIs(system, self.agent._system())
+
+        self.agent.system_prompt += "\nExtra instructions"
+        self.assertEqual(self.agent._system()[0]["text"], self.agent.system_prompt)
+
+    def test_prepare_tools_after_default_tools(self) -> None:
+        """Test the cached tool list reflects every default tool across chat turns."""
+        self.agent.register_default_tools()
+        tools = self.agent._prepare_tools()
+        assert tools is not None
+
+        self.assertEqual([tool["name"] for tool in tools], list(self.agent.available_tools))
+        self.assertIs(tools, self.agent._prepare_tools())
+
+    def test_default_tool_definitions_shared(self) -> None:
+        """Test agents share the definitions of the default tools but not of custom ones."""
+        other = ClaudeAgent(api_key=self.agent_api_key)
+        self.agent.register_default_tools()
+        other.register_default_tools()
+
+        self.assertIs(self.agent._claude_tools["read_file"], other._claude_tools["read_file"])
+        self.assertIs(self.agent._claude_tools["recall"], other._claude_tools["recall"])
+        # The cache breakpoint is added to a copy, never to a shared definition
+        tools = self.agent._prepare_tools()
+        assert tools is not None
+        last_tool = tools[-1]
+        self.assertNotIn("cache_control", other._claude_tools[last_tool["name"]])
+
+        parameters = {"properties": {"input": {"type": "string"}}, "required": ["input"]}
+        self.agent.register_tool("read_file", lambda input: input, "Custom read", parameters)
+        self.assertEqual(self.agent._claude_tools["read_file"]["description"], "Custom read")
+        self.assertEqual(other._claude_tools["read_file"]["description"], "Read the contents of a file.")
+
+    def test_append_message_filters_api_messages(self) -> None:
+        """Test system and empty messages are kept out of the API message list."""
+        self.agent._append_message({"role": "system", "content": "System note"})
+        self.agent._append_message({"role": "user", "content": "Hello"})
+        self.agent._append_message({"role": "assistant", "content": []})
+
+        self.assertEqual(len(self.agent.conversation_history), 3)
+        self.assertEqual(self.agent._api_messages, [{"role": "user", "content": "Hello"}])
+
+    def test_sdk_imported_on_first_use(self) -> None:
+        """Test importing the Claude agent module does not load the anthropic SDK."""
+        code = (
+            "import sys\n"
+            "from cursor_agent_tools.claude_agent import ClaudeAgent\n"
+            "agent = ClaudeAgent(api_key='sk-ant-dummy')\n"
+            "assert 'anthropic' not in sys.modules\n"
+            "agent.client\n"
+            "assert 'anthropic' in sys.modules\n"
+        )
+        run_isolated(code)
+
+    def test_prompt_prefix_tokens(self) -> None:
+        """Test the system prompt and tools count towards the context budget and are sized once."""
+        prefix = self.agent._prompt_prefix_tokens()
+        self.assertGreater(prefix, len(self.agent.system_prompt) // 4)
+
+        self.agent.register_default_tools()
+        with_tools = self.agent._prompt_prefix_tokens()
+        self.assertGreater(with_tools, prefix)
+        cached = self.agent._prefix_tokens
+        self.assertEqual(self.agent._prompt_prefix_tokens(), with_tools)
+        self.assertIs(self.agent._prefix_tokens, cached)
+
+        # A conversation that fits on its own is compacted once the prefix is counted
+        self.agent.context_window = with_tools + 100
+        self.agent.context_threshold = 1.0
+        self.agent._append_message({"role": "user", "content": "question 0"})
+        self.agent._append_message({"role": "assistant", "content": "x" * 400})
+        self.agent._append_message({"role": "user", "content": "question 1"})
+        self.assertTrue(self.agent._api_messages[0]["content"].startswith("<summary>"))
+
+    def test_context_compaction(self) -> None:
+        """Test older messages are folded into a summary once the message cap is exceeded."""
+        self.agent.max_history_messages = 6
+        self.agent.keep_recent_messages = 2
+        for turn in range(5):
+            self.agent._append_message({"role": "user", "content": f"question {turn}"})
+            self.agent._append_message({"role": "assistant", "content": f"answer {turn}"})
+
+        messages = self.agent._api_messages
+        self.assertLessEqual(len(messages), 6)
+        self.assertTrue(messages[0]["content"].startswith("<summary>"))
+        self.assertEqual(messages[-2:], [
+            {"role": "user", "content": "question 4"},
+            {"role": "assistant", "content": "answer 4"},
+        ])
+        self.assertEqual(len(self.agent.conversation_history), 10)
+
+        # Each folded user turn is archived as a page that the recall tool can return
+        self.assertIn("[p1: question, answer]", messages[0]["content"])
+        self.assertEqual(self.agent._recall("p1"), "user: question 0\n\nassistant: answer 0")
+        self.assertIn("error", self.agent._recall("p99"))
+
+    def test_history_bounded(self) -> None:
+        """Test the history keeps only the most recent messages while older turns stay recallable."""
+        limit = self.agent.conversation_history.maxlen
+        assert limit is not None
+        for turn in range(limit):
+            self.agent._append_message({"role": "user", "content": f"question {turn}"})
+            self.agent._append_message({"role": "assistant", "content": f"answer {turn}"})
+
+        history = self.agent.history_list()
+        self.assertEqual(len(history), limit)
+        self.assertEqual(history[-1], {"role": "assistant", "content": f"answer {limit - 1}"})
+        self.assertEqual(self.agent._recall("p1"), "user: question 0\n\nassistant: answer 0")
+
+    def test_context_management_tools(self) -> None:
+        """Test the summary_context, filter_context and retrieve_memory tools."""
+        for turn in range(3):
+            self.agent._append_message({"role": "user", "content": f"question {turn} about secret-{turn}"})
+            self.agent._append_message({"role": "assistant", "content": f"answer {turn}"})
+        # The turn in progress, which calls the tools
+        self.agent._append_message({"role": "user", "content": "current question"})
+        self.agent._append_message({"role": "assistant", "content": [
+            {"type": "tool_use", "id": "t1", "name": "summary_context", "input": {"span": 2}},
+        ]})
+        history = self.agent.history_list()
+
+        self.assertIn("3 messages", self.agent._filter_context(r"secret-\d"))
+        self.assertEqual(self.agent._api_messages[0]["content"], "question 0 about [filtered]")
+        self.assertEqual(self.agent.history_list(), history)
+
+        self.assertIn("from 2 turns", self.agent._summary_context(2))
+        messages = self.agent._api_messages
+        self.assertEqual(len(messages), 5)
+        self.assertTrue(messages[2]["content"].startswith("<summary>"))
+        self.assertEqual(messages[3]["content"], "current question")
+
+        self.assertIn("question 2", self.agent._retrieve_memory("question 2", top_k=1))
+        self.assertIn("error", self.agent._retrieve_memory("unrelated"))
+        self.assertIn("error", self.agent._filter_context("("))
+
+    def test_execute_tool_calls_concurrently(self) -> None:
+        """Test tool calls run concurrently and results keep the call order."""
+        parameters = {"properties": {"value": {"type": "string"}}, "required": ["value"]}
+
+        def slow_tool(value: str) -> str:
+            time.sleep(0.3)
+            return value
+
+        async def async_tool(value: str) -> Dict[str, str]:
+            return {"value": value}
+
+        self.agent.register_tool("slow_tool", slow_tool, "Slow tool", parameters)
+        self.agent.register_tool("async_tool", async_tool, "Async tool", parameters)
+        calls = [
+            {"name": "slow_tool", "id": "t1", "input": {"value": "a"}},
+            {"name": "slow_tool", "id": "t2", "input": {"value": "b"}},
+            {"name": "async_tool", "id": "t3", "input": {"value": "c"}},
+            {"name": "missing_tool", "id": "t4", "input": {}},
+        ]
+
+        start = time.monotonic()
+        results = asyncio.run(self.agent._execute_tool_calls(calls))
+        self.assertLess(time.monotonic() - start, 0.55)
+
+        blocks = [result["content"][0] for result in results]
+        self.assertEqual([block["tool_use_id"] for block in blocks], ["t1", "t2", "t3", "t4"])
+        self.assertEqual([block["content"] for block in blocks[:3]], ["a", "b", '{"value":"c"}'])
+        self.assertTrue(blocks[3]["is_error"])
+
+    def test_chat_stream(self) -> None:
+        """Test chat_stream yields text chunks, runs tool calls and records the structured response."""
+        from types import SimpleNamespace
+
+        class FakeStream:
+            def __init__(self, chunks: Any, content: Any) -> None:
+                self.chunks, self.content = chunks, content
+
+            async def __aenter__(self) -> "FakeStream":
+                return self
+
+            async def __aexit__(self, *exc: Any) -> None:
+                return None
+
+            @property
+            async def text_stream(self) -> Any:
+                for chunk in self.chunks:
+                    yield chunk
+
+            async def get_final_message(self) -> Any:
+                return SimpleNamespace(content=self.content)
+
+        tool_use = SimpleNamespace(type="tool_use", name="echo", id="t1", input={"value": "x"})
+        streams = [
+            FakeStream(["Let me ", "check."], [SimpleNamespace(type="text", text="Let me check."), tool_use]),
+            FakeStream(["Done", "."], [SimpleNamespace(type="text", text="Done.")]),
+        ]
+        requests = []
+
+        def stream(**params: Any) -> FakeStream:
+            requests.append(params)
+            return streams.pop(0)
+
+        self.agent.client = SimpleNamespace(messages=SimpleNamespace(stream=stream))  # type: ignore[assignment]
+        self.agent.register_tool(
+            "echo", lambda value: value, "Echo", {"properties": {"value": {"type": "string"}}, "required": ["value"]}
+        )
+
+        async def collect() -> Any:
+            return [chunk async for chunk in self.agent.chat_stream("Hi")]
+
+        self.assertEqual(asyncio.run(collect()), ["Let me ", "check.", "Done", "."])
+        last_response = self.agent.last_response
+        assert last_response is not None
+        self.assertEqual(last_response["message"], "Done.")
+        self.assertEqual(
+            last_response["tool_calls"], [{"name": "echo", "parameters": {"value": "x"}, "result": "x"}]
+        )
+        self.assertEqual([m["role"] for m in self.agent._api_messages], ["user", "assistant", "user", "assistant"])
+        self.assertEqual(self.agent._api_messages[-1]["content"], "Done.")
+
+        # The follow-up sends the same tools, so the cached prompt prefix is reused, but disables them
+        self.assertNotIn("tool_choice", requests[0])
+        self.assertIs(requests[1]["tools"], requests[0]["tools"])
+        self.assertEqual(requests[1]["tool_choice"], {"type": "none"})
+
+    def test_repeated_tool_results_shared(self) -> None:
+        """Test identical large tool results are stored once across calls."""
+        parameters = {"properties": {"path": {"type": "string"}}, "required": ["path"]}
+        self.agent.register_tool("read_file", lambda path: "".join(["line\n"] * 100), "Read file", parameters)
+        calls = [{"name": "read_file", "id": f"t{index}", "input": {"path": "a.py"}} for index in range(2)]
+
+        first, second = asyncio.run(self.agent._execute_tool_calls(calls))
+        self.assertEqual(first["content"][0]["content"], "line\n" * 100)
+        self.assertIs(first["content"][0]["content"], second["content"][0]["content"])
+
+    def test_shared_tool_results_bounded(self) -> None:
+        """Test only the most recently seen large tool results are kept for sharing."""
+        self.agent.max_shared_results = 2
+        parameters = {"properties": {"path": {"type": "string"}}, "required": ["path"]}
+        self.agent.register_tool("read_file", lambda path: path * 300, "Read file", parameters)
+        calls = [{"name": "read_file", "id": f"t{path}", "input": {"path": path}} for path in "abac"]
+
+        for call in calls:
+            asyncio.run(self.agent._execute_tool_calls([call]))
+
+        self.assertEqual(list(self.agent._tool_results), ["a" * 300, "c" * 300])
+
+    def test_tool_timeout(self) -> None:
+        """Test a tool call that exceeds the default tool timeout returns an error result."""
+        self.agent.default_tool_timeout = 0.1  # type: ignore[assignment]
+        self.agent.register_tool(
+            "slow_tool", lambda: time.sleep(0.3), "Slow tool", {"properties": {}, "required": []}
+        )
+
+        result = asyncio.run(self.agent._execute_tool_calls([{"name": "slow_tool", "id": "t1", "input": {}}]))
+        block = result[0]["content"][0]
+        self.assertTrue(block["is_error"])
+        self.assertIn("timed out", block["content"])
+
+    def test_format_user_message(self) -> None:
+        """Test user info is embedded as compact JSON."""
+        formatted = self.agent.format_user_message("Hi", {"open_files": ["café.py"], "line": 3})
+        self.assertEqual(
+            formatted,
+            '<user_info>\n{"open_files":["café.py"],"line":3}\n</user_info>\n\n<user_query>\nHi\n</user_query>'
+        )
 
     @async_test
     @unittest.skipIf(not api_key, "Anthropic API key not available")
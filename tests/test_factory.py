@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for the agent factory."""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from cursor_agent_tools.factory import MODEL_MAPPING, _detect_provider, create_agent, refresh_env_keys
+from tests.utils import run_isolated
+
+
+class TestFactory(unittest.TestCase):
+    """Test provider detection from model names."""
+
+    def test_detect_provider(self) -> None:
+        """Test models are matched to providers by their longest known prefix."""
+        self.assertEqual(_detect_provider("claude-3-5-sonnet-latest"), "claude")
+        self.assertEqual(_detect_provider("claude-3-opus-20240229"), "claude")
+        self.assertEqual(_detect_provider("anthropic.claude-v2"), "claude")
+        self.assertEqual(_detect_provider("gpt-4o-mini"), "openai")
+        self.assertEqual(_detect_provider("ft:gpt-4o-mini:org::id"), "openai")
+        self.assertEqual(_detect_provider("openai-custom"), "openai")
+        self.assertEqual(_detect_provider("ollama-llama3"), "ollama")
+        self.assertEqual(_detect_provider("llama3.1"), "ollama")
+        self.assertEqual(_detect_provider("qwen2.5-coder:7b"), "ollama")
+        self.assertIsNone(_detect_provider("gemini-pro"))
+        self.assertIsNone(_detect_provider("gp"))
+        self.assertIsNone(_detect_provider(""))
+
+    def test_model_mapping_read_only(self) -> None:
+        """Test the model tables cannot be modified."""
+        self.assertIn("gpt-4o", MODEL_MAPPING["openai"])
+        with self.assertRaises(TypeError):
+            MODEL_MAPPING["gemini"] = frozenset({"gemini-pro"})  # type: ignore
+        with self.assertRaises(AttributeError):
+            MODEL_MAPPING["openai"].add("gpt-5")  # type: ignore
+
+    def test_model_names_interned(self) -> None:
+        """Test model names are interned so lookups can match by identity."""
+        name = "".join(["gpt-4o", "-mini"])
+        self.assertTrue(any(known is sys.intern(name) for known in MODEL_MAPPING["openai"]))
+
+    def test_detect_provider_memoized(self) -> None:
+        """Test repeated lookups of a model are served from the cache."""
+        _detect_provider("gpt-4o")
+        hits = _detect_provider.cache_info().hits
+        self.assertEqual(_detect_provider("gpt-4o"), "openai")
+        self.assertEqual(_detect_provider.cache_info().hits, hits + 1)
+
+    def test_create_agent_errors(self) -> None:
+        """Test unsupported models and missing API keys are reported."""
+        with self.assertRaisesRegex(ValueError, "Unsupported model: gemini-pro"):
+            create_agent("gemini-pro")
+
+        environ = {key: value for key, value in os.environ.items() if not key.endswith("_API_KEY")}
+        with patch.dict(os.environ, environ, clear=True):
+            refresh_env_keys()
+            with self.assertRaisesRegex(ValueError, "OpenAI API key not provided"):
+                create_agent("gpt-4o")
+            with self.assertRaisesRegex(ValueError, "Anthropic API key not provided"):
+                create_agent("claude-3-5-sonnet-latest")
+
+    def test_env_api_keys_cached(self) -> None:
+        """Test API keys from the environment are cached until refreshed, and missing keys are not."""
+        self.addCleanup(refresh_env_keys)
+        refresh_env_keys()
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": "sk-ant-dummy-first"}):
+            self.assertEqual(create_agent("claude-3-5-sonnet-latest").api_key, "sk-ant-dummy-first")
+            os.environ["ANTHROPIC_API_KEY"] = "sk-ant-dummy-second"
+            self.assertEqual(create_agent("claude-3-5-sonnet-latest").api_key, "sk-ant-dummy-first")
+            refresh_env_keys()
+            self.assertEqual(create_agent("claude-3-5-sonnet-latest").api_key, "sk-ant-dummy-second")
+
+    def test_only_chosen_agent_module_imported(self) -> None:
+        """Test creating an agent imports only that provider's agent module."""
+        code = (
+            "import sys\n"
+            "from cursor_agent_tools.factory import create_agent\n"
+            "assert 'cursor_agent_tools.claude_agent' not in sys.modules\n"
+            "create_agent('claude-3-5-sonnet-latest', api_key='sk-ant-dummy')\n"
+            "assert 'cursor_agent_tools.claude_agent' in sys.modules\n"
+            "assert 'cursor_agent_tools.openai_agent' not in sys.modules\n"
+        )
+        run_isolated(code)
+
+
+if __name__ == "__main__":
+    unittest.main()
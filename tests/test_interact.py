@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Tests for the interactive agent helpers."""
+
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from collections import deque
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, Union
+
+from cursor_agent_tools.base import AgentResponse, BaseAgent
+from cursor_agent_tools.interact import (
+    CURSOR_SYSTEM_PROMPT,
+    Colors,
+    _MAX_CONTEXT_BYTES,
+    _count_lines,
+    _read_file_if_changed,
+    _recent_workspace_files,
+    check_for_user_input_request,
+    extract_tool_calls,
+    get_continuation_prompt,
+    is_task_complete,
+    print_agent_information,
+    process_tool_calls,
+    run_single_query,
+    run_single_query_stream,
+    trim_context_history,
+    update_workspace_state,
+)
+from tests.utils import run_isolated
+
+
+class FakeAgent(BaseAgent):
+    """Agent that answers every message with a fixed response and records the prompts it saw."""
+
+    def __init__(self, response: Union[str, AgentResponse]) -> None:
+        super().__init__(api_key="dummy", model="fake")
+        self.response = response
+        self.system_prompts: List[str] = []
+
+    def _generate_system_prompt(self) -> str:
+        return "default prompt"
+
+    async def chat(self, message: str, user_info: Optional[Dict[str, Any]] = None) -> Union[str, AgentResponse]:
+        self.system_prompts.append(self.system_prompt)
+        return self.response
+
+    async def query_image(self, image_paths: List[str], query: str) -> str:
+        return ""
+
+    async def get_structured_output(self, prompt: str, schema: Dict[str, Any], model: Optional[str] = None) -> Dict[str, Any]:
+        return {}
+
+    def _prepare_tools(self) -> Any:
+        return []
+
+    def _execute_tool_calls(self, tool_calls: Any) -> List[Dict[str, Any]]:
+        return []
+
+
+async def collect(agent: BaseAgent, query: str) -> List[str]:
+    """Collect the chunks streamed for a query."""
+    return [chunk async for chunk in run_single_query_stream(agent, query)]
+
+
+class TestInteract(unittest.TestCase):
+    """Test the helpers used by the interactive loop."""
+
+    def test_run_single_query_stream(self) -> None:
+        """Test agents without a streaming API yield their whole response and record it."""
+        agent = FakeAgent({"message": "Done.", "tool_calls": [], "thinking": None})
+
+        self.assertEqual(asyncio.run(collect(agent, "Hi")), ["Done."])
+        assert agent.last_response is not None
+        self.assertEqual(agent.last_response["message"], "Done.")
+        self.assertEqual(agent.system_prompts, ["default prompt"])
+
+        agent = FakeAgent("Plain text")
+        self.assertEqual(asyncio.run(collect(agent, "Hi")), ["Plain text"])
+        self.assertEqual(agent.last_response, {"message": "Plain text", "tool_calls": [], "thinking": None})
+
+    def test_run_single_query_stream_error(self) -> None:
+        """Test a failing query yields the error text and records it as a structured response."""
+        agent = FakeAgent("unused")
+
+        async def fail(message: str, user_info: Optional[Dict[str, Any]] = None) -> str:
+            raise RuntimeError("boom")
+
+        agent.chat = fail  # type: ignore[method-assign]
+        self.assertEqual(asyncio.run(collect(agent, "Hi")), ["Error processing query: boom"])
+        self.assertEqual(agent.last_response, {"message": "Error processing query: boom", "tool_calls": [], "thinking": None})
+
+    def test_print_agent_information(self) -> None:
+        """Test information is colored by type locally, without asking the agent to format it."""
+        agent = FakeAgent("unused")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            print_agent_information(agent, "error", "Failed", {"file": "a.py"})
+            print_agent_information(agent, "unknown", "Plain")
+
+        self.assertEqual(
+            output.getvalue(),
+            f"{Colors.RED}Failed{Colors.ENDC}\n{Colors.RED}  file: a.py{Colors.ENDC}\nPlain{Colors.ENDC}\n",
+        )
+        self.assertEqual(agent.system_prompts, [])
+
+    def test_check_for_user_input_request(self) -> None:
+        """Test questions and request phrases are detected without a model call."""
+        agent = FakeAgent("unused")
+        prompt = "Please provide the requested information:"
+
+        self.assertEqual(asyncio.run(check_for_user_input_request(agent, "Which port should I use?")), prompt)
+        self.assertEqual(asyncio.run(check_for_user_input_request(agent, "Please LET ME KNOW the port.")), prompt)
+        self.assertFalse(asyncio.run(check_for_user_input_request(agent, "I created the server.")))
+        self.assertEqual(agent.system_prompts, [])
+
+    def test_get_continuation_prompt(self) -> None:
+        """Test continuation prompts are built from a template without a model call."""
+        agent = FakeAgent("unused")
+
+        prompt = asyncio.run(get_continuation_prompt(agent, 2, "Step one done.", "use port 8080"))
+        self.assertEqual(prompt, "User feedback: use port 8080\n\nContinue with the next steps.")
+        prompt = asyncio.run(get_continuation_prompt(agent, 2, "Step one done."))
+        self.assertIn("iteration 3", prompt)
+        self.assertEqual(agent.system_prompts, [])
+
+    def test_is_task_complete(self) -> None:
+        """Test completion statements are detected unless they lead into next steps."""
+        self.assertTrue(is_task_complete("All tests pass. The Task is complete."))
+        self.assertFalse(is_task_complete("Once the task is complete, the next step is deployment."))
+        self.assertTrue(is_task_complete("Task complete, next we wait. Everything is now implemented."))
+        self.assertTrue(is_task_complete("In conclusion, all requirements are satisfied."))
+        self.assertFalse(is_task_complete("I created the first module."))
+
+    def test_extract_tool_calls(self) -> None:
+        """Test tool calls named in text are extracted in order with the argument on the next line."""
+        response = 'Calling create_file with file_path:\n  "app.py"\nNow run_terminal_cmd command:\n\'ls -la\'\nedit_file\n'
+
+        self.assertEqual(extract_tool_calls(response), [
+            {"tool": "create_file", "args": {"file_path": "app.py"}},
+            {"tool": "run_terminal_cmd", "args": {"command": "ls -la"}},
+            {"tool": "edit_file", "args": {"target_file": "unknown"}},
+        ])
+        self.assertEqual(extract_tool_calls("The last line names create_file"), [])
+
+    def test_bounded_histories(self) -> None:
+        """Test histories are bounded deques that still serialize into the user message."""
+        user_info: Dict[str, Any] = {"tool_calls": list(range(12)), "command_history": deque(["ls"], maxlen=5)}
+        user_info = asyncio.run(trim_context_history(user_info))
+
+        self.assertEqual(list(user_info["tool_calls"]), list(range(2, 12)))
+        user_info["tool_calls"].append(12)
+        self.assertEqual(len(user_info["tool_calls"]), 10)
+        message = FakeAgent("unused").format_user_message("Hi", user_info)
+        self.assertIn('"command_history":["ls"]', message)
+        self.assertIn('"tool_calls":[3,4,5,6,7,8,9,10,11,12]', message)
+
+    def test_process_tool_calls(self) -> None:
+        """Test tool calls update the tracking state and are printed in one batch."""
+        user_info: Dict[str, Any] = {"tool_calls": deque(maxlen=10), "command_history": deque(maxlen=5)}
+        files: set = set()
+        response = "create_file file_path\napp.py\nrun_terminal_cmd command\npython app.py\n"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            total, tool_calls = asyncio.run(process_tool_calls(FakeAgent("unused"), response, user_info, files, 3))
+
+        self.assertEqual(total, 5)
+        self.assertEqual(len(tool_calls), 2)
+        self.assertEqual(files, {"app.py"})
+        self.assertEqual(list(user_info["command_history"]), ["python app.py"])
+        self.assertIn("Modified app.py", output.getvalue())
+        self.assertIn("Executed command: python app.py", output.getvalue())
+
+        structured_response: Any = {"message": "Ran it.", "tool_calls": [
+            {"name": "run_terminal_command", "parameters": {"command": "pytest"}, "result": "ok"},
+            {"name": "edit_file", "parameters": {"target_file": "b.py"}, "output": "", "error": None},
+        ]}
+        with redirect_stdout(io.StringIO()):
+            total, tool_calls = asyncio.run(process_tool_calls(FakeAgent("unused"), structured_response, user_info, files, 0))
+
+        self.assertEqual(total, 2)
+        self.assertEqual(tool_calls[0], {"tool": "run_terminal_command", "args": {"command": "pytest"}, "result": "ok"})
+        self.assertEqual(files, {"app.py", "b.py"})
+        self.assertEqual(list(user_info["command_history"]), ["python app.py", "pytest"])
+
+    def test_run_single_query_keeps_custom_prompt(self) -> None:
+        """Test the custom system prompt is set once and kept, so it stays stable across queries."""
+        agent = FakeAgent("Done.")
+        for _ in range(2):
+            self.assertEqual(asyncio.run(run_single_query(agent, "Hi", use_custom_system_prompt=True)), "Done.")
+
+        self.assertEqual(agent.system_prompts, [CURSOR_SYSTEM_PROMPT, CURSOR_SYSTEM_PROMPT])
+        self.assertIs(agent.system_prompt, CURSOR_SYSTEM_PROMPT)
+
+    def test_update_workspace_state(self) -> None:
+        """Test new files are added to open_files once and their contents cached."""
+        with tempfile.TemporaryDirectory() as workspace:
+            paths = [os.path.join(workspace, name) for name in ("a.py", "b.py")]
+            for path in paths:
+                with open(path, "w") as f:
+                    f.write("print('hi')\n")
+            user_info: Dict[str, Any] = {"workspace_path": workspace, "open_files": [paths[0]], "file_contents": {}}
+
+            with redirect_stdout(io.StringIO()):
+                asyncio.run(update_workspace_state(user_info, set(paths)))
+
+            self.assertEqual(user_info["open_files"], paths)
+            self.assertEqual(sorted(user_info["recent_files"]), paths)
+            self.assertEqual(user_info["file_contents"][paths[1]], "print('hi')\n")
+            self.assertEqual(user_info["cursor_position"]["file"], paths[1])
+
+    def test_update_workspace_state_normalizes_state(self) -> None:
+        """Test missing or malformed open_files and file_contents are replaced before use."""
+        with tempfile.TemporaryDirectory() as workspace:
+            path = os.path.join(workspace, "a.py")
+            with open(path, "w") as f:
+                f.write("a = 1\n")
+
+            user_info: Dict[str, Any] = {"workspace_path": workspace, "open_files": "a.py"}
+            with redirect_stdout(io.StringIO()):
+                asyncio.run(update_workspace_state(user_info, {path}))
+            self.assertEqual(user_info["open_files"], [path])
+            self.assertEqual(user_info["file_contents"], {path: "a = 1\n"})
+
+            user_info = {"workspace_path": workspace, "file_contents": None}
+            with redirect_stdout(io.StringIO()):
+                asyncio.run(update_workspace_state(user_info, {path}))
+            self.assertEqual(user_info["open_files"], [path])
+            self.assertIsNone(user_info["file_contents"])
+
+    def test_update_workspace_state_skips_unchanged_files(self) -> None:
+        """Test open files are only read again when their modification time or size changes."""
+        with tempfile.TemporaryDirectory() as workspace:
+            path = os.path.join(workspace, "a.py")
+            with open(path, "w") as f:
+                f.write("a = 1\n")
+            user_info: Dict[str, Any] = {"workspace_path": workspace, "open_files": [path], "file_contents": {}}
+            signatures: Dict[str, Any] = {}
+
+            asyncio.run(update_workspace_state(user_info, set(), signatures))
+            user_info["file_contents"][path] = "cached"
+            asyncio.run(update_workspace_state(user_info, set(), signatures))
+            self.assertEqual(user_info["file_contents"][path], "cached")
+
+            with open(path, "w") as f:
+                f.write("a = 12\n")
+            asyncio.run(update_workspace_state(user_info, set(), signatures))
+            self.assertEqual(user_info["file_contents"][path], "a = 12\n")
+
+    def test_large_file_contents_truncated(self) -> None:
+        """Test only the beginning and end of a large open file are read."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "big.log")
+            with open(path, "w") as f:
+                f.write("a" * _MAX_CONTEXT_BYTES + "b" * 1000)
+
+            result = _read_file_if_changed(path, None)
+            assert result is not None
+            content, signature = result
+
+            half = _MAX_CONTEXT_BYTES // 2
+            self.assertEqual(content, "a" * half + "\n... [1000 bytes omitted] ...\n" + "a" * (half - 1000) + "b" * 1000)
+            self.assertEqual(signature[1], _MAX_CONTEXT_BYTES + 1000)
+
+    def test_recent_workspace_files_skips_ignored_dirs(self) -> None:
+        """Test hidden, dependency and build directories are not scanned."""
+        with tempfile.TemporaryDirectory() as workspace:
+            for directory in ("src", ".git", "node_modules", "__pycache__", ".venv/lib"):
+                os.makedirs(os.path.join(workspace, directory), exist_ok=True)
+                with open(os.path.join(workspace, directory, "a.py"), "w") as f:
+                    f.write("")
+
+            self.assertEqual(_recent_workspace_files(workspace), [os.path.join(workspace, "src", "a.py")])
+
+    def test_env_file_loaded_lazily(self) -> None:
+        """Test importing the module does not load python-dotenv or read a .env file."""
+        code = "import sys, cursor_agent_tools.interact\nassert 'dotenv' not in sys.modules\n"
+        run_isolated(code)
+
+    def test_count_lines(self) -> None:
+        """Test lines are counted like readlines() up to the limit."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "a.txt")
+            for text, expected in (("", 0), ("one", 1), ("one\ntwo\n", 2), ("x\n" * 100, 10)):
+                with open(path, "w") as f:
+                    f.write(text)
+                self.assertEqual(min(10, _count_lines(path, 10)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
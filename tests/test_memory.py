@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Tests for the context management helpers."""
+
+import unittest
+from typing import Any, Dict, List
+
+from cursor_agent_tools.memory import (
+    ContextSummary,
+    content_text,
+    estimate_tokens,
+    find_cut_index,
+    page_keywords,
+    split_rounds,
+)
+
+
+def tool_round(tool_id: str) -> List[Dict[str, Any]]:
+    """Build an assistant tool call and the user message carrying its result."""
+    return [
+        {"role": "assistant", "content": [
+            {"type": "text", "text": "I will read the file."},
+            {"type": "tool_use", "id": tool_id, "name": "read_file", "input": {"target_file": "src/app.py"}},
+        ]},
+        {"role": "user", "content": [{"type": "tool_result", "tool_use_id": tool_id, "content": "print('hi')"}]},
+    ]
+
+
+class TestMemory(unittest.TestCase):
+    """Test token estimation, cut selection and summaries."""
+
+    def test_content_text(self) -> None:
+        """Test text is extracted from strings and content blocks."""
+        self.assertEqual(content_text("hello"), "hello")
+        text = content_text(tool_round("t1")[0]["content"] + tool_round("t1")[1]["content"])
+        self.assertIn("I will read the file.", text)
+        self.assertIn("src/app.py", text)
+        self.assertIn("print('hi')", text)
+        self.assertEqual(estimate_tokens({"role": "user", "content": "x" * 40}), 11)
+
+    def test_find_cut_index_keeps_tool_pairs(self) -> None:
+        """Test the cut lands on a plain user message, never between a tool call and its result."""
+        messages = [{"role": "user", "content": "first"}] + tool_round("t1")
+        messages += [{"role": "user", "content": "second"}] + tool_round("t2")
+
+        self.assertEqual(find_cut_index(messages, 2), 3)
+        self.assertEqual(find_cut_index(messages, 3), 3)
+        self.assertEqual(find_cut_index(messages, 4), 0)
+
+    def test_pages(self) -> None:
+        """Test messages split into per-turn pages with tool names leading the keywords."""
+        messages = [{"role": "user", "content": "Read the parser module"}] + tool_round("t1")
+        messages += [{"role": "user", "content": "Now the lexer"}]
+        rounds = split_rounds(messages)
+
+        self.assertEqual([len(page) for page in rounds], [3, 1])
+        keywords = page_keywords(rounds[0])
+        self.assertEqual(keywords[0], "read_file")
+        self.assertEqual(len(keywords), 4)
+        self.assertIn("read", keywords)
+
+        keywords = page_keywords([{"role": "user", "content": "Update (src/app.py), then update src/app.py: the bug."}])
+        self.assertEqual(keywords, ["update", "src/app.py", "bug"])
+
+    def test_context_summary(self) -> None:
+        """Test the summary records requests, tools, files and notes."""
+        summary = ContextSummary()
+        summary.add_messages(
+            [{"role": "user", "content": "<user_query>\nFix the bug in utils.py\n</user_query>"}] + tool_round("t1")
+        )
+        rendered = summary.render()
+
+        self.assertTrue(rendered.startswith("<summary>"))
+        self.assertIn("Summary of 3 earlier messages", rendered)
+        self.assertIn("- Fix the bug in utils.py", rendered)
+        self.assertIn("Tools used: read_file", rendered)
+        self.assertIn("src/app.py", rendered)
+        self.assertIn("- I will read the file.", rendered)
+
+
+if __name__ == "__main__":
+    unittest.main()
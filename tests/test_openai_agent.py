@@ -5,14 +5,16 @@ import shutil
 import tempfile
 import unittest
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Callable, Dict, TypeVar, Optional, ClassVar, Coroutine, Union
 
 import pytest
 from dotenv import load_dotenv
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 
 from cursor_agent_tools.openai_agent import OpenAIAgent
 from tests.utils import (
+    SharedAgentChecks,
     create_test_file,
     create_user_info,
     delete_test_file,
@@ -38,6 +40,10 @@ def check_response_quality(response: Union[str, AgentResponse]) -> bool:
     return bool(response and len(response) > 20)
 
 
+# Key for agents whose requests never reach the API
+DUMMY_API_KEY = "sk-dummy"
+
+
 # Helper for async tests
 def async_test(coro: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., T]:
     def wrapper(*args: Any, **kwargs: Any) -> T:
@@ -280,5 +286,114 @@ class TestOpenAIAgent(unittest.TestCase):
     # Can add more tests for other tool functionality
 
 
+class TestOpenAIAgentOffline(SharedAgentChecks, unittest.TestCase):
+    """Test the OpenAI agent without calling the API."""
+
+    agent_class = OpenAIAgent
+    dummy_api_key = DUMMY_API_KEY
+    valid_api_keys = ["sk-" + "a" * 17]
+    invalid_api_keys = ["sk-" + "a" * 16, "pk-" + "a" * 20, "sk-" + "a" * 10 + " " + "a" * 10]
+
+    def tool_name(self, tool: Dict[str, Any]) -> str:
+        return str(tool["function"]["name"])
+
+    @async_test
+    async def test_tool_call_follow_up(self) -> None:
+        """Test the follow-up request after a tool call is the system prompt plus the history."""
+        agent = OpenAIAgent(api_key=DUMMY_API_KEY)
+        parameters = {"properties": {"input": {"type": "string"}}, "required": ["input"]}
+        agent.register_tool("echo", lambda input: input.upper(), "Echo tool", parameters)
+
+        tool_call = SimpleNamespace(id="call_1", function=SimpleNamespace(name="echo", arguments='{"input": "hi"}'))
+        replies = [
+            SimpleNamespace(content=None, tool_calls=[tool_call]),
+            SimpleNamespace(content="Done.", tool_calls=None),
+        ]
+        create = AsyncMock(side_effect=[SimpleNamespace(choices=[SimpleNamespace(message=m)]) for m in replies])
+        agent.client = SimpleNamespace(  # type: ignore[assignment]
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+        response = await agent.chat("Echo hi")
+
+        assert isinstance(response, dict)
+        self.assertEqual(response["message"], "Done.")
+        self.assertEqual(response["tool_calls"], [{"name": "echo", "parameters": {"input": "hi"}, "result": "HI"}])
+        follow_up_messages = create.call_args_list[1].kwargs["messages"]
+        self.assertEqual(follow_up_messages[0], {"role": "system", "content": agent.system_prompt})
+        self.assertEqual(follow_up_messages[1:], agent.conversation_history[:-1])
+        self.assertEqual(follow_up_messages[-1], {"role": "tool", "tool_call_id": "call_1", "content": "HI"})
+
+    @async_test
+    async def test_chat_error_response(self) -> None:
+        """Test a failed request is returned as an error message with no tool calls."""
+        agent = OpenAIAgent(api_key=DUMMY_API_KEY)
+        create = AsyncMock(side_effect=RuntimeError("connection reset"))
+        agent.client = SimpleNamespace(  # type: ignore[assignment]
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+        response = await agent.chat("Hi")
+
+        self.assertEqual(response, {
+            "message": "Error: An unexpected error occurred. Details: connection reset",
+            "tool_calls": [],
+            "thinking": None,
+        })
+
+    def test_execute_tool_calls_parsed_arguments(self) -> None:
+        """Test the arguments of each call are parsed once and handed back by tool call id."""
+        agent = OpenAIAgent(api_key=DUMMY_API_KEY)
+        parameters = {"properties": {"input": {"type": "string"}}, "required": []}
+        agent.register_tool("echo", lambda input="": input, "Echo tool", parameters)
+        tool_calls = [
+            {"id": "call_1", "function": {"name": "echo", "arguments": '{"input": "hi"}'}},
+            {"id": "call_2", "function": {"name": "echo", "arguments": "not json"}},
+        ]
+
+        parsed_arguments: Dict[str, Dict[str, Any]] = {}
+        results = agent._execute_tool_calls(tool_calls, parsed_arguments)
+
+        self.assertEqual(parsed_arguments, {"call_1": {"input": "hi"}, "call_2": {}})
+        self.assertEqual([result["content"] for result in results], ["hi", ""])
+
+    def test_execute_tool_calls_result_content(self) -> None:
+        """Test text results are sent as they are and structured results as compact JSON."""
+        agent = OpenAIAgent(api_key=DUMMY_API_KEY)
+        parameters: Dict[str, Any] = {"properties": {}, "required": []}
+        agent.register_tool("text", lambda: "café", "Text tool", parameters)
+        agent.register_tool("raw", lambda: "café".encode() + b"\xff", "Bytes tool", parameters)
+        agent.register_tool("items", lambda: ["a", "é"], "List tool", parameters)
+        agent.register_tool("info", lambda: {"size": 3}, "Dict tool", parameters)
+        tool_calls = [
+            {"id": f"call_{name}", "function": {"name": name, "arguments": "{}"}} for name in ("text", "raw", "items", "info")
+        ]
+
+        results = agent._execute_tool_calls(tool_calls)
+
+        self.assertEqual(
+            [result["content"] for result in results], ["café", "café\ufffd", '["a","é"]', '{"size":3}']
+        )
+
+    def test_trim_history_keeps_tool_pairs(self) -> None:
+        """Test old turns are dropped whole once the history passes its limit."""
+        agent = OpenAIAgent(api_key=DUMMY_API_KEY)
+        agent.max_history_messages = 6
+        agent.keep_recent_messages = 4
+        for turn in range(3):
+            agent.conversation_history += [
+                {"role": "user", "content": f"question {turn}"},
+                {"role": "assistant", "content": "", "tool_calls": [{"id": f"call_{turn}"}]},
+                {"role": "tool", "tool_call_id": f"call_{turn}", "content": "ok"},
+            ]
+
+        agent._trim_history()
+
+        self.assertEqual(len(agent.conversation_history), 6)
+        self.assertEqual(agent.conversation_history[0], {"role": "user", "content": "question 1"})
+        agent._trim_history()
+        self.assertEqual(len(agent.conversation_history), 6)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -9,6 +9,7 @@ import pytest
 from cursor_agent_tools.tools.file_tools import create_file, delete_file, edit_file, list_directory, read_file
 from cursor_agent_tools.tools.search_tools import file_search, grep_search
 from cursor_agent_tools.tools.system_tools import run_terminal_command
+from tests.utils import run_isolated
 
 
 @pytest.mark.fs_tools
@@ -262,5 +263,21 @@ class TestSystemTools(unittest.TestCase):
         self.assertIn("error", result)
 
 
+class TestToolsPackage(unittest.TestCase):
+    """Test the tools package imports tool modules on demand."""
+
+    def test_tool_modules_imported_lazily(self) -> None:
+        """Test importing one tool module does not load the others."""
+        code = (
+            "import sys\n"
+            "from cursor_agent_tools.tools.file_tools import read_file\n"
+            "assert 'cursor_agent_tools.tools.search_tools' not in sys.modules\n"
+            "from cursor_agent_tools.tools import grep_search\n"
+            "assert 'cursor_agent_tools.tools.search_tools' in sys.modules\n"
+            "assert 'cursor_agent_tools.tools.system_tools' not in sys.modules\n"
+        )
+        run_isolated(code)
+
+
 if __name__ == "__main__":
     unittest.main()
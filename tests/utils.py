@@ -1,6 +1,13 @@
+import asyncio
 import os
+import subprocess
+import sys
 import time
-from typing import Any, Dict, Optional
+import unittest
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, List, Optional
+
+# Repository root, the working directory for code run in a fresh interpreter
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 def get_test_env() -> Dict[str, str]:
@@ -68,6 +75,92 @@ def is_real_api_key(api_key: Optional[str], provider: str) -> bool:
     return False
 
 
+def run_isolated(code: str) -> None:
+    """
+    Run Python code in a fresh interpreter, e.g. to check which modules an import loads.
+
+    Raises:
+        AssertionError: If the code fails, with the interpreter's stderr as the message
+    """
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+
+
+# Type the checks below as a TestCase without making the mixin itself a collected test class
+if TYPE_CHECKING:
+    _TestCase = unittest.TestCase
+else:
+    _TestCase = object
+
+
+class SharedAgentChecks(_TestCase):
+    """
+    Offline checks shared by the tests of the API agents.
+
+    Mix into a unittest.TestCase that sets agent_class, a dummy_api_key in that provider's format and
+    examples of valid and invalid keys. Override tool_name for providers whose tool definitions do
+    not carry the name at the top level.
+    """
+
+    agent_class: ClassVar[Any]
+    dummy_api_key: ClassVar[str]
+    valid_api_keys: ClassVar[List[str]]
+    invalid_api_keys: ClassVar[List[str]]
+
+    def tool_name(self, tool: Dict[str, Any]) -> str:
+        """Return the name of a tool in the format sent to the provider's API."""
+        return str(tool["name"])
+
+    def test_shared_client(self) -> None:
+        """Test agents with the same key and timeout share a client within an event loop."""
+        agent, other = self.agent_class(api_key=self.dummy_api_key), self.agent_class(api_key=self.dummy_api_key)
+
+        async def get_clients() -> Any:
+            return asyncio.get_running_loop(), agent.client, other.client
+
+        first_loop, first, second = asyncio.run(get_clients())
+        self.assertIs(first, second)
+        self.assertIsNot(asyncio.run(get_clients())[1], first)
+        # The clients of the closed first loop are dropped once another loop needs a client
+        self.assertNotIn(first_loop, self.agent_class._client_cache)
+        self.assertIsNot(self.agent_class(api_key=self.dummy_api_key, timeout=30).client, agent.client)
+
+    def test_aclose(self) -> None:
+        """Test aclose closes the clients shared on the running event loop."""
+        agent = self.agent_class(api_key=self.dummy_api_key)
+
+        async def use_and_close() -> Any:
+            client = agent.client
+            await self.agent_class.aclose()
+            return client
+
+        client = asyncio.run(use_and_close())
+        self.assertTrue(client.is_closed())
+        self.assertEqual(len(self.agent_class._client_cache), 0)
+
+    def test_is_valid_api_key(self) -> None:
+        """Test the API key format check."""
+        agent = self.agent_class(api_key=self.dummy_api_key)
+        for valid_key in self.valid_api_keys:
+            self.assertTrue(agent._is_valid_api_key(valid_key), valid_key)
+        invalid_keys: List[Optional[str]] = ["", None, *self.invalid_api_keys]
+        for invalid_key in invalid_keys:
+            self.assertFalse(agent._is_valid_api_key(invalid_key), invalid_key)
+
+    def test_prepare_tools_cache(self) -> None:
+        """Test the prepared tool list is reused until a new tool is registered."""
+        agent = self.agent_class(api_key=self.dummy_api_key)
+        parameters = {"properties": {"input": {"type": "string"}}, "required": ["input"]}
+        agent.register_tool("first_tool", lambda input: input, "First tool", parameters)
+
+        tools = agent._prepare_tools()
+        self.assertIs(tools, agent._prepare_tools())
+
+        agent.register_tool("second_tool", lambda input: input, "Second tool", parameters)
+        self.assertEqual([self.tool_name(tool) for tool in agent._prepare_tools()], ["first_tool", "second_tool"])
+
+
 def create_test_file(filepath: str, content: str) -> str:
     """Create a temporary test file."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)